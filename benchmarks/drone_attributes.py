@@ -0,0 +1,130 @@
+"""
+Memory per drone used by the resource attributes
+
+Compares the former per-drone :py:class:`~tardis.utilities.attributedict.AttributeDict`
+with :py:class:`~tardis.resources.droneattributes.DroneAttributes`, after the
+status of each drone was updated by the
+:py:class:`~tardis.adapters.sites.slurm.SlurmAdapter` from a faked ``squeue``, the
+way drones update their attributes while running.
+
+Usage: python3 benchmarks/drone_attributes.py [--drones N]
+"""
+from tardis.adapters.sites.slurm import SlurmAdapter
+from tardis.configuration.configuration import Configuration
+from tardis.interfaces.executor import Executor
+from tardis.resources.droneattributes import DroneAttributes, MachineTypeAttributes
+from tardis.utilities.attributedict import AttributeDict
+
+from datetime import datetime
+
+import argparse
+import asyncio
+import tracemalloc
+import uuid
+
+TRANSLATION_MAPPING = AttributeDict(Cores=1, Memory=1024, Disk=1024 * 1024)
+
+
+class SqueueExecutor(Executor):
+    """Executor reporting ``drones`` running jobs to ``squeue``"""
+
+    def __init__(self, drones: int):
+        self._stdout = "\n".join(
+            f"{job_id}|benchmark-{job_id}|RUNNING" for job_id in range(drones)
+        )
+
+    async def run_command(self, command, stdin_input=None):
+        return AttributeDict(stdout=self._stdout, stderr="", exit_code=0)
+
+
+def slurm_adapter(drones: int) -> SlurmAdapter:
+    Configuration(
+        {
+            "Sites": [{"name": "BenchmarkSite", "adapter": "Slurm", "quota": -1}],
+            "BenchmarkSite": {
+                "executor": SqueueExecutor(drones),
+                "StatusUpdate": 1,
+                "MachineTypes": ["m1.benchmark"],
+                "MachineTypeConfiguration": {
+                    "m1.benchmark": {"Walltime": 60, "Partition": "normal"}
+                },
+                "MachineMetaData": {
+                    "m1.benchmark": {"Cores": 8, "Memory": 16, "Disk": 160}
+                },
+                "StartupCommand": "pilot.sh",
+            },
+        }
+    )
+    return SlurmAdapter(machine_type="m1.benchmark", site_name="BenchmarkSite")
+
+
+def legacy_attributes(adapter: SlurmAdapter, idx: int) -> AttributeDict:
+    return AttributeDict(
+        site_name=adapter.site_name,
+        machine_type=adapter.machine_type,
+        obs_machine_meta_data_translation_mapping=TRANSLATION_MAPPING,
+        remote_resource_uuid=str(idx),
+        created=datetime.now(),
+        updated=datetime.now(),
+        drone_uuid=f"benchmarksite-{uuid.uuid4().hex[:10]}",
+    )
+
+
+def compact_attributes(adapter: SlurmAdapter, idx: int) -> DroneAttributes:
+    return DroneAttributes(
+        MachineTypeAttributes.get(
+            site_name=adapter.site_name,
+            machine_type=adapter.machine_type,
+            obs_machine_meta_data_translation_mapping=TRANSLATION_MAPPING,
+        ),
+        remote_resource_uuid=str(idx),
+        created=datetime.now(),
+        updated=datetime.now(),
+        drone_uuid=f"benchmarksite-{uuid.uuid4().hex[:10]}",
+    )
+
+
+def update_status(adapter: SlurmAdapter, attributes):
+    """Update the attributes by the adapter like the drone states do"""
+    response = asyncio.get_event_loop().run_until_complete(
+        adapter.resource_status(attributes)
+    )
+    attributes.update(response)
+    return attributes
+
+
+def measure(adapter: SlurmAdapter, factory, drones: int) -> float:
+    """Bytes allocated per drone"""
+    # fill the status cache before measuring
+    asyncio.get_event_loop().run_until_complete(adapter._slurm_status.update_status())
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        attributes = [
+            update_status(adapter, factory(adapter, idx)) for idx in range(drones)
+        ]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(attributes) == drones
+    assert all(attribute.resource_status for attribute in attributes)
+    return (after - before) / drones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--drones", type=int, default=50_000)
+    arguments = parser.parse_args()
+    adapter = slurm_adapter(arguments.drones)
+    for name, factory in (
+        ("AttributeDict", legacy_attributes),
+        ("DroneAttributes", compact_attributes),
+    ):
+        print(
+            f"{name:>15}: {measure(adapter, factory, arguments.drones):.0f} bytes"
+            f" per drone for {arguments.drones} drones"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Scaling of memory, event loop lag and state transitions with the number of drones
+
+Builds a pool via :py:func:`~tardis.resources.poolfactory.create_composite_pool`
+for the ``FakeSite`` and ``FakeBatchSystem`` adapters, driven by the
+``PeriodicValue`` and ``RandomGauss`` simulators with a heartbeat interval of
+zero, and runs all drones until every drone is available. Each drone count is
+measured in a fresh process, reporting
+
+* the resident memory per drone,
+* the lag of the event loop, measured by a probe sleeping periodically,
+* the state transitions per second until all drones are available and
+* the time until all drones are available (steady state).
+
+Results are written as JSON to track regressions between releases.
+
+Usage: python3 benchmarks/drone_scaling.py [--drones N [N ...]] [--output FILE]
+"""
+from tardis.__about__ import __version__
+from tardis.interfaces.plugin import Plugin
+from tardis.interfaces.state import State
+from tardis.resources.dronestates import AvailableState
+from tardis.resources.poolfactory import create_composite_pool
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.simulators.periodicvalue import PeriodicValue
+from tardis.utilities.simulators.randomgauss import RandomGauss
+
+from cobald.composite.factory import FactoryPool
+from cobald.interfaces import CompositePool, PoolDecorator
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+
+
+def configuration(boot_time: float, batch_window: float = None) -> dict:
+    tardis_configuration = {
+        "BatchSystem": {
+            "adapter": "FakeBatchSystem",
+            "allocation": RandomGauss(mu=0.9, sigma=0.05, seed=1234),
+            "utilisation": PeriodicValue(period=3600, amplitude=0.5, offset=0.5),
+            "machine_status": "Available",
+        },
+        "Sites": [
+            {
+                "name": "Benchmark",
+                "adapter": "FakeSite",
+                "quota": -1,
+                "drone_heartbeat_interval": 0,
+            }
+        ],
+        "Benchmark": {
+            "api_response_delay": RandomGauss(mu=0, sigma=0),
+            "resource_boot_time": RandomGauss(mu=boot_time, sigma=0),
+            "MachineTypes": ["m1.benchmark"],
+            "MachineTypeConfiguration": {"m1.benchmark": {}},
+            "MachineMetaData": {
+                "m1.benchmark": {"Cores": 8, "Memory": 16, "Disk": 160}
+            },
+        },
+    }
+    if batch_window is not None:
+        tardis_configuration["DroneScheduler"] = {"batch_window": batch_window}
+    return tardis_configuration
+
+
+def factory_pools(pool):
+    """Find the :py:class:`~cobald.composite.factory.FactoryPool` of a pool"""
+    if isinstance(pool, FactoryPool):
+        yield pool
+    elif isinstance(pool, PoolDecorator):
+        yield from factory_pools(pool.target)
+    elif isinstance(pool, CompositePool):
+        for child in pool.children:
+            yield from factory_pools(child)
+
+
+def rss() -> int:
+    """Resident memory of the process in bytes"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:  # not on Linux, fall back to the peak resident memory
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class TransitionCounter(Plugin):
+    """Count state transitions and available drones"""
+
+    def __init__(self):
+        self.transitions = 0
+        self.available = 0
+        self._states = {}
+        self.all_available = asyncio.Event()
+        self.drones = 0
+
+    async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
+        self.transitions += 1
+        drone_uuid = resource_attributes.drone_uuid
+        previous_state = self._states.get(drone_uuid)
+        self._states[drone_uuid] = state
+        self.available += isinstance(state, AvailableState) - isinstance(
+            previous_state, AvailableState
+        )
+        if self.available == self.drones:
+            self.all_available.set()
+
+
+async def probe_loop_lag(interval: float, lags: list):
+    loop = asyncio.get_event_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lags.append(max(loop.time() - start - interval, 0.0))
+
+
+async def run_drones(drones: list, counter: TransitionCounter, timeout: float):
+    """Run all drones until they are available, return the elapsed time"""
+    counter.drones = len(drones)
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(drone.run()) for drone in drones]
+    try:
+        await asyncio.wait_for(counter.all_available.wait(), timeout)
+    except asyncio.TimeoutError:
+        return None
+    else:
+        return time.perf_counter() - start
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def percentile(values: list, fraction: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def measure(
+    drones: int,
+    boot_time: float,
+    probe_interval: float,
+    timeout: float,
+    batch_window: float = None,
+) -> dict:
+    """Measure a pool of ``drones`` drones, run in a fresh process"""
+    pool = create_composite_pool(configuration(boot_time, batch_window))
+    (factory_pool,) = factory_pools(pool)
+    loop = asyncio.get_event_loop()
+    counter = TransitionCounter()
+    baseline = rss()
+    drone_pool = [factory_pool.factory() for _ in range(drones)]
+    for drone in drone_pool:
+        drone.register_plugins(counter)
+    lags = []
+    probe = asyncio.ensure_future(probe_loop_lag(probe_interval, lags))
+    steady_state = loop.run_until_complete(run_drones(drone_pool, counter, timeout))
+    memory = rss()
+    probe.cancel()
+    loop.run_until_complete(asyncio.gather(probe, return_exceptions=True))
+    return {
+        "drones": drones,
+        "rss_per_drone": (memory - baseline) / drones,
+        "loop_lag": {
+            "mean": sum(lags) / len(lags) if lags else 0.0,
+            "p99": percentile(lags, 0.99),
+            "max": max(lags, default=0.0),
+        },
+        "transitions": counter.transitions,
+        "transitions_per_second": (
+            counter.transitions / steady_state if steady_state else None
+        ),
+        "steady_state_time": steady_state,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--drones", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument(
+        "--boot-time", type=float, default=1.0, help="boot time of fake resources"
+    )
+    parser.add_argument(
+        "--batch-window",
+        type=float,
+        default=None,
+        help="run the drones via the DroneScheduler with this batch window",
+    )
+    parser.add_argument(
+        "--probe-interval", type=float, default=0.01, help="interval of the lag probe"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=600, help="maximum time to steady state"
+    )
+    parser.add_argument("--output", help="file to write the results to")
+    arguments = parser.parse_args()
+    results = []
+    # a fresh process per drone count to measure memory and loop independently
+    context = multiprocessing.get_context("spawn")
+    for drones in arguments.drones:
+        with context.Pool(processes=1) as worker:
+            result = worker.apply(
+                measure,
+                (
+                    drones,
+                    arguments.boot_time,
+                    arguments.probe_interval,
+                    arguments.timeout,
+                    arguments.batch_window,
+                ),
+            )
+        print(
+            f"{drones:>6} drones: {result['rss_per_drone'] / 1024:.1f} KiB per drone,"
+            f" {result['loop_lag']['p99'] * 1e3:.1f} ms p99 loop lag,"
+            f" steady state after {result['steady_state_time']} s",
+            file=sys.stderr,
+        )
+        results.append(result)
+    report = json.dumps(
+        {
+            "benchmark": "drone_scaling",
+            "tardis_version": __version__,
+            "python_version": platform.python_version(),
+            "parameters": {
+                "boot_time": arguments.boot_time,
+                "batch_window": arguments.batch_window,
+                "probe_interval": arguments.probe_interval,
+            },
+            "results": results,
+        },
+        indent=2,
+    )
+    if arguments.output:
+        with open(arguments.output, "w") as output:
+            output.write(report)
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Time per run of a drone state processing pipeline
+
+Compares the former pipeline runner, creating a processor and chaining futures
+on every run, with the processor built once per state that runs synchronous
+stages inline. The pipeline mirrors the checks of the ``AvailableState``
+followed by a transition lookup.
+
+Usage: python3 benchmarks/pipeline.py [--runs N]
+"""
+from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.resources.dronestates import AvailableState
+from tardis.resources.dronestates import check_demand
+from tardis.resources.dronestates import check_minimum_lifetime
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.pipeline import PipelineProcessor
+from tardis.utilities.pipeline import StopProcessing
+
+from datetime import datetime
+
+import argparse
+import asyncio
+import time
+
+
+class BenchmarkDrone(object):
+    demand = 8
+    minimum_lifetime = None
+    resource_attributes = AttributeDict(updated=datetime.now())
+
+
+async def resource_status(state_transition, drone, current_state):
+    return state_transition[ResourceStatus.Running.value - 1]
+
+
+async def async_check_demand(state_transition, drone, current_state):
+    return check_demand(state_transition, drone, current_state)
+
+
+async def async_check_minimum_lifetime(state_transition, drone, current_state):
+    return check_minimum_lifetime(state_transition, drone, current_state)
+
+
+class LegacyPipelineProcessor(object):
+    def __init__(self, pipeline=None):
+        self._processing_pipeline = pipeline or []
+
+    async def run_pipeline(self, pipeline_input, *args, **kwargs):
+        try:
+            pipeline = asyncio.Future()
+            pipeline.set_result(pipeline_input)
+
+            for func_call in self._processing_pipeline:
+                pipeline = func_call(await pipeline, *args, **kwargs)
+            return await pipeline
+        except StopProcessing as ex:
+            return ex.last_result
+
+
+async def run_legacy(runs: int, drone: BenchmarkDrone):
+    pipeline = [async_check_demand, async_check_minimum_lifetime, resource_status]
+    for _ in range(runs):
+        await LegacyPipelineProcessor(pipeline).run_pipeline(
+            AvailableState.transition, drone=drone, current_state=AvailableState
+        )
+
+
+async def run_compiled(runs: int, drone: BenchmarkDrone):
+    pipeline_processor = PipelineProcessor(
+        [check_demand, check_minimum_lifetime, resource_status]
+    )
+    for _ in range(runs):
+        await pipeline_processor.run_pipeline(
+            AvailableState.transition, drone=drone, current_state=AvailableState
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=100_000)
+    arguments = parser.parse_args()
+    loop = asyncio.get_event_loop()
+    drone = BenchmarkDrone()
+    for name, runner in (("legacy", run_legacy), ("compiled", run_compiled)):
+        start = time.perf_counter()
+        loop.run_until_complete(runner(arguments.runs, drone))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{name:>8}: {elapsed:.3f} s for {arguments.runs} runs,"
+            f" {elapsed * 1e6 / arguments.runs:.2f} us per run"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Allocations and time per heartbeat spent looking up state transitions
+
+Compares the nested dictionaries of lambdas formerly used as transition tables
+with the compiled transition tables of :py:mod:`tardis.resources.dronestates`.
+Allocations are the peak memory used temporarily by each lookup, such as the
+dictionaries and closures the legacy tables create on every heartbeat, even if
+all of it is freed again right after the lookup.
+
+Usage: python3 benchmarks/transition_tables.py [--heartbeats N]
+(requires Python 3.9 or later)
+"""
+from tardis.interfaces.batchsystemadapter import MachineStatus
+from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.resources.dronestates import AvailableState
+from tardis.resources.dronestates import BootingState
+from tardis.resources.dronestates import CleanupState
+from tardis.resources.dronestates import DisintegrateState
+from tardis.resources.dronestates import DownState
+from tardis.resources.dronestates import DrainingState
+from tardis.resources.dronestates import ShutDownState
+
+from collections import defaultdict
+
+import argparse
+import itertools
+import time
+import tracemalloc
+
+LEGACY_TRANSITION = {
+    ResourceStatus.Running: lambda: {
+        MachineStatus.Available: lambda: AvailableState(),
+        MachineStatus.NotAvailable: lambda: ShutDownState(),
+        MachineStatus.Draining: lambda: DrainingState(),
+        MachineStatus.Drained: lambda: DisintegrateState(),
+    },
+    ResourceStatus.Booting: lambda: defaultdict(lambda: BootingState),
+    ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
+    ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
+    ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
+}
+
+
+def legacy_lookup(resource_status, machine_status):
+    return LEGACY_TRANSITION[resource_status]()[machine_status]()
+
+
+def compiled_lookup(resource_status, machine_status):
+    transition = AvailableState.transition
+    return transition[resource_status.value - 1][machine_status.value - 1]
+
+
+def measure_allocations(lookup, inputs) -> float:
+    """Bytes allocated temporarily per lookup, at the peak of each lookup"""
+    allocated = 0
+    tracemalloc.start()
+    try:
+        for status in inputs:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            lookup(*status)
+            _, peak = tracemalloc.get_traced_memory()
+            allocated += peak - before
+    finally:
+        tracemalloc.stop()
+    return allocated / len(inputs)
+
+
+def measure_time(lookup, inputs) -> float:
+    """Time in nanoseconds per lookup"""
+    start = time.perf_counter()
+    for status in inputs:
+        lookup(*status)
+    return (time.perf_counter() - start) * 1e9 / len(inputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--heartbeats", type=int, default=100_000)
+    arguments = parser.parse_args()
+    statuses = list(itertools.product(ResourceStatus, MachineStatus))
+    inputs = [statuses[idx % len(statuses)] for idx in range(arguments.heartbeats)]
+    for name, lookup in (("legacy", legacy_lookup), ("compiled", compiled_lookup)):
+        print(
+            f"{name:>8}: {measure_allocations(lookup, inputs):.0f} bytes allocated,"
+            f" {measure_time(lookup, inputs):.0f} ns per heartbeat"
+        )
+
+
+if __name__ == "__main__":
+    main()
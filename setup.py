@@ -70,6 +70,7 @@ setup(
             "TardisRandomGauss = tardis.utilities.simulators.randomgauss:RandomGauss",
             "TardisRestApi = tardis.rest.service:RestService",
             "TardisSSHExecutor = tardis.utilities.executors.sshexecutor:SSHExecutor",
+            "TardisSSHExecutorPool = tardis.utilities.executors.sshexecutor:SSHExecutorPool",  # noqa: B950
             "TardisShellExecutor = tardis.utilities.executors.shellexecutor:ShellExecutor",  # noqa: B950
         ],
         "cobald.config.sections": [
@@ -11,7 +11,7 @@ from ...utilities.attributedict import AttributeDict
 
 from functools import partial
 from shlex import quote
-from typing import Iterable
+from typing import Callable, Iterable, List
 import logging
 
 logger = logging.getLogger("cobald.runtime.tardis.adapters.batchsystem.htcondor")
@@ -93,7 +93,16 @@ class HTCondorAdapter(BatchSystemAdapter):
         # Escape htcondor expressions and add them to attributes
         attributes.update({key: quote(value) for key, value in self.ratios.items()})
 
-        self._htcondor_status = AsyncCacheMap(
+        # cached status is refreshed in the background if a stale age is set
+        max_stale_age = getattr(config.BatchSystem, "max_stale_age", None)
+        # adapters running the same query share the status
+        self._htcondor_status = AsyncCacheMap.shared(
+            (
+                "condor_status",
+                self._executor,
+                htcondor_cmd_option_formatter(self.htcondor_options),
+                tuple(attributes.items()),
+            ),
             update_coroutine=partial(
                 htcondor_status_updater,
                 self.htcondor_options,
@@ -101,6 +110,9 @@ class HTCondorAdapter(BatchSystemAdapter):
                 self._executor,
             ),
             max_age=config.BatchSystem.max_age * 60,
+            max_stale_age=None if max_stale_age is None else max_stale_age * 60,
+            refresh_jitter=getattr(config.BatchSystem, "refresh_jitter", 0.1),
+            name="condor_status",
         )
 
     async def disintegrate_machine(self, drone_uuid: str) -> None:
@@ -210,6 +222,26 @@ class HTCondorAdapter(BatchSystemAdapter):
             NotAvailable)
         :rtype: MachineStatus
         """
+        await self._htcondor_status.update_status()
+        return self._machine_status(drone_uuid)
+
+    async def get_machine_status_bulk(
+        self, drone_uuids: List[str]
+    ) -> List[MachineStatus]:
+        """
+        Get the status of several worker nodes in HTCondor at once, sharing a
+        single update of the ``condor_status`` cache.
+
+        :param drone_uuids: Uuids of the worker nodes, for some sites corresponding
+            to the host names of the drones.
+        :type drone_uuids: List[str]
+        :return: The machine status of each worker node in order
+        :rtype: List[MachineStatus]
+        """
+        await self._htcondor_status.update_status()
+        return [self._machine_status(drone_uuid) for drone_uuid in drone_uuids]
+
+    def _machine_status(self, drone_uuid: str) -> MachineStatus:
         status_mapping = {
             ("Unclaimed", "Idle"): MachineStatus.Available,
             ("Drained", "Retiring"): MachineStatus.Draining,
@@ -217,7 +249,6 @@ class HTCondorAdapter(BatchSystemAdapter):
             ("Owner", "Idle"): MachineStatus.NotAvailable,
         }
 
-        await self._htcondor_status.update_status()
         try:
             machine_status = self._htcondor_status[drone_uuid]
         except KeyError:
@@ -228,6 +259,34 @@ class HTCondorAdapter(BatchSystemAdapter):
                 MachineStatus.NotAvailable,
             )
 
+    def watch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> bool:
+        """
+        Call ``callback`` whenever an update of the cached worker node status
+        changes the entry of ``drone_uuid``
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable to call on changes
+        :type callback: Callable[[], None]
+        :return: Whether the worker node is watched, always True
+        :rtype: bool
+        """
+        self._htcondor_status.watch(drone_uuid, callback)
+        return True
+
+    def unwatch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> None:
+        """
+        Stop calling ``callback`` on changes of the worker node
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable passed to :py:meth:`~.watch_machine`
+        :type callback: Callable[[], None]
+        """
+        self._htcondor_status.unwatch(drone_uuid, callback)
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
         Get the utilisation of a worker node in HTCondor, which is defined as
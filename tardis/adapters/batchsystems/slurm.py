@@ -4,7 +4,7 @@ import logging
 
 from functools import partial
 
-from typing import Iterable
+from typing import Callable, Iterable, List
 
 from ...configuration.configuration import Configuration
 from ...exceptions.executorexceptions import CommandExecutionFailure
@@ -96,11 +96,23 @@ class SlurmAdapter(BatchSystemAdapter):
             "Machine": "nodehost",
         }
 
-        self._slurm_status = AsyncCacheMap(
+        # cached status is refreshed in the background if a stale age is set
+        max_stale_age = getattr(config.BatchSystem, "max_stale_age", None)
+        # adapters running the same query share the status
+        self._slurm_status = AsyncCacheMap.shared(
+            (
+                "sinfo",
+                self._executor,
+                submit_cmd_option_formatter(self.slurm_options),
+                tuple(attributes.items()),
+            ),
             update_coroutine=partial(
                 slurm_status_updater, self.slurm_options, attributes, self._executor
             ),
             max_age=config.BatchSystem.max_age * 60,
+            max_stale_age=None if max_stale_age is None else max_stale_age * 60,
+            refresh_jitter=getattr(config.BatchSystem, "refresh_jitter", 0.1),
+            name="sinfo",
         )
 
     async def disintegrate_machine(self, drone_uuid: str) -> None:
@@ -199,7 +211,26 @@ class SlurmAdapter(BatchSystemAdapter):
             NotAvailable)
         :rtype: MachineStatus
         """
+        await self._slurm_status.update_status()
+        return self._machine_status(drone_uuid)
+
+    async def get_machine_status_bulk(
+        self, drone_uuids: List[str]
+    ) -> List[MachineStatus]:
+        """
+        Get the status of several worker nodes in SLURM at once, sharing a single
+        update of the ``sinfo`` cache.
+
+        :param drone_uuids: Uuids of the worker nodes, for some sites corresponding
+            to the host names of the drones.
+        :type drone_uuids: List[str]
+        :return: The machine status of each worker node in order
+        :rtype: List[MachineStatus]
+        """
+        await self._slurm_status.update_status()
+        return [self._machine_status(drone_uuid) for drone_uuid in drone_uuids]
 
+    def _machine_status(self, drone_uuid: str) -> MachineStatus:
         # '*' means the machine didn't respond for a while
         # 'allocated+' means that node is allocated to one or more active jobs plus one
         # or more jobs in COMPLETING
@@ -226,7 +257,6 @@ class SlurmAdapter(BatchSystemAdapter):
             "power_up": MachineStatus.NotAvailable,
         }
 
-        await self._slurm_status.update_status()
         try:
             machine_status = self._slurm_status[drone_uuid]
         except KeyError:
@@ -236,6 +266,34 @@ class SlurmAdapter(BatchSystemAdapter):
                 machine_status["State"], MachineStatus.NotAvailable
             )
 
+    def watch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> bool:
+        """
+        Call ``callback`` whenever an update of the cached worker node status
+        changes the entry of ``drone_uuid``
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable to call on changes
+        :type callback: Callable[[], None]
+        :return: Whether the worker node is watched, always True
+        :rtype: bool
+        """
+        self._slurm_status.watch(drone_uuid, callback)
+        return True
+
+    def unwatch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> None:
+        """
+        Stop calling ``callback`` on changes of the worker node
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable passed to :py:meth:`~.watch_machine`
+        :type callback: Callable[[], None]
+        """
+        self._slurm_status.unwatch(drone_uuid, callback)
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
         Get the utilization of a worker node in Slurm, which is defined as
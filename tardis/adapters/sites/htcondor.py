@@ -1,4 +1,5 @@
-from typing import Iterable, Tuple, Awaitable
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional
+from typing import Tuple, Union
 from ...exceptions.executorexceptions import CommandExecutionFailure
 from ...exceptions.tardisexceptions import TardisError
 from ...exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
@@ -15,11 +16,14 @@ from ...utilities.utils import csv_parser, machine_meta_data_translation
 from contextlib import contextmanager
 from datetime import datetime
 from functools import partial
+from shlex import quote
 from string import Template
 
 import warnings
 import logging
+import os
 import re
+import time
 
 logger = logging.getLogger("cobald.runtime.tardis.adapters.sites.htcondor")
 
@@ -32,12 +36,17 @@ def _job_id(resource_uuid: str) -> str:
     return resource_uuid if "." in resource_uuid else f"{resource_uuid}.0"
 
 
-async def htcondor_queue_updater(executor):
-    attributes = dict(
-        Owner="Owner", JobStatus="JobStatus", ClusterId="ClusterId", ProcId="ProcId"
-    )
+def _resource_job_id(resource_attributes: AttributeDict) -> str:
+    return _job_id(str(resource_attributes.remote_resource_uuid))
+
+
+async def _condor_q(
+    executor: Executor, attributes: Dict[str, str], constraint: Optional[str] = None
+) -> Dict[str, Dict[str, Optional[str]]]:
     attributes_string = " ".join(attributes.values())
     queue_command = f"condor_q -af:t {attributes_string}"
+    if constraint is not None:
+        queue_command += f" -constraint {quote(constraint)}"
 
     htcondor_queue = {}
     try:
@@ -57,6 +66,97 @@ async def htcondor_queue_updater(executor):
         return htcondor_queue
 
 
+async def htcondor_queue_updater(executor, constraint: Optional[str] = None):
+    attributes = dict(JobStatus="JobStatus", ClusterId="ClusterId", ProcId="ProcId")
+    return await _condor_q(executor, attributes, constraint=constraint)
+
+
+class HTCondorQueueUpdater(object):
+    """
+    Incremental update of the HTCondor job queue
+
+    :param executor: executor used to run ``condor_q``
+    :param full_resync_interval: interval in seconds between full queries
+    :param constraint: constraint selecting the jobs to query
+
+    Between full queries of all jobs, only the jobs that entered their current
+    status since the previous query are queried and merged into the previous
+    queue. Jobs are selected by their ``EnteredCurrentStatus`` compared to the
+    latest one seen before, so that only the clock of the schedd matters.
+    Jobs seen in a terminal status, i.e. removed or completed, are dropped from
+    the queue as if they had left it already. Jobs that left the queue without
+    being seen in a terminal status are removed by the next full query.
+    """
+
+    #: ``JobStatus`` of jobs that are about to leave the queue
+    terminal_status = ("3", "4")
+
+    attributes = dict(
+        JobStatus="JobStatus",
+        ClusterId="ClusterId",
+        ProcId="ProcId",
+        EnteredCurrentStatus="EnteredCurrentStatus",
+    )
+
+    def __init__(
+        self,
+        executor: Executor,
+        full_resync_interval: float,
+        constraint: Optional[str] = None,
+    ):
+        self._executor = executor
+        self._full_resync_interval = full_resync_interval
+        self._constraint = constraint
+        self._queue: Dict[str, Dict[str, Optional[str]]] = {}
+        self._last_resync = 0.0
+        # latest EnteredCurrentStatus seen, None to enforce a full query
+        self._watermark: Optional[int] = None
+
+    async def __call__(self) -> Dict[str, Dict[str, Optional[str]]]:
+        now = time.monotonic()
+        if (
+            self._watermark is None
+            or now - self._last_resync >= self._full_resync_interval
+        ):
+            changes = queue = await _condor_q(
+                self._executor, self.attributes, constraint=self._constraint
+            )
+            self._last_resync = now
+        else:
+            # jobs entering a status within the same second as the watermark may
+            # not have been seen before, so they are queried again
+            constraint = f"EnteredCurrentStatus >= {self._watermark}"
+            if self._constraint is not None:
+                constraint = f"({self._constraint}) && ({constraint})"
+            changes = await _condor_q(
+                self._executor, self.attributes, constraint=constraint
+            )
+            # the previous queue is kept as is to compare it with the new one
+            queue = {**self._queue, **changes}
+        queue = {
+            job_id: job
+            for job_id, job in queue.items()
+            if job["JobStatus"] not in self.terminal_status
+        }
+        self._watermark = max(
+            (
+                int(job["EnteredCurrentStatus"])
+                for job in changes.values()
+                if job["EnteredCurrentStatus"] is not None
+            ),
+            default=self._watermark,
+        )
+        self._queue = queue
+        logger.debug(f"htcondor_queue_update got {len(changes)} of {len(queue)} jobs")
+        return queue
+
+
+def _classad_string(value: str) -> str:
+    """Quote ``value`` as a ClassAd string literal"""
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
 JDL = str
 # search the Job ID in a submit Proc line
 SUBMIT_ID_PATTERN = re.compile(r"Proc\s(\d+\.\d+)")
@@ -64,9 +164,56 @@ SUBMIT_ID_PATTERN = re.compile(r"Proc\s(\d+\.\d+)")
 JDL_QUEUE_PATTERN = re.compile(r"^queue\s*\d*\s*$", flags=re.MULTILINE)
 
 
-def _submit_description(resource_jdls: Tuple[JDL, ...]) -> str:
+# submit macro of the drone uuid in the JDL of a drone
+DRONE_UUID_MACRO = "tardis_drone_uuid"
+# drone uuids which can be queued as item data
+DRONE_UUID_ITEM_PATTERN = re.compile(r"^[\w.-]+$")
+
+
+class DroneJDL(NamedTuple):
+    """JDL of a drone referring to its uuid via the ``DRONE_UUID_MACRO``"""
+
+    jdl: JDL
+    drone_uuid: str
+
+    def render(self) -> JDL:
+        """The JDL with the uuid of the drone in place of the macro"""
+        return self.jdl.replace(f"$({DRONE_UUID_MACRO})", self.drone_uuid)
+
+
+def _submit_description(
+    resource_jdls: Tuple[Union[JDL, DroneJDL], ...]
+) -> Tuple[str, List[int]]:
+    """
+    Submit description of a number of JDLs and the index of the JDL of each job
+
+    JDLs of drones differing only in the drone uuid are queued at once from the
+    drone uuids as item data, creating one job per drone in the order of the
+    item data. All other JDLs are queued once each.
+    """
+    groups: Dict[Union[JDL, int], List[int]] = {}
+    for index, resource_jdl in enumerate(resource_jdls):
+        if (
+            isinstance(resource_jdl, DroneJDL)
+            and DRONE_UUID_ITEM_PATTERN.match(resource_jdl.drone_uuid)
+            and not JDL_QUEUE_PATTERN.search(resource_jdl.jdl)
+        ):
+            groups.setdefault(resource_jdl.jdl, []).append(index)
+        else:
+            groups[index] = [index]
     commands = []
-    for jdl in resource_jdls:
+    job_indices = []
+    for indices in groups.values():
+        job_indices.extend(indices)
+        if len(indices) > 1:
+            commands.append(resource_jdls[indices[0]].jdl)
+            commands.append(f"queue {DRONE_UUID_MACRO} from (")
+            commands.extend(resource_jdls[index].drone_uuid for index in indices)
+            commands.append(")")
+            continue
+        jdl = resource_jdls[indices[0]]
+        if isinstance(jdl, DroneJDL):
+            jdl = jdl.render()
         commands.append(jdl)
         if JDL_QUEUE_PATTERN.search(jdl):
             warnings.warn(
@@ -75,10 +222,12 @@ def _submit_description(resource_jdls: Tuple[JDL, ...]) -> str:
             )
         else:
             commands.append("queue 1")
-    return "\n".join(commands)
+    return "\n".join(commands), job_indices
 
 
-async def condor_submit(*resource_jdls: JDL, executor: Executor) -> Iterable[str]:
+async def condor_submit(
+    *resource_jdls: Union[JDL, DroneJDL], executor: Executor
+) -> Iterable[str]:
     """Submit a number of resources from their JDL, reporting the new Job ID for each"""
     # verbose submit gives an ordered listing of class ads, such as
     # ** Proc 15556.0:
@@ -92,15 +241,24 @@ async def condor_submit(*resource_jdls: JDL, executor: Executor) -> Iterable[str
     # ** Proc 15556.1:
     # ...
     command = f"condor_submit -verbose -maxjobs {len(resource_jdls)}"
+    submit_description, job_indices = _submit_description(resource_jdls)
     response = await executor.run_command(
         command,
-        stdin_input=_submit_description(resource_jdls),
+        stdin_input=submit_description,
     )
-    return (
+    job_ids = [
         SUBMIT_ID_PATTERN.search(line).group(1)
         for line in response.stdout.splitlines()
         if line.startswith("** Proc")
-    )
+    ]
+    if len(job_ids) != len(job_indices):
+        # leave it to the caller to reject an unexpected number of jobs
+        return job_ids
+    # jobs are listed in the order of the submit description
+    resource_job_ids = [""] * len(job_ids)
+    for index, job_id in zip(job_indices, job_ids):
+        resource_job_ids[index] = job_id
+    return resource_job_ids
 
 
 # condor_rm and condor_suspend are actually the same tool under the hood
@@ -196,13 +354,23 @@ class HTCondorAdapter(SiteAdapter):
         self._executor = getattr(self.configuration, "executor", ShellExecutor())
         bulk_size = getattr(self.configuration, "bulk_size", 100)
         bulk_delay = getattr(self.configuration, "bulk_delay", 1.0)
+        bulk_adaptive = getattr(self.configuration, "bulk_adaptive", False)
+        bulk_retry_delay = getattr(self.configuration, "bulk_retry_delay", None)
+        # repeated requests to suspend or remove the same job are only sent once
         self._condor_submit, self._condor_suspend, self._condor_rm = (
             AsyncBulkCall(
                 partial(tool, executor=self._executor),
                 size=bulk_size,
                 delay=bulk_delay,
+                adaptive=bulk_adaptive,
+                retry_delay=bulk_retry_delay,
+                key=key,
+            )
+            for tool, key in (
+                (condor_submit, None),
+                (condor_suspend, _resource_job_id),
+                (condor_rm, _resource_job_id),
             )
-            for tool in (condor_submit, condor_suspend, condor_rm)
         )
 
         key_translator = StaticMapping(
@@ -227,21 +395,79 @@ class HTCondorAdapter(SiteAdapter):
             translator_functions=translator_functions,
         )
 
-        self._htcondor_queue = AsyncCacheMap(
-            update_coroutine=partial(htcondor_queue_updater, self._executor),
+        # template of the JDL with its file and modification time
+        self._jdl_template: Optional[Template] = None
+        self._jdl_version: Optional[Tuple[str, int]] = None
+        # rendered JDLs by the translation mapping of the batch system
+        self._submit_jdls: Dict[Tuple, JDL] = {}
+
+        # jobs are tagged on submission to select them by the tags in condor_q
+        self._tag_jobs = getattr(self.configuration, "tag_jobs", False)
+        self._batch_name = getattr(self.configuration, "batch_name", None)
+        queue_constraint = self._queue_constraint()
+
+        # cached status is refreshed in the background if a stale age is set
+        max_stale_age = getattr(self.configuration, "max_stale_age", None)
+        # the queue is updated incrementally if a resync interval is set
+        resync_interval = getattr(self.configuration, "resync_interval", None)
+        if resync_interval is None:
+            queue_updater = partial(
+                htcondor_queue_updater, self._executor, constraint=queue_constraint
+            )
+        else:
+            queue_updater = HTCondorQueueUpdater(
+                self._executor,
+                full_resync_interval=resync_interval * 60,
+                constraint=queue_constraint,
+            )
+        # all machine types of a site, or sites, querying the same schedd alike
+        # share the queue
+        self._htcondor_queue = AsyncCacheMap.shared(
+            ("condor_q", self._executor, queue_constraint, resync_interval),
+            update_coroutine=queue_updater,
             max_age=self.configuration.max_age * 60,
+            max_stale_age=None if max_stale_age is None else max_stale_age * 60,
+            refresh_jitter=getattr(self.configuration, "refresh_jitter", 0.1),
+            name=f"{self.site_name}/condor_q",
         )
 
     async def deploy_resource(
         self, resource_attributes: AttributeDict
     ) -> AttributeDict:
+        submit_jdl = self._submit_jdl(
+            resource_attributes.obs_machine_meta_data_translation_mapping
+        )
+        job_id = await self._condor_submit(
+            DroneJDL(submit_jdl, resource_attributes.drone_uuid)
+        )
+        response = AttributeDict(JobId=job_id)
+        response.update(self.create_timestamps())
+        return self.handle_response(response)
+
+    def _submit_jdl(self, meta_data_translation_mapping: AttributeDict) -> JDL:
+        """
+        JDL of the drones of the machine type, referring to their uuid via a macro
+
+        The JDL only depends on the machine type and the translation mapping of
+        the batch system, and is thus rendered once per translation mapping.
+        The template is read again once its file is modified.
+        """
         jdl_file = self.machine_type_configuration.jdl
-        with open(jdl_file, "r") as f:
-            jdl_template = Template(f.read())
+        jdl_version = (jdl_file, os.stat(jdl_file).st_mtime_ns)
+        if jdl_version != self._jdl_version:
+            with open(jdl_file, "r") as f:
+                self._jdl_template = Template(f.read())
+            self._jdl_version = jdl_version
+            self._submit_jdls.clear()
+        cache_key = tuple(sorted(meta_data_translation_mapping.items()))
+        try:
+            return self._submit_jdls[cache_key]
+        except KeyError:
+            pass
 
+        # drones are submitted with the same JDL and their uuid as item data
         drone_environment = self.drone_environment(
-            resource_attributes.drone_uuid,
-            resource_attributes.obs_machine_meta_data_translation_mapping,
+            f"$({DRONE_UUID_MACRO})", meta_data_translation_mapping
         )
 
         def job_environment(seperator, prefix, customize_key=lambda x: x):
@@ -250,7 +476,7 @@ class HTCondorAdapter(SiteAdapter):
                 for key, value in drone_environment.items()
             )
 
-        submit_jdl = jdl_template.substitute(
+        submit_jdl = self._jdl_template.substitute(
             machine_meta_data_translation(
                 self.machine_meta_data,
                 self.htcondor_machine_meta_data_translation_mapping,
@@ -258,16 +484,61 @@ class HTCondorAdapter(SiteAdapter):
             Environment=job_environment(";", prefix="TardisDrone"),
             Arguments=job_environment(" ", prefix="--", customize_key=str.lower),
         )
-
-        job_id = await self._condor_submit(submit_jdl)
-        response = AttributeDict(JobId=job_id)
-        response.update(self.create_timestamps())
-        return self.handle_response(response)
+        submit_attributes = self._submit_attributes(f"$({DRONE_UUID_MACRO})")
+        if submit_attributes:
+            submit_jdl = "\n".join((*submit_attributes, submit_jdl))
+        self._submit_jdls[cache_key] = submit_jdl
+        return submit_jdl
+
+    def _submit_attributes(self, drone_uuid: str) -> List[str]:
+        """Submit commands tagging the job of a drone"""
+        submit_attributes = []
+        if self._tag_jobs:
+            submit_attributes.append(
+                f"+TardisDroneUuid = {_classad_string(drone_uuid)}"
+            )
+        if self._batch_name is not None:
+            submit_attributes.append(f"batch_name = {self._batch_name}")
+        return submit_attributes
+
+    def _queue_constraint(self) -> Optional[str]:
+        """Constraint selecting the jobs of the site in condor_q"""
+        constraints = []
+        owner = getattr(self.configuration, "owner", None)
+        if owner is not None:
+            constraints.append(f"Owner == {_classad_string(owner)}")
+        if self._tag_jobs:
+            constraints.append("TardisDroneUuid =!= undefined")
+        if self._batch_name is not None:
+            constraints.append(f"JobBatchName == {_classad_string(self._batch_name)}")
+        constraint = getattr(self.configuration, "constraint", None)
+        if constraint is not None:
+            constraints.append(constraint)
+        if not constraints:
+            return None
+        elif len(constraints) == 1:
+            return constraints[0]
+        return " && ".join(f"({constraint})" for constraint in constraints)
 
     async def resource_status(
         self, resource_attributes: AttributeDict
     ) -> AttributeDict:
         await self._htcondor_queue.update_status()
+        return self._resource_status(resource_attributes)
+
+    async def resource_status_bulk(
+        self, resource_attributes: List[AttributeDict]
+    ) -> List[Union[AttributeDict, Exception]]:
+        await self._htcondor_queue.update_status()
+        responses = []
+        for attributes in resource_attributes:
+            try:
+                responses.append(self._resource_status(attributes))
+            except Exception as err:
+                responses.append(err)
+        return responses
+
+    def _resource_status(self, resource_attributes: AttributeDict) -> AttributeDict:
         try:
             resource_uuid = _job_id(resource_attributes.remote_resource_uuid)
             resource_status = self._htcondor_queue[resource_uuid]
@@ -284,6 +555,17 @@ class HTCondorAdapter(SiteAdapter):
         else:
             return self.handle_response(resource_status)
 
+    def watch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> bool:
+        self._htcondor_queue.watch(_job_id(str(remote_resource_uuid)), callback)
+        return True
+
+    def unwatch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> None:
+        self._htcondor_queue.unwatch(_job_id(str(remote_resource_uuid)), callback)
+
     async def stop_resource(self, resource_attributes: AttributeDict):
         """
         Stopping machines is equivalent to suspending jobs in HTCondor,
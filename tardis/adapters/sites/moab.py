@@ -6,13 +6,14 @@ from ...interfaces.siteadapter import ResourceStatus
 from ...interfaces.siteadapter import SiteAdapter
 from ...utilities.staticmapping import StaticMapping
 from ...utilities.attributedict import AttributeDict
-from ...utilities.attributedict import convert_to_attribute_dict
 from ...utilities.executors.shellexecutor import ShellExecutor
 from ...utilities.asynccachemap import AsyncCacheMap
+from ...utilities.asyncbulkcall import AsyncBulkCall
 from ...utilities.utils import submit_cmd_option_formatter
 
 from asyncio import TimeoutError
 from contextlib import contextmanager
+from typing import Callable, Iterable, List, Union
 from functools import partial
 from datetime import datetime
 
@@ -47,6 +48,37 @@ async def moab_status_updater(executor):
     return moab_resource_status
 
 
+# search the Job ID in a canceljob success or invalid job line
+CANCELJOB_ID_PATTERN = re.compile(
+    r"^(?:job \'(\d+)\' cancelled|ERROR:  invalid job specified \((\d+)\))",
+    flags=re.MULTILINE,
+)
+
+
+async def canceljob(*remote_resource_uuids: int, executor) -> Iterable[bool]:
+    """Cancel a number of jobs, indicating success for each"""
+    command = "canceljob " + " ".join(map(str, remote_resource_uuids))
+    try:
+        response = await executor.run_command(command)
+    except CommandExecutionFailure as cf:
+        # jobs that are already gone are reported as invalid, failing the command
+        if cf.exit_code != 1:
+            raise
+        logger.warning(f"canceljob returned {cf.stdout} {cf.stderr}")
+        output = f"{cf.stdout}\n{cf.stderr}"
+    else:
+        logger.debug(f"canceljob returned {response}")
+        output = response.stdout
+    # both cancelled and already gone jobs count as terminated
+    # stdout: job '4761849' cancelled
+    # stderr: ERROR:  invalid job specified (4761850)
+    terminated_jobs = {
+        cancelled or invalid
+        for cancelled, invalid in CANCELJOB_ID_PATTERN.findall(output)
+    }
+    return (str(uuid) in terminated_jobs for uuid in remote_resource_uuids)
+
+
 class MoabAdapter(SiteAdapter):
     def __init__(self, machine_type: str, site_name: str):
         self._machine_type = machine_type
@@ -64,10 +96,27 @@ class MoabAdapter(SiteAdapter):
             self._startup_command = self.configuration.StartupCommand
 
         self._executor = getattr(self.configuration, "executor", ShellExecutor())
+        self._canceljob = AsyncBulkCall(
+            partial(canceljob, executor=self._executor),
+            size=getattr(self.configuration, "bulk_size", 100),
+            delay=getattr(self.configuration, "bulk_delay", 1.0),
+            adaptive=getattr(self.configuration, "bulk_adaptive", False),
+            retry_delay=getattr(self.configuration, "bulk_retry_delay", None),
+            # repeated requests to cancel the same job are only sent once
+            key=int,
+        )
 
-        self._moab_status = AsyncCacheMap(
+        # cached status is refreshed in the background if a stale age is set
+        max_stale_age = getattr(self.configuration, "max_stale_age", None)
+        # all machine types of a site, or sites, using the same executor alike
+        # share the status
+        self._moab_status = AsyncCacheMap.shared(
+            ("showq", self._executor),
             update_coroutine=partial(moab_status_updater, self._executor),
             max_age=self.configuration.StatusUpdate * 60,
+            max_stale_age=None if max_stale_age is None else max_stale_age * 60,
+            refresh_jitter=getattr(self.configuration, "refresh_jitter", 0.1),
+            name=f"{self.site_name}/showq",
         )
         key_translator = StaticMapping(
             remote_resource_uuid="JobID", resource_status="State"
@@ -133,24 +182,25 @@ class MoabAdapter(SiteAdapter):
         )
         return resource_attributes
 
-    @staticmethod
-    def check_remote_resource_uuid(resource_attributes, regex, response):
-        pattern = re.compile(regex, flags=re.MULTILINE)
-        remote_resource_uuid = int(pattern.findall(response)[0])
-        if remote_resource_uuid != int(resource_attributes.remote_resource_uuid):
-            raise TardisError(
-                f"Failed to terminate {resource_attributes.remote_resource_uuid}."
-            )
-        else:
-            resource_attributes.update(
-                resource_status=ResourceStatus.Stopped, updated=datetime.now()
-            )
-        return remote_resource_uuid
-
     async def resource_status(
         self, resource_attributes: AttributeDict
     ) -> AttributeDict:
         await self._moab_status.update_status()
+        return self._resource_status(resource_attributes)
+
+    async def resource_status_bulk(
+        self, resource_attributes: List[AttributeDict]
+    ) -> List[Union[AttributeDict, Exception]]:
+        await self._moab_status.update_status()
+        responses = []
+        for attributes in resource_attributes:
+            try:
+                responses.append(self._resource_status(attributes))
+            except Exception as err:
+                responses.append(err)
+        return responses
+
+    def _resource_status(self, resource_attributes: AttributeDict) -> AttributeDict:
         # In case the created timestamp is after last update timestamp of the
         # asynccachemap, no decision about the current state can be given,
         # since map is updated asynchronously.
@@ -159,7 +209,7 @@ class MoabAdapter(SiteAdapter):
             resource_status = self._moab_status[str(resource_uuid)]
         except KeyError as err:
             if (
-                self._moab_status._last_update - resource_attributes.created
+                self._moab_status.last_update - resource_attributes.created
             ).total_seconds() < 0:
                 raise TardisResourceStatusUpdateFailed from err
             else:
@@ -169,36 +219,35 @@ class MoabAdapter(SiteAdapter):
                 }
         logger.debug(f"{self.site_name} has status {resource_status}.")
         resource_attributes.update(updated=datetime.now())
-        return convert_to_attribute_dict(
-            {**resource_attributes, **self.handle_response(resource_status)}
+        # shallow copy, the nested attributes are shared by all drones
+        return AttributeDict(
+            resource_attributes, **self.handle_response(resource_status)
         )
 
     async def terminate_resource(self, resource_attributes: AttributeDict):
-        request_command = f"canceljob {resource_attributes.remote_resource_uuid}"
-        try:
-            response = await self._executor.run_command(request_command)
-        except CommandExecutionFailure as cf:
-            if cf.exit_code == 1:
-                logger.warning(
-                    f"{self.site_name} servers terminate returned {cf.stdout}"
-                )
-                remote_resource_uuid = self.check_remote_resource_uuid(
-                    resource_attributes,
-                    r"ERROR:  invalid job specified \((\d*)\)",
-                    cf.stderr,
-                )
-            else:
-                raise cf
-        else:
-            logger.debug(f"{self.site_name} servers terminate returned {response}")
-            remote_resource_uuid = self.check_remote_resource_uuid(
-                resource_attributes, r"^job \'(\d*)\' cancelled", response.stdout
+        remote_resource_uuid = int(resource_attributes.remote_resource_uuid)
+        if not await self._canceljob(remote_resource_uuid):
+            raise TardisError(
+                f"Failed to terminate {resource_attributes.remote_resource_uuid}."
             )
-
+        resource_attributes.update(
+            resource_status=ResourceStatus.Stopped, updated=datetime.now()
+        )
         return self.handle_response(
             {"SystemJID": remote_resource_uuid}, **resource_attributes
         )
 
+    def watch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> bool:
+        self._moab_status.watch(str(remote_resource_uuid), callback)
+        return True
+
+    def unwatch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> None:
+        self._moab_status.unwatch(str(remote_resource_uuid), callback)
+
     async def stop_resource(self, resource_attributes: AttributeDict):
         logger.debug("MOAB jobs cannot be stopped gracefully. Terminating instead.")
         return await self.terminate_resource(resource_attributes)
@@ -6,13 +6,14 @@ from ...interfaces.siteadapter import ResourceStatus
 from ...interfaces.siteadapter import SiteAdapter
 from ...utilities.staticmapping import StaticMapping
 from ...utilities.attributedict import AttributeDict
-from ...utilities.attributedict import convert_to_attribute_dict
 from ...utilities.executors.shellexecutor import ShellExecutor
 from ...utilities.asynccachemap import AsyncCacheMap
+from ...utilities.asyncbulkcall import AsyncBulkCall
 from ...utilities.utils import convert_to, csv_parser, submit_cmd_option_formatter
 
 from asyncio import TimeoutError
 from contextlib import contextmanager
+from typing import Callable, Iterable, List, Optional, Union
 from functools import partial
 from datetime import datetime
 
@@ -45,6 +46,60 @@ async def slurm_status_updater(executor):
         return slurm_resource_status
 
 
+# search the Job ID in a submit line, or the failure of a submission
+SBATCH_FAILED = "Batch job submission failed"
+SBATCH_ID_PATTERN = re.compile(
+    rf"^(?:Submitted batch job (\d+)|{SBATCH_FAILED})", flags=re.MULTILINE
+)
+
+
+async def sbatch(*submit_commands: str, executor) -> Iterable[Optional[int]]:
+    """
+    Run a number of sbatch commands at once, reporting the Job ID for each
+
+    Several commands are run in one shell invocation, each reporting either
+    its Job ID or the failure of the submission as :py:data:`None`.
+    """
+    if len(submit_commands) == 1:
+        (command,) = submit_commands
+    else:
+        command = "\n".join(
+            f"{submit_command} || echo {SBATCH_FAILED}"
+            for submit_command in submit_commands
+        )
+    result = await executor.run_command(command)
+    logger.debug(f"sbatch returned {result}")
+    job_ids = [
+        None if job_id is None else int(job_id)
+        for job_id in (
+            match.group(1) for match in SBATCH_ID_PATTERN.finditer(result.stdout)
+        )
+    ]
+    if None in job_ids:
+        logger.warning(f"sbatch failed for some batch jobs: {result.stderr}")
+    return job_ids
+
+
+# search the Job ID in a scancel error line
+SCANCEL_ERROR_PATTERN = re.compile(r"job id (\d+)")
+
+
+async def scancel(*remote_resource_uuids: int, executor) -> Iterable[bool]:
+    """Cancel a number of jobs, indicating success for each"""
+    command = "scancel " + " ".join(map(str, remote_resource_uuids))
+    try:
+        await executor.run_command(command)
+    except CommandExecutionFailure as cef:
+        # errors are reported per job, such as
+        # scancel: error: Kill job error on job id 1390065: Invalid job id specified
+        failed_jobs = set(SCANCEL_ERROR_PATTERN.findall(cef.stderr or ""))
+        if not failed_jobs:
+            raise
+        logger.warning(f"scancel failed for some jobs: {cef.stderr}")
+        return (str(uuid) not in failed_jobs for uuid in remote_resource_uuids)
+    return [True] * len(remote_resource_uuids)
+
+
 class SlurmAdapter(SiteAdapter):
     def __init__(self, machine_type: str, site_name: str):
         self._machine_type = machine_type
@@ -62,10 +117,34 @@ class SlurmAdapter(SiteAdapter):
             self._startup_command = self.configuration.StartupCommand
 
         self._executor = getattr(self.configuration, "executor", ShellExecutor())
+        bulk_size = getattr(self.configuration, "bulk_size", 100)
+        bulk_delay = getattr(self.configuration, "bulk_delay", 1.0)
+        bulk_adaptive = getattr(self.configuration, "bulk_adaptive", False)
+        bulk_retry_delay = getattr(self.configuration, "bulk_retry_delay", None)
+        # repeated requests to cancel the same job are only sent once
+        self._sbatch, self._scancel = (
+            AsyncBulkCall(
+                partial(tool, executor=self._executor),
+                size=bulk_size,
+                delay=bulk_delay,
+                adaptive=bulk_adaptive,
+                retry_delay=bulk_retry_delay,
+                key=key,
+            )
+            for tool, key in ((sbatch, None), (scancel, int))
+        )
 
-        self._slurm_status = AsyncCacheMap(
+        # cached status is refreshed in the background if a stale age is set
+        max_stale_age = getattr(self.configuration, "max_stale_age", None)
+        # all machine types of a site, or sites, using the same executor alike
+        # share the status
+        self._slurm_status = AsyncCacheMap.shared(
+            ("squeue", self._executor),
             update_coroutine=partial(slurm_status_updater, self._executor),
             max_age=self.configuration.StatusUpdate * 60,
+            max_stale_age=None if max_stale_age is None else max_stale_age * 60,
+            refresh_jitter=getattr(self.configuration, "refresh_jitter", 0.1),
+            name=f"{self.site_name}/squeue",
         )
 
         key_translator = StaticMapping(
@@ -118,10 +197,12 @@ class SlurmAdapter(SiteAdapter):
             f"sbatch {sbatch_cmdline_option_string} {self._startup_command}"
         )
 
-        result = await self._executor.run_command(request_command)
-        logger.debug(f"{self.site_name} sbatch returned {result}")
-        pattern = re.compile(r"^Submitted batch job (\d*)", flags=re.MULTILINE)
-        remote_resource_uuid = int(pattern.findall(result.stdout)[0])
+        remote_resource_uuid = await self._sbatch(request_command)
+        if remote_resource_uuid is None:
+            raise CommandExecutionFailure(
+                message=f"Run command {request_command} via sbatch failed"
+            )
+        logger.debug(f"{self.site_name} sbatch submitted {remote_resource_uuid}")
         resource_attributes.update(
             remote_resource_uuid=remote_resource_uuid,
             created=datetime.now(),
@@ -134,6 +215,21 @@ class SlurmAdapter(SiteAdapter):
         self, resource_attributes: AttributeDict
     ) -> AttributeDict:
         await self._slurm_status.update_status()
+        return self._resource_status(resource_attributes)
+
+    async def resource_status_bulk(
+        self, resource_attributes: List[AttributeDict]
+    ) -> List[Union[AttributeDict, Exception]]:
+        await self._slurm_status.update_status()
+        responses = []
+        for attributes in resource_attributes:
+            try:
+                responses.append(self._resource_status(attributes))
+            except Exception as err:
+                responses.append(err)
+        return responses
+
+    def _resource_status(self, resource_attributes: AttributeDict) -> AttributeDict:
         try:
             resource_uuid = resource_attributes.remote_resource_uuid
             resource_status = self._slurm_status[str(resource_uuid)]
@@ -152,13 +248,16 @@ class SlurmAdapter(SiteAdapter):
                 }
         logger.debug(f"{self.site_name} has status {resource_status}.")
         resource_attributes.update(updated=datetime.now())
-        return convert_to_attribute_dict(
-            {**resource_attributes, **self.handle_response(resource_status)}
+        # shallow copy, the nested attributes are shared by all drones
+        return AttributeDict(
+            resource_attributes, **self.handle_response(resource_status)
         )
 
     async def terminate_resource(self, resource_attributes: AttributeDict):
-        request_command = f"scancel {resource_attributes.remote_resource_uuid}"
-        await self._executor.run_command(request_command)
+        resource_uuid = resource_attributes.remote_resource_uuid
+        if not await self._scancel(resource_uuid):
+            logger.debug(f"scancel failed for {resource_uuid}")
+            raise TardisResourceStatusUpdateFailed
         resource_attributes.update(
             resource_status=ResourceStatus.Stopped, updated=datetime.now()
         )
@@ -200,6 +299,17 @@ class SlurmAdapter(SiteAdapter):
             ),
         )
 
+    def watch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> bool:
+        self._slurm_status.watch(str(remote_resource_uuid), callback)
+        return True
+
+    def unwatch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> None:
+        self._slurm_status.unwatch(str(remote_resource_uuid), callback)
+
     async def stop_resource(self, resource_attributes: AttributeDict):
         logger.debug("Slurm jobs cannot be stopped gracefully. Terminating instead.")
         return await self.terminate_resource(resource_attributes)
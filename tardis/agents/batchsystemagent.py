@@ -2,6 +2,8 @@ from ..interfaces.batchsystemadapter import BatchSystemAdapter
 from ..interfaces.batchsystemadapter import MachineStatus
 from ..utilities.attributedict import AttributeDict
 
+from typing import Callable, List
+
 
 class BatchSystemAgent(BatchSystemAdapter):
     def __init__(self, batch_system_adapter: BatchSystemAdapter):
@@ -22,9 +24,20 @@ class BatchSystemAgent(BatchSystemAdapter):
     async def get_machine_status(self, drone_uuid: str) -> MachineStatus:
         return await self._batch_system_adapter.get_machine_status(drone_uuid)
 
+    async def get_machine_status_bulk(
+        self, drone_uuids: List[str]
+    ) -> List[MachineStatus]:
+        return await self._batch_system_adapter.get_machine_status_bulk(drone_uuids)
+
     async def get_utilisation(self, drone_uuid: str) -> float:
         return await self._batch_system_adapter.get_utilisation(drone_uuid)
 
     @property
     def machine_meta_data_translation_mapping(self) -> AttributeDict:
         return self._batch_system_adapter.machine_meta_data_translation_mapping
+
+    def watch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> bool:
+        return self._batch_system_adapter.watch_machine(drone_uuid, callback)
+
+    def unwatch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> None:
+        return self._batch_system_adapter.unwatch_machine(drone_uuid, callback)
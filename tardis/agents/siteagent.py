@@ -1,6 +1,9 @@
 from ..interfaces.siteadapter import SiteAdapter
 from ..utilities.attributedict import AttributeDict
 from ..utilities.attributedict import convert_to_attribute_dict
+from ..utilities.utils import copy_exception
+
+from typing import Callable, Dict, List, Optional, Union
 
 
 class SiteAgent(SiteAdapter):
@@ -35,6 +38,22 @@ class SiteAgent(SiteAdapter):
     def drone_heartbeat_interval(self) -> int:
         return self._site_adapter.drone_heartbeat_interval
 
+    @property
+    def drone_heartbeat_intervals(self) -> Dict[str, int]:
+        return self._site_adapter.drone_heartbeat_intervals
+
+    @property
+    def drone_heartbeat_backoff(self) -> Optional[float]:
+        return self._site_adapter.drone_heartbeat_backoff
+
+    @property
+    def drone_heartbeat_max_interval(self) -> int:
+        return self._site_adapter.drone_heartbeat_max_interval
+
+    @property
+    def drone_wakeup_on_change(self) -> bool:
+        return self._site_adapter.drone_wakeup_on_change
+
     @property
     def drone_minimum_lifetime(self) -> int:
         return self._site_adapter.drone_minimum_lifetime
@@ -53,6 +72,32 @@ class SiteAgent(SiteAdapter):
         with self._site_adapter.handle_exceptions():
             return await self._site_adapter.resource_status(resource_attributes)
 
+    async def resource_status_bulk(
+        self, resource_attributes: List[AttributeDict]
+    ) -> List[Union[AttributeDict, Exception]]:
+        try:
+            with self._site_adapter.handle_exceptions():
+                responses = await self._site_adapter.resource_status_bulk(
+                    resource_attributes
+                )
+        except Exception as err:
+            # each drone handles, and chains to, an exception of its own
+            return [copy_exception(err) for _ in resource_attributes]
+        return [
+            self._translate_exception(response)
+            if isinstance(response, Exception)
+            else response
+            for response in responses
+        ]
+
+    def _translate_exception(self, exception: Exception) -> Exception:
+        """Translate an exception of the site adapter as ``handle_exceptions``"""
+        try:
+            with self._site_adapter.handle_exceptions():
+                raise exception
+        except Exception as err:
+            return err
+
     @property
     def site_name(self) -> str:
         return self._site_adapter.site_name
@@ -64,3 +109,13 @@ class SiteAgent(SiteAdapter):
     async def terminate_resource(self, resource_attributes: AttributeDict):
         with self._site_adapter.handle_exceptions():
             return await self._site_adapter.terminate_resource(resource_attributes)
+
+    def watch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> bool:
+        return self._site_adapter.watch_resource(remote_resource_uuid, callback)
+
+    def unwatch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> None:
+        return self._site_adapter.unwatch_resource(remote_resource_uuid, callback)
@@ -6,12 +6,12 @@ def enable_yaml_load(tag):
         def class_factory(loader, node):
             new_cls = cls
             if isinstance(node, yaml.nodes.MappingNode):
-                parameters = loader.construct_mapping(node)
+                parameters = loader.construct_mapping(node, deep=True)
                 new_cls = cls(**parameters)
             elif isinstance(node, yaml.nodes.ScalarNode):
                 new_cls = cls()
             elif isinstance(node, yaml.nodes.SequenceNode):
-                parameters = loader.construct_sequence(node)
+                parameters = loader.construct_sequence(node, deep=True)
                 new_cls = cls(*parameters)
             return new_cls
 
@@ -3,6 +3,9 @@ from ..utilities.attributedict import AttributeDict
 from abc import ABCMeta
 from abc import abstractmethod
 from enum import Enum
+from typing import Callable, List
+
+import asyncio
 
 
 class MachineStatus(Enum):
@@ -85,6 +88,25 @@ class BatchSystemAdapter(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    async def get_machine_status_bulk(
+        self, drone_uuids: List[str]
+    ) -> List[MachineStatus]:
+        """
+        Get the status of several worker nodes in the overlay batch system at once.
+        The default implementation calls :py:meth:`~.get_machine_status` for each
+        worker node, adapters able to query many worker nodes at once should
+        override it.
+
+        :param drone_uuids: Uuids of the worker nodes, for some sites corresponding
+            to the host names of the drones.
+        :type drone_uuids: List[str]
+        :return: The machine status of each worker node in order
+        :rtype: List[MachineStatus]
+        """
+        return await asyncio.gather(
+            *(self.get_machine_status(drone_uuid) for drone_uuid in drone_uuids)
+        )
+
     @abstractmethod
     async def get_utilisation(self, drone_uuid: str) -> float:
         """
@@ -112,3 +134,33 @@ class BatchSystemAdapter(metaclass=ABCMeta):
         :rtype: AttributeDict
         """
         raise NotImplementedError
+
+    def watch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> bool:
+        """
+        Call ``callback`` whenever the adapter learns about a change of the status
+        of a worker node in the overlay batch system. The default implementation
+        does not support watching worker nodes, adapters caching the status of all
+        worker nodes should override it.
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable to call on changes
+        :type callback: Callable[[], None]
+        :return: Whether the worker node is watched
+        :rtype: bool
+        """
+        return False
+
+    def unwatch_machine(self, drone_uuid: str, callback: Callable[[], None]) -> None:
+        """
+        Stop calling ``callback`` on changes of the worker node, see
+        :py:meth:`~.watch_machine`.
+
+        :param drone_uuid: Uuid of the worker node, for some sites corresponding
+            to the host name of the drone.
+        :type drone_uuid: str
+        :param callback: Callable passed to :py:meth:`~.watch_machine`
+        :type callback: Callable[[], None]
+        """
+        return None
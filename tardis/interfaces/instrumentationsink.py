@@ -0,0 +1,21 @@
+from abc import ABCMeta, abstractmethod
+from typing import Dict
+
+
+class InstrumentationSink(metaclass=ABCMeta):
+    """
+    Receiver of the timing observations recorded by the
+    :py:class:`~tardis.utilities.instrumentation.Instrumentation`
+    """
+
+    @abstractmethod
+    def observe(self, metric: str, value: float, labels: Dict[str, str]) -> None:
+        """
+        Record a single observation
+
+        :param metric: name of the metric, see
+            :py:data:`~tardis.utilities.instrumentation.METRICS`
+        :param value: observed value in seconds
+        :param labels: labels of the observation, such as site and state
+        """
+        return NotImplemented
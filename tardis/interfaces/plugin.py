@@ -6,6 +6,11 @@ from tardis.utilities.attributedict import AttributeDict
 
 
 class Plugin(metaclass=ABCMeta):
+    #: whether the plugin relies on receiving every single state change, which
+    #: rules out lossy dispatch policies, see
+    #: :py:class:`~tardis.utilities.plugindispatcher.PluginDispatcher`
+    requires_all_notifications = False
+
     @abstractmethod
     async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
         return NotImplemented
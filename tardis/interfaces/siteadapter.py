@@ -6,9 +6,10 @@ from abc import ABCMeta, abstractmethod
 from cobald.utility.primitives import infinity as inf
 from enum import Enum
 from functools import lru_cache
-from pydantic import BaseModel, conint, validator
-from typing import Optional
+from pydantic import BaseModel, confloat, conint, validator
+from typing import Callable, Dict, List, Optional, Union
 
+import asyncio
 import logging
 
 logger = logging.getLogger("cobald.runtime.tardis.interfaces.site")
@@ -24,6 +25,10 @@ class SiteConfigurationModel(BaseModel):
     quota: Optional[int] = inf
     drone_minimum_lifetime: Optional[conint(gt=0)] = None
     drone_heartbeat_interval: Optional[conint(ge=0)] = 60
+    drone_heartbeat_intervals: Dict[str, conint(ge=0)] = {}
+    drone_heartbeat_backoff: Optional[confloat(gt=1)] = None
+    drone_heartbeat_max_interval: conint(gt=0) = 900
+    drone_wakeup_on_change: bool = False
 
     class Config:
         extra = "forbid"
@@ -110,6 +115,50 @@ class SiteAdapter(metaclass=ABCMeta):
         """
         return self.site_configuration.drone_heartbeat_interval
 
+    @property
+    def drone_heartbeat_intervals(self) -> Dict[str, int]:
+        """
+        Property that returns the configuration parameter drone_heartbeat_intervals.
+        It maps names of drone states to heartbeat intervals overriding the
+        drone_heartbeat_interval while a drone is in that state.
+        :return: The heartbeat intervals per state of the drone
+        :rtype: Dict[str, int]
+        """
+        return self.site_configuration.drone_heartbeat_intervals
+
+    @property
+    def drone_heartbeat_backoff(self) -> Optional[float]:
+        """
+        Property that returns the configuration parameter drone_heartbeat_backoff.
+        It describes the factor the heartbeat interval of a drone grows by with
+        every heartbeat not changing its state.
+        :return: The backoff factor of the heartbeat interval or None if disabled
+        :rtype: float, None
+        """
+        return self.site_configuration.drone_heartbeat_backoff
+
+    @property
+    def drone_heartbeat_max_interval(self) -> int:
+        """
+        Property that returns the configuration parameter
+        drone_heartbeat_max_interval. It describes the limit of the heartbeat
+        interval of a drone backing off.
+        :return: The maximum heartbeat interval of a backing off drone
+        :rtype: int
+        """
+        return self.site_configuration.drone_heartbeat_max_interval
+
+    @property
+    def drone_wakeup_on_change(self) -> bool:
+        """
+        Property that returns the configuration parameter drone_wakeup_on_change.
+        It describes whether drones are woken up for an immediate heartbeat when
+        the status of their resource changes, see :py:meth:`~.watch_resource`.
+        :return: Whether drones are woken up on changes
+        :rtype: bool
+        """
+        return self.site_configuration.drone_wakeup_on_change
+
     @property
     def drone_minimum_lifetime(self) -> [int, None]:
         """
@@ -232,6 +281,26 @@ class SiteAdapter(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    async def resource_status_bulk(
+        self, resource_attributes: List[AttributeDict]
+    ) -> List[Union[AttributeDict, Exception]]:
+        """
+        Method to check the status of several resources at a resource provider at
+        once. The default implementation calls
+        :py:meth:`~.resource_status` for each resource, adapters able to query
+        the status of many resources at once should override it.
+        :param resource_attributes: Describing attributes of each resource,
+        defined in the :py:class:`~tardis.resources.drone.Drone` implementation!
+        :type resource_attributes: List[AttributeDict]
+        :return: Updated describing attributes or the exception raised, for each
+        resource in order.
+        :rtype: List[Union[AttributeDict, Exception]]
+        """
+        return await asyncio.gather(
+            *(self.resource_status(attributes) for attributes in resource_attributes),
+            return_exceptions=True,
+        )
+
     @property
     @lru_cache(maxsize=16)
     def site_configuration(self) -> AttributeDict:
@@ -297,3 +366,33 @@ class SiteAdapter(metaclass=ABCMeta):
         :rtype: AttributeDict
         """
         raise NotImplementedError
+
+    def watch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> bool:
+        """
+        Call ``callback`` whenever the adapter learns about a change of the status
+        of the resource ``remote_resource_uuid``. The default implementation does
+        not support watching resources, adapters caching the status of all
+        resources should override it.
+        :param remote_resource_uuid: Unique identifier of the resource at the
+        resource provider
+        :param callback: Callable to call on changes
+        :type callback: Callable[[], None]
+        :return: Whether the resource is watched
+        :rtype: bool
+        """
+        return False
+
+    def unwatch_resource(
+        self, remote_resource_uuid, callback: Callable[[], None]
+    ) -> None:
+        """
+        Stop calling ``callback`` on changes of the resource, see
+        :py:meth:`~.watch_resource`.
+        :param remote_resource_uuid: Unique identifier of the resource at the
+        resource provider
+        :param callback: Callable passed to :py:meth:`~.watch_resource`
+        :type callback: Callable[[], None]
+        """
+        return None
@@ -1,17 +1,45 @@
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Optional, Type, TYPE_CHECKING
 
 from abc import ABCMeta, abstractmethod
 
+from ..utilities.instrumentation import Instrumentation
 from ..utilities.pipeline import PipelineProcessor
 
+import asyncio
+import logging
+
 if TYPE_CHECKING:
     from tardis.resources.drone import Drone
 
+logger = logging.getLogger("cobald.runtime.tardis.interfaces.state")
+
 
 class State(metaclass=ABCMeta):
+    """
+    Base class of all drone states
+
+    States carry no instance data, each subclass has a single interned instance
+    shared by all drones. Instances are therefore hashable and can be compared
+    by identity. Subclasses are registered by name, see :py:meth:`~.from_name`.
+    """
+
     transition = {}
     processing_pipeline = []
 
+    _registry: Dict[str, Type["State"]] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        State._registry[cls.__name__] = cls
+
+    def __new__(cls):
+        try:
+            return cls.__dict__["_instance"]
+        except KeyError:
+            instance = super().__new__(cls)
+            cls._instance = instance
+            return instance
+
     def __str__(self):
         return self.__class__.__name__
 
@@ -22,14 +50,96 @@ class State(metaclass=ABCMeta):
     def get_all_states(cls) -> List[str]:
         return [subclass.__name__ for subclass in cls.__subclasses__()]
 
+    @staticmethod
+    def from_name(name: str) -> "State":
+        """
+        Get the instance of the state registered as ``name``
+
+        :param name: name of the state class
+        :return: the interned instance of the state
+        :rtype: State
+        """
+        return State._registry[name]()
+
     @classmethod
     @abstractmethod
     async def run(cls, drone: "Drone"):
         return NotImplemented
 
     @classmethod
-    async def run_processing_pipeline(cls, drone: "Drone"):
+    def _pipeline_processor(cls) -> PipelineProcessor:
+        """The processor of the ``processing_pipeline``, built once per state"""
+        try:
+            pipeline_processor, processing_pipeline = cls.__dict__["_pipeline"]
+        except KeyError:
+            pass
+        else:
+            if processing_pipeline is cls.processing_pipeline:
+                return pipeline_processor
         pipeline_processor = PipelineProcessor(cls.processing_pipeline)
-        return await pipeline_processor.run_pipeline(
-            pipeline_input=cls.transition, drone=drone, current_state=cls
+        cls._pipeline = pipeline_processor, cls.processing_pipeline
+        return pipeline_processor
+
+    @classmethod
+    async def run_processing_pipeline(cls, drone: "Drone"):
+        return await cls._pipeline_processor().run_pipeline(
+            pipeline_input=cls.transition,
+            drone=drone,
+            current_state=cls,
+            stage_timer=cls._stage_timer(drone),
+        )
+
+    @classmethod
+    async def run_processing_pipeline_bulk(cls, drones: List["Drone"]):
+        return await cls._pipeline_processor().run_pipeline_bulk(
+            pipeline_input=cls.transition,
+            drones=drones,
+            current_state=cls,
+            stage_timer=cls._stage_timer(drones[0]),
+        )
+
+    @classmethod
+    def _stage_timer(cls, drone: "Drone"):
+        instrumentation = Instrumentation.active
+        if instrumentation is None:
+            return None
+        return instrumentation.stage_timer(
+            state=cls.__name__, site=drone.resource_attributes.site_name
+        )
+
+    @classmethod
+    async def run_bulk(cls, drones: List["Drone"]) -> List[Optional[Exception]]:
+        """
+        Run the state for several drones sharing the same site agent at once
+
+        States with a ``processing_pipeline`` evaluate it for all drones together
+        and apply the resulting states via :py:meth:`~.change_state`. All other
+        states are run for each drone individually.
+
+        :return: the :py:class:`Exception` raised for each drone, if any
+        """
+        if not cls.processing_pipeline:
+            return await asyncio.gather(
+                *(cls.run(drone) for drone in drones), return_exceptions=True
+            )
+        for drone in drones:
+            logger.info(f"Drone {drone.resource_attributes} in {cls.__name__}")
+        new_states = await cls.run_processing_pipeline_bulk(drones)
+        return await asyncio.gather(
+            *(
+                cls._change_state_unless_failed(drone, new_state)
+                for drone, new_state in zip(drones, new_states)
+            ),
+            return_exceptions=True,
         )
+
+    @classmethod
+    async def _change_state_unless_failed(cls, drone: "Drone", new_state):
+        if isinstance(new_state, Exception):
+            return new_state
+        await cls.change_state(drone, new_state)
+
+    @classmethod
+    async def change_state(cls, drone: "Drone", new_state: "State"):
+        """Apply the ``new_state`` determined by the processing pipeline"""
+        await drone.set_state(new_state)
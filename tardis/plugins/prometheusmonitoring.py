@@ -1,20 +1,27 @@
 from ..configuration.configuration import Configuration
+from ..interfaces.instrumentationsink import InstrumentationSink
 from ..interfaces.plugin import Plugin
 from ..interfaces.state import State
 from ..interfaces.siteadapter import ResourceStatus
 from ..utilities.attributedict import AttributeDict
+from ..utilities.instrumentation import METRICS
+
+from typing import Dict
 
 import logging
 from aioprometheus.service import Service
-from aioprometheus import Gauge
+from aioprometheus import Gauge, Histogram
 
 logger = logging.getLogger("cobald.runtime.tardis.plugins.prometheusmonitoring")
 
 
-class PrometheusMonitoring(Plugin):
+class PrometheusMonitoring(Plugin, InstrumentationSink):
     """
     The :py:class:`~.PrometheusMonitoring`
     implements an interface to monitor the state of the Drones using Prometheus.
+
+    If the :py:class:`~tardis.utilities.instrumentation.Instrumentation` is
+    enabled, its observations are exported as Prometheus histograms as well.
     """
 
     def __init__(self):
@@ -39,6 +46,9 @@ class PrometheusMonitoring(Plugin):
         for gauge in self._gauges.values():
             gauge.set({}, 0)
 
+        # histograms of the instrumentation, created on first observation
+        self._histograms: Dict[str, Histogram] = {}
+
     async def start(self):
         await self._svr.start(addr=self._addr, port=self._port)
         logger.debug(f"Serving Prometheus metrics on {self._svr.metrics_url}")
@@ -71,3 +81,21 @@ class PrometheusMonitoring(Plugin):
 
         if new_status == ResourceStatus.Deleted:
             self._drones.pop(resource_attributes.drone_uuid, None)
+
+    def observe(self, metric: str, value: float, labels: Dict[str, str]) -> None:
+        """
+        Record an observation of the instrumentation in a Prometheus histogram
+
+        :param metric: Name of the metric
+        :type metric: str
+        :param value: Observed value in seconds
+        :type value: float
+        :param labels: Labels of the observation
+        :type labels: Dict[str, str]
+        :return: None
+        """
+        try:
+            histogram = self._histograms[metric]
+        except KeyError:
+            histogram = self._histograms[metric] = Histogram(metric, METRICS[metric])
+        histogram.observe(labels, value)
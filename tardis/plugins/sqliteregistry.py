@@ -15,6 +15,8 @@ logger = logging.getLogger("cobald.runtime.tardis.plugins.sqliteregistry")
 
 class SqliteRegistry(Plugin):
     thread_pool_executor = ThreadPoolExecutor(max_workers=1)
+    # inserting and deleting resources relies on all state changes
+    requires_all_notifications = True
 
     def __init__(self):
         """
@@ -134,6 +136,9 @@ class SqliteRegistry(Plugin):
                     "INSERT OR IGNORE INTO ResourceStates(state) VALUES (?)",
                     (state,),
                 )
+            # cache the ids of all states to avoid looking them up on each update
+            cursor.execute("SELECT state, state_id FROM ResourceStates")
+            self._state_ids = dict(cursor.fetchall())
 
             cursor.execute(
                 "CREATE UNIQUE INDEX IF NOT EXISTS idx_drone_uuid ON Resources (drone_uuid);"  # noqa B950
@@ -181,13 +186,13 @@ class SqliteRegistry(Plugin):
         INSERT OR ROLLBACK INTO
         Resources(remote_resource_uuid, drone_uuid, state_id, site_id, machine_type_id,
         created, updated)
-        SELECT :remote_resource_uuid, :drone_uuid, RS.state_id, S.site_id,
+        SELECT :remote_resource_uuid, :drone_uuid, :state_id, S.site_id,
         MT.machine_type_id, :created, :updated
-        FROM ResourceStates RS
-        JOIN Sites S ON S.site_name = :site_name
+        FROM Sites S
         JOIN MachineTypes MT ON MT.machine_type = :machine_type AND MT.site_id =
         S.site_id
-        WHERE RS.state = :state"""
+        WHERE S.site_name = :site_name"""
+        bind_parameters["state_id"] = self._state_ids[bind_parameters["state"]]
         await self.async_execute(sql_query, bind_parameters)
 
     async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
@@ -200,7 +205,8 @@ class SqliteRegistry(Plugin):
     async def update_resource(self, bind_parameters: Dict) -> None:
         sql_query = """UPDATE Resources SET updated = :updated,
         remote_resource_uuid = :remote_resource_uuid,
-        state_id = (SELECT state_id FROM ResourceStates WHERE state = :state)
+        state_id = :state_id
         WHERE drone_uuid = :drone_uuid
         AND site_id = (SELECT site_id FROM Sites WHERE site_name = :site_name)"""
+        bind_parameters["state_id"] = self._state_ids[bind_parameters["state"]]
         await self.async_execute(sql_query, bind_parameters)
@@ -4,10 +4,14 @@ from tardis.agents.batchsystemagent import BatchSystemAgent
 from tardis.agents.siteagent import SiteAgent
 from tardis.interfaces.plugin import Plugin
 from tardis.interfaces.state import State
+from .droneattributes import DroneAttributes, MachineTypeAttributes
+from .dronescheduler import DroneScheduler
 from .dronestates import RequestState
 from .dronestates import DownState
 from ..plugins.sqliteregistry import SqliteRegistry
-from ..utilities.attributedict import AttributeDict
+from ..utilities.instrumentation import HEARTBEAT_DRIFT, STATE_DURATION
+from ..utilities.instrumentation import Instrumentation
+from ..utilities.plugindispatcher import PluginDispatcher
 from ..utilities.utils import load_states
 from cobald.daemon import service
 from cobald.interfaces import Pool
@@ -40,16 +44,27 @@ class Drone(Pool):
         self._plugins = plugins or []
         self._state = state
 
-        self.resource_attributes = AttributeDict(
-            site_name=self._site_agent.site_name,
-            machine_type=self.site_agent.machine_type,
-            obs_machine_meta_data_translation_mapping=self.batch_system_agent.machine_meta_data_translation_mapping,  # noqa B950
+        self.resource_attributes = DroneAttributes(
+            MachineTypeAttributes.get(
+                site_name=self._site_agent.site_name,
+                machine_type=self.site_agent.machine_type,
+                obs_machine_meta_data_translation_mapping=self.batch_system_agent.machine_meta_data_translation_mapping,  # noqa B950
+            ),
             remote_resource_uuid=remote_resource_uuid,
             created=created or datetime.now(),
             updated=updated or datetime.now(),
             drone_uuid=drone_uuid or self.site_agent.drone_uuid(uuid.uuid4().hex[:10]),
         )
 
+        # heartbeat interval grown by backing off, None if not backed off
+        self._backoff_interval: Optional[float] = None
+        # resource and worker node watched to wake up the drone on changes
+        self._watched_resource = None
+        self._watched_machine = False
+        self._scheduler: Optional[DroneScheduler] = None
+        # future resolved to end the current sleep between heartbeats
+        self._wakeup: Optional[asyncio.Future] = None
+
         self._allocation = 0.0
         self._demand = self.maximum_demand
         self._utilisation = 0.0
@@ -66,6 +81,8 @@ class Drone(Pool):
     @cached_property
     def _database(self) -> Optional[SqliteRegistry]:
         for plugin in self._plugins:
+            if isinstance(plugin, PluginDispatcher):
+                plugin = plugin.plugin
             if isinstance(plugin, SqliteRegistry):
                 return plugin
 
@@ -88,8 +105,35 @@ class Drone(Pool):
         self._demand = value
 
     @property
-    def heartbeat_interval(self) -> int:
-        return self.site_agent.drone_heartbeat_interval
+    def heartbeat_interval(self) -> float:
+        """
+        Time in seconds until the next heartbeat of the drone
+
+        The interval is configured per site and optionally per state. With a
+        ``drone_heartbeat_backoff`` configured for the site, the interval grows
+        with every heartbeat not changing the state, up to the
+        ``drone_heartbeat_max_interval``, and is reset on every state change.
+        """
+        if self._backoff_interval is not None:
+            return self._backoff_interval
+        return self._state_heartbeat_interval()
+
+    def _state_heartbeat_interval(self) -> int:
+        site_agent = self.site_agent
+        return site_agent.drone_heartbeat_intervals.get(
+            str(self.state), site_agent.drone_heartbeat_interval
+        )
+
+    def _back_off(self) -> None:
+        backoff = self.site_agent.drone_heartbeat_backoff
+        if backoff is None:
+            return
+        interval = self.heartbeat_interval * backoff
+        maximum_interval = self.site_agent.drone_heartbeat_max_interval
+        if interval > maximum_interval:
+            # never exceed the maximum, but never undercut the configured interval
+            interval = max(maximum_interval, self._state_heartbeat_interval())
+        self._backoff_interval = interval
 
     @property
     def minimum_lifetime(self) -> [int, None]:
@@ -112,22 +156,155 @@ class Drone(Pool):
         return self._site_agent
 
     async def run(self):
-        if self.state is None:
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.start_loop_lag_probe()
+        initial_run = self.state is None
+        if initial_run:
             # The state of a newly created Drone is None, since the plugins need
             # to be notified on the first state change. As calling the
             # ``set_state`` coroutine is not possible in the constructor, we
             # initiate the first state change here
             await self.set_state(RequestState())
-        while True:
-            current_state = self.state
+        self._scheduler = scheduler = DroneScheduler.from_configuration()
+        try:
+            if scheduler is not None:
+                # restored drones are spread across the heartbeat interval to avoid
+                # all of them running their states at once after a restart
+                return await scheduler.schedule(self, spread=not initial_run)
+            loop = asyncio.get_event_loop()
+            while await self.heartbeat():
+                due = loop.time() + self.heartbeat_interval
+                await self._sleep(self.heartbeat_interval)
+                instrumentation = Instrumentation.active
+                if instrumentation is not None:
+                    instrumentation.observe(
+                        HEARTBEAT_DRIFT,
+                        max(loop.time() - due, 0.0),
+                        site=self.resource_attributes.site_name,
+                    )
+        finally:
+            self._unwatch()
+
+    def wake(self) -> None:
+        """
+        Run the next heartbeat of the drone immediately
+
+        If the site enables ``drone_wakeup_on_change``, drones are woken up
+        whenever the site or batch system adapter notices a change of the status
+        of their resource or worker node.
+        """
+        if self._scheduler is not None:
+            self._scheduler.wake(self)
+        elif self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    async def _sleep(self, interval: float) -> None:
+        if self._watched_resource is None and not self._watched_machine:
+            await asyncio.sleep(interval)
+            return
+        loop = asyncio.get_event_loop()
+        self._wakeup = loop.create_future()
+        timer = loop.call_later(interval, self.wake)
+        try:
+            await self._wakeup
+        finally:
+            timer.cancel()
+            self._wakeup = None
+
+    def _watch(self) -> None:
+        """Watch the resource and worker node of the drone for changes"""
+        site_agent = self.site_agent
+        if not site_agent.drone_wakeup_on_change:
+            return
+        remote_resource_uuid = self.resource_attributes.remote_resource_uuid
+        if remote_resource_uuid != self._watched_resource:
+            self._unwatch_resource()
+            if remote_resource_uuid is not None and site_agent.watch_resource(
+                remote_resource_uuid, self.wake
+            ):
+                self._watched_resource = remote_resource_uuid
+        if not self._watched_machine:
+            self._watched_machine = self.batch_system_agent.watch_machine(
+                self.resource_attributes.drone_uuid, self.wake
+            )
+
+    def _unwatch(self) -> None:
+        self._unwatch_resource()
+        if self._watched_machine:
+            self.batch_system_agent.unwatch_machine(
+                self.resource_attributes.drone_uuid, self.wake
+            )
+            self._watched_machine = False
+
+    def _unwatch_resource(self) -> None:
+        if self._watched_resource is not None:
+            self.site_agent.unwatch_resource(self._watched_resource, self.wake)
+            self._watched_resource = None
+
+    async def heartbeat(self) -> bool:
+        """
+        Run the current state of the drone once
+
+        :return: whether the drone is still alive and needs further heartbeats
+        :rtype: bool
+        """
+        current_state = self.state
+        instrumentation = Instrumentation.active
+        if instrumentation is None:
             await current_state.run(self)
-            if isinstance(current_state, DownState):
-                logger.debug(
-                    f"Garbage Collect Drone: {self.resource_attributes.drone_uuid}"
-                )
-                self._demand = 0
-                return
-            await asyncio.sleep(self.heartbeat_interval)
+        else:
+            await instrumentation.timed(
+                current_state.run(self),
+                STATE_DURATION,
+                state=str(current_state),
+                site=self.resource_attributes.site_name,
+            )
+        return self._check_alive(current_state)
+
+    @staticmethod
+    async def bulk_heartbeat(drones: List["Drone"]) -> List[Union[bool, Exception]]:
+        """
+        Run the current state of several drones at once
+
+        All ``drones`` have to share the same site agent and state, which allows
+        to evaluate the state for all of them with a single query of the site and
+        the batch system, see :py:meth:`~tardis.interfaces.state.State.run_bulk`.
+        If instrumented, the duration of the state is observed once for all
+        ``drones``.
+
+        :return: whether each drone is still alive and needs further heartbeats,
+            or the :py:class:`Exception` raised while running its state
+        :rtype: List[Union[bool, Exception]]
+        """
+        current_states = [drone.state for drone in drones]
+        instrumentation = Instrumentation.active
+        if instrumentation is None:
+            failures = await type(current_states[0]).run_bulk(drones)
+        else:
+            failures = await instrumentation.timed(
+                type(current_states[0]).run_bulk(drones),
+                STATE_DURATION,
+                state=str(current_states[0]),
+                site=drones[0].resource_attributes.site_name,
+            )
+        return [
+            failure if failure is not None else drone._check_alive(current_state)
+            for drone, current_state, failure in zip(drones, current_states, failures)
+        ]
+
+    def _check_alive(self, current_state: State) -> bool:
+        if isinstance(current_state, DownState):
+            logger.debug(
+                f"Garbage Collect Drone: {self.resource_attributes.drone_uuid}"
+            )
+            self._demand = 0
+            self._unwatch()
+            return False
+        if self.state is current_state:
+            self._back_off()
+        self._watch()
+        return True
 
     def register_plugins(self, observer: Union[List[Plugin], Plugin]) -> None:
         self._plugins.append(observer)
@@ -137,9 +314,10 @@ class Drone(Pool):
 
     async def set_state(self, state: State) -> None:
         """Should be replaced by asynchronous state.setter property once available"""
-        if state.__class__ != self.state.__class__:
+        if state is not self.state:
             self.resource_attributes.updated = datetime.now()
             self._state = state
+            self._backoff_interval = None
             await self.notify_plugins()
         else:
             self._state = state
@@ -0,0 +1,177 @@
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+_FIELDS = (
+    "drone_uuid",
+    "remote_resource_uuid",
+    "resource_status",
+    "created",
+    "updated",
+)
+_SHARED_FIELDS = (
+    "site_name",
+    "machine_type",
+    "obs_machine_meta_data_translation_mapping",
+)
+_INTERNAL_FIELDS = ("_shared", "_extra")
+
+
+class MachineTypeAttributes(object):
+    """
+    Resource attributes shared by all drones of a site and machine type
+
+    Use :py:meth:`~.get` to obtain the shared instance instead of creating a
+    new one per drone.
+    """
+
+    __slots__ = _SHARED_FIELDS
+
+    _instances: Dict[Tuple[Any, Any], "MachineTypeAttributes"] = {}
+
+    def __init__(
+        self,
+        site_name: str,
+        machine_type: str,
+        obs_machine_meta_data_translation_mapping: Any,
+    ):
+        self.site_name = site_name
+        self.machine_type = machine_type
+        self.obs_machine_meta_data_translation_mapping = (
+            obs_machine_meta_data_translation_mapping
+        )
+
+    @classmethod
+    def get(
+        cls,
+        site_name: str,
+        machine_type: str,
+        obs_machine_meta_data_translation_mapping: Any,
+    ) -> "MachineTypeAttributes":
+        """Get the attributes shared by all drones of a site and machine type"""
+        try:
+            instance = cls._instances[site_name, machine_type]
+        except KeyError:
+            pass
+        else:
+            if (
+                instance.obs_machine_meta_data_translation_mapping
+                is obs_machine_meta_data_translation_mapping
+            ):
+                return instance
+        instance = cls._instances[site_name, machine_type] = cls(
+            site_name, machine_type, obs_machine_meta_data_translation_mapping
+        )
+        return instance
+
+
+class DroneAttributes(MutableMapping):
+    """
+    Compact resource attributes of a :py:class:`~tardis.resources.drone.Drone`
+
+    :param shared: attributes shared with all drones of the same site and
+        machine type
+    :param attributes: initial attributes of the drone
+
+    The attributes every drone has are stored in slots, attributes shared by all
+    drones of a site and machine type are looked up in ``shared``. Any further
+    attributes reported by site adapters are kept in a dictionary created on
+    demand. Setting a shared attribute overrides it for this drone only, unless
+    it is set to the shared object itself.
+
+    As :py:class:`~tardis.utilities.attributedict.AttributeDict`, attributes
+    are accessible both as items and as attributes and the object can be used
+    wherever a mapping is expected, for example to notify plugins.
+    """
+
+    __slots__ = _FIELDS + _INTERNAL_FIELDS
+
+    def __init__(self, shared: MachineTypeAttributes, **attributes):
+        object.__setattr__(self, "_shared", shared)
+        object.__setattr__(self, "_extra", None)
+        for key, value in attributes.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _FIELDS:
+            try:
+                return object.__getattribute__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra: Optional[Dict[str, Any]] = self._extra
+        if extra is not None and key in extra:
+            return extra[key]
+        if key in _SHARED_FIELDS:
+            return getattr(self._shared, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _FIELDS:
+            object.__setattr__(self, key, value)
+        elif key in _SHARED_FIELDS and value is getattr(self._shared, key):
+            # shared values echoed back, e.g. by site adapters, are not copied
+            if self._extra is not None:
+                self._extra.pop(key, None)
+        else:
+            if self._extra is None:
+                object.__setattr__(self, "_extra", {})
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELDS:
+            try:
+                object.__delattr__(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        extra = self._extra or {}
+        for key in _FIELDS:
+            try:
+                object.__getattribute__(self, key)
+            except AttributeError:
+                continue
+            yield key
+        for key in _SHARED_FIELDS:
+            if key not in extra:
+                yield key
+        yield from extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __getattr__(self, item: str) -> Any:
+        # only called for attributes not found as slots
+        if item in _INTERNAL_FIELDS:
+            raise AttributeError(item)
+        try:
+            return self[item]
+        except KeyError:
+            raise AttributeError(
+                f"{item} is not a valid attribute. Dict contains {str(self)}."
+            ) from None
+
+    def __setattr__(self, key: str, value: Any) -> None:
+        if key in _INTERNAL_FIELDS:
+            object.__setattr__(self, key, value)
+        else:
+            self[key] = value
+
+    def __delattr__(self, item: str) -> None:
+        try:
+            del self[item]
+        except KeyError:
+            raise AttributeError(
+                f"{item} is not a valid attribute. Dict contains {str(self)}."
+            ) from None
+
+    def __copy__(self) -> "DroneAttributes":
+        attributes = {key: self[key] for key in _FIELDS if key in self}
+        attributes.update(self._extra or {})
+        return self.__class__(self._shared, **attributes)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
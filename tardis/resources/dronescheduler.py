@@ -0,0 +1,302 @@
+from ..configuration.configuration import Configuration
+from ..utilities.instrumentation import HEARTBEAT_DRIFT, Instrumentation
+from ..utilities.utils import copy_exception
+
+from typing import Dict, List, Optional, Set, Tuple, TYPE_CHECKING
+
+import asyncio
+import heapq
+import itertools
+import math
+import zlib
+
+if TYPE_CHECKING:
+    from tardis.resources.drone import Drone
+
+
+class DroneScheduler(object):
+    """
+    Centralised scheduler driving the heartbeats of all drones
+
+    :param max_concurrent_runs: maximum number of state runs executing at once
+        per site, :py:data:`None` for no limit
+    :param batch_window: width in seconds of the windows heartbeats are aligned
+        to, :py:data:`None` to run each heartbeat individually
+
+    Instead of every :py:class:`~tardis.resources.drone.Drone` sleeping for its
+    ``heartbeat_interval`` on its own, a single heap-based loop owns the
+    deadlines of all drones and runs their states when due. Drones restored
+    from a previous run are spread evenly across their heartbeat interval
+    to avoid bunched heartbeats after a restart.
+
+    If a ``batch_window`` is set, deadlines are rounded up to the next multiple
+    of the window. All drones due in a window that share the same site and
+    state are evaluated together via
+    :py:meth:`~tardis.resources.drone.Drone.bulk_heartbeat`, issuing a single
+    query to the site and batch system instead of one query per drone.
+
+    Drones are woken up for an immediate heartbeat via :py:meth:`~.wake`, for
+    example when the cached status of their resource changed.
+
+    The scheduler is opt-in and enabled by adding a ``DroneScheduler`` section
+    to the configuration, see :py:meth:`~.from_configuration`.
+    """
+
+    _instance: Optional["DroneScheduler"] = None
+
+    def __init__(
+        self,
+        max_concurrent_runs: Optional[int] = None,
+        batch_window: Optional[float] = None,
+    ):
+        if max_concurrent_runs is not None and max_concurrent_runs <= 0:
+            raise ValueError(
+                "'max_concurrent_runs' must be None or an integer above 0"
+                f", got {max_concurrent_runs!r} instead"
+            )
+        if batch_window is not None and batch_window <= 0:
+            raise ValueError(
+                "'batch_window' must be None or a number above 0"
+                f", got {batch_window!r} instead"
+            )
+        self._max_concurrent_runs = max_concurrent_runs
+        self._batch_window = batch_window
+        # heap of (deadline, sequence number, drone, future to resolve when done)
+        self._heap: List[Tuple[float, int, "Drone", asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # sequence number of the valid heap entry and future of waiting drones,
+        # entries of woken drones remain in the heap and are skipped once due
+        self._pending: Dict["Drone", Tuple[int, asyncio.Future]] = {}
+        self._site_bounds: Dict[str, asyncio.Semaphore] = {}
+        # task dispatching due drones from the heap
+        self._dispatch_task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        # tasks running drone heartbeats, tracked to avoid garbage collection
+        self._heartbeat_tasks: Set[asyncio.Task] = set()
+        self._waiting = 0
+        self._running = 0
+        self._lag = 0.0
+
+    @classmethod
+    def from_configuration(cls) -> Optional["DroneScheduler"]:
+        """
+        Get the process-wide scheduler if a ``DroneScheduler`` section is present
+        in the configuration, otherwise :py:data:`None`
+        """
+        try:
+            configuration = Configuration().DroneScheduler
+        except AttributeError:
+            return None
+        if cls._instance is None:
+            cls._instance = cls(**(configuration or {}))
+        return cls._instance
+
+    @property
+    def lag(self) -> float:
+        """Delay in seconds between deadline and start of the last heartbeat"""
+        return self._lag
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of due heartbeats waiting for a free slot of their site"""
+        return self._waiting
+
+    @property
+    def running(self) -> int:
+        """Number of heartbeats currently running"""
+        return self._running
+
+    @property
+    def scheduled(self) -> int:
+        """Number of drones waiting for their next heartbeat"""
+        return len(self._pending)
+
+    async def schedule(self, drone: "Drone", spread: bool = False) -> None:
+        """
+        Drive the heartbeats of ``drone`` until it is garbage collected
+
+        :param drone: the drone to run the states of
+        :param spread: whether to delay the first heartbeat by a drone specific
+            fraction of the heartbeat interval
+        """
+        loop = asyncio.get_event_loop()
+        finished = loop.create_future()
+        deadline = loop.time()
+        if spread:
+            deadline += self._phase(drone) * drone.heartbeat_interval
+        self._push(deadline, drone, finished)
+        await finished
+
+    def wake(self, drone: "Drone") -> None:
+        """
+        Run the next heartbeat of ``drone`` immediately
+
+        Drones with a running heartbeat or not scheduled at all are not affected.
+        """
+        try:
+            _, finished = self._pending[drone]
+        except KeyError:
+            return
+        self._push(asyncio.get_event_loop().time(), drone, finished)
+
+    @staticmethod
+    def _phase(drone: "Drone") -> float:
+        """Stable fraction of the heartbeat interval to offset ``drone`` by"""
+        drone_uuid = drone.resource_attributes.drone_uuid
+        return zlib.crc32(drone_uuid.encode()) / 2**32
+
+    def _push(self, deadline: float, drone: "Drone", finished: asyncio.Future):
+        if self._batch_window is not None:
+            deadline = math.ceil(deadline / self._batch_window) * self._batch_window
+        sequence = next(self._sequence)
+        self._pending[drone] = sequence, finished
+        heapq.heappush(self._heap, (deadline, sequence, drone, finished))
+        if self._dispatch_task is None:
+            self._wakeup = asyncio.Event()
+            self._dispatch_task = asyncio.ensure_future(self._dispatch())
+        elif self._heap[0][2] is drone:
+            # the new deadline is the earliest one, the dispatcher has to wake up
+            self._wakeup.set()
+
+    def _site_bound(self, site_name: str) -> Optional[asyncio.Semaphore]:
+        if self._max_concurrent_runs is None:
+            return None
+        try:
+            return self._site_bounds[site_name]
+        except KeyError:
+            bound = self._site_bounds[site_name] = asyncio.Semaphore(
+                value=self._max_concurrent_runs
+            )
+            return bound
+
+    async def _dispatch(self):
+        """Start the heartbeats of all drones once they are due"""
+        loop = asyncio.get_event_loop()
+        # each pending drone has a heap entry, all others are stale entries
+        while self._pending:
+            delay = self._heap[0][0] - loop.time()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            if self._batch_window is not None:
+                self._dispatch_batches(loop.time())
+            else:
+                deadline, sequence, drone, finished = heapq.heappop(self._heap)
+                if not self._pop_pending(sequence, drone, finished):
+                    continue
+                self._start(self._heartbeat(deadline, drone, finished))
+            # yield to the event loop so that many due drones do not arbitrarily
+            # delay the heartbeats already started
+            await asyncio.sleep(0)
+        self._heap.clear()
+        self._dispatch_task = None
+
+    def _dispatch_batches(self, now: float):
+        """Start one heartbeat per site and state for all drones due at ``now``"""
+        batches = {}
+        while self._heap and self._heap[0][0] <= now:
+            deadline, sequence, drone, finished = heapq.heappop(self._heap)
+            if not self._pop_pending(sequence, drone, finished):
+                continue
+            batch = batches.setdefault(
+                (id(drone.site_agent), type(drone.state)), (deadline, [], [])
+            )
+            batch[1].append(drone)
+            batch[2].append(finished)
+        for deadline, drones, finished in batches.values():
+            self._start(self._bulk_heartbeat(deadline, drones, finished))
+
+    def _pop_pending(
+        self, sequence: int, drone: "Drone", finished: asyncio.Future
+    ) -> bool:
+        """Remove a due drone from the pending ones, unless its entry is stale"""
+        if self._pending.get(drone, (None,))[0] != sequence:
+            # the drone has been woken up and rescheduled in the meantime
+            return False
+        del self._pending[drone]
+        # the drone may have been cancelled in the meantime
+        return not finished.done()
+
+    def _start(self, heartbeat):
+        task = asyncio.ensure_future(heartbeat)
+        self._heartbeat_tasks.add(task)
+        task.add_done_callback(self._heartbeat_tasks.discard)
+
+    async def _heartbeat(
+        self, deadline: float, drone: "Drone", finished: asyncio.Future
+    ):
+        site_name = drone.resource_attributes.site_name
+        bound = self._site_bound(site_name)
+        await self._acquire(bound, deadline, site_name)
+        try:
+            alive = await drone.heartbeat()
+        except Exception as err:
+            if not finished.done():
+                finished.set_exception(err)
+            return
+        finally:
+            self._release(bound)
+        self._reschedule(deadline, drone, finished, alive)
+
+    async def _bulk_heartbeat(
+        self,
+        deadline: float,
+        drones: List["Drone"],
+        finished: List[asyncio.Future],
+    ):
+        site_name = drones[0].resource_attributes.site_name
+        bound = self._site_bound(site_name)
+        await self._acquire(bound, deadline, site_name)
+        try:
+            alive = await type(drones[0]).bulk_heartbeat(drones)
+        except Exception as err:
+            for drone_finished in finished:
+                if not drone_finished.done():
+                    drone_finished.set_exception(copy_exception(err))
+            return
+        finally:
+            self._release(bound)
+        for drone, drone_finished, drone_alive in zip(drones, finished, alive):
+            if isinstance(drone_alive, Exception):
+                # only the drone raising the exception fails
+                if not drone_finished.done():
+                    drone_finished.set_exception(drone_alive)
+            else:
+                self._reschedule(deadline, drone, drone_finished, drone_alive)
+
+    async def _acquire(
+        self, bound: Optional[asyncio.Semaphore], deadline: float, site_name: str
+    ):
+        self._waiting += 1
+        if bound is not None:
+            await bound.acquire()
+        self._waiting -= 1
+        self._running += 1
+        self._lag = max(asyncio.get_event_loop().time() - deadline, 0.0)
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.observe(HEARTBEAT_DRIFT, self._lag, site=site_name)
+
+    def _release(self, bound: Optional[asyncio.Semaphore]):
+        self._running -= 1
+        if bound is not None:
+            bound.release()
+
+    def _reschedule(
+        self, deadline: float, drone: "Drone", finished: asyncio.Future, alive: bool
+    ):
+        if finished.done():
+            return
+        if not alive:
+            finished.set_result(None)
+            return
+        # keep the phase of the drone unless it is lagging behind
+        now = asyncio.get_event_loop().time()
+        next_deadline = deadline + drone.heartbeat_interval
+        if next_deadline < now:
+            next_deadline = now + drone.heartbeat_interval
+        self._push(next_deadline, drone, finished)
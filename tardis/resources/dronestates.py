@@ -1,9 +1,9 @@
-from collections import defaultdict
 from datetime import datetime
 import asyncio
 import logging
 
 from typing import TYPE_CHECKING
+from typing import List
 from typing import Type
 
 from ..exceptions.tardisexceptions import TardisAuthError
@@ -15,6 +15,8 @@ from ..interfaces.batchsystemadapter import MachineStatus
 from ..interfaces.state import State
 from ..interfaces.siteadapter import ResourceStatus
 from ..utilities.pipeline import StopProcessing
+from ..utilities.pipeline import bulk_stage
+from ..utilities.transitiontable import compile_transition_table
 
 if TYPE_CHECKING:
     from tardis.resources.drone import Drone
@@ -22,13 +24,26 @@ if TYPE_CHECKING:
 logger = logging.getLogger("cobald.runtime.tardis.resources.dronestates")
 
 
+async def bulk_batchsystem_machine_status(
+    state_transitions, drones: List["Drone"], current_state: Type[State]
+):
+    machine_states = await drones[0].batch_system_agent.get_machine_status_bulk(
+        drone_uuids=[drone.resource_attributes["drone_uuid"] for drone in drones]
+    )
+    return [
+        state_transition[machine_status.value - 1]
+        for state_transition, machine_status in zip(state_transitions, machine_states)
+    ]
+
+
+@bulk_stage(bulk_batchsystem_machine_status)
 async def batchsystem_machine_status(
     state_transition, drone: "Drone", current_state: Type[State]
 ):
     machine_status = await drone.batch_system_agent.get_machine_status(
         drone_uuid=drone.resource_attributes["drone_uuid"]
     )
-    return state_transition[machine_status]()
+    return state_transition[machine_status.value - 1]
 
 
 async def check_remote_draining(
@@ -41,7 +56,7 @@ async def check_remote_draining(
     return state_transition
 
 
-async def check_demand(state_transition, drone: "Drone", current_state: Type[State]):
+def check_demand(state_transition, drone: "Drone", current_state: Type[State]):
     if not drone.demand:
         drone._supply = 0.0
         if current_state in (BootingState,):
@@ -51,7 +66,7 @@ async def check_demand(state_transition, drone: "Drone", current_state: Type[Sta
     return state_transition
 
 
-async def check_minimum_lifetime(
+def check_minimum_lifetime(
     state_transition, drone: "Drone", current_state: Type[State]
 ):
     if (
@@ -63,20 +78,57 @@ async def check_minimum_lifetime(
     return state_transition
 
 
-async def resource_status(state_transition, drone: "Drone", current_state: Type[State]):
-    try:
-        drone.resource_attributes.update(
-            await drone.site_agent.resource_status(drone.resource_attributes)
-        )
-        logger.debug(f"Resource attributes: {drone.resource_attributes}")
-    except (TardisAuthError, TardisTimeout, TardisResourceStatusUpdateFailed) as err:
+def _resource_status_transition(
+    state_transition, drone: "Drone", current_state: Type[State], response
+):
+    if isinstance(
+        response, (TardisAuthError, TardisTimeout, TardisResourceStatusUpdateFailed)
+    ):
         #  Retry to get current state of the resource
-        raise StopProcessing(last_result=current_state()) from err
-    except TardisDroneCrashed as tdc:
+        raise StopProcessing(last_result=current_state()) from response
+    elif isinstance(response, TardisDroneCrashed):
         #  Try to cleanup crashed resources
-        raise StopProcessing(last_result=CleanupState()) from tdc
-    else:
-        return state_transition[drone.resource_attributes.resource_status]()
+        raise StopProcessing(last_result=CleanupState()) from response
+    elif isinstance(response, Exception):
+        raise response
+    drone.resource_attributes.update(response)
+    logger.debug(f"Resource attributes: {drone.resource_attributes}")
+    return state_transition[drone.resource_attributes.resource_status.value - 1]
+
+
+async def bulk_resource_status(
+    state_transitions, drones: List["Drone"], current_state: Type[State]
+):
+    responses = await drones[0].site_agent.resource_status_bulk(
+        [drone.resource_attributes for drone in drones]
+    )
+    results = []
+    for state_transition, drone, response in zip(state_transitions, drones, responses):
+        try:
+            results.append(
+                _resource_status_transition(
+                    state_transition, drone, current_state, response
+                )
+            )
+        except StopProcessing as sp:
+            results.append(sp)
+        except Exception as err:
+            results.append(err)
+    return results
+
+
+@bulk_stage(bulk_resource_status)
+async def resource_status(state_transition, drone: "Drone", current_state: Type[State]):
+    try:
+        response = await drone.site_agent.resource_status(drone.resource_attributes)
+    except (
+        TardisAuthError,
+        TardisTimeout,
+        TardisResourceStatusUpdateFailed,
+        TardisDroneCrashed,
+    ) as err:
+        response = err
+    return _resource_status_transition(state_transition, drone, current_state, response)
 
 
 class RequestState(State):
@@ -101,14 +153,6 @@ class RequestState(State):
 
 
 class BootingState(State):
-    transition = {
-        ResourceStatus.Booting: lambda: BootingState(),
-        ResourceStatus.Running: lambda: IntegrateState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Error: lambda: CleanupState(),
-    }
-
     processing_pipeline = [check_demand, resource_status]
 
     @classmethod
@@ -128,19 +172,6 @@ class IntegrateState(State):
 
 
 class IntegratingState(State):
-    transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.NotAvailable: lambda: IntegratingState(),
-            MachineStatus.Available: lambda: AvailableState(),
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
-        },
-        ResourceStatus.Booting: lambda: defaultdict(lambda: BootingState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
-    }
-
     processing_pipeline = [resource_status, batchsystem_machine_status]
 
     @classmethod
@@ -150,19 +181,6 @@ class IntegratingState(State):
 
 
 class AvailableState(State):
-    transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.Available: lambda: AvailableState(),
-            MachineStatus.NotAvailable: lambda: ShutDownState(),
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
-        },
-        ResourceStatus.Booting: lambda: defaultdict(lambda: BootingState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
-    }
-
     processing_pipeline = [
         check_remote_draining,
         check_demand,
@@ -175,8 +193,10 @@ class AvailableState(State):
     async def run(cls, drone: "Drone"):
         logger.info(f"Drone {drone.resource_attributes} in AvailableState")
 
-        new_state = await cls.run_processing_pipeline(drone)
+        await cls.change_state(drone, await cls.run_processing_pipeline(drone))
 
+    @classmethod
+    async def change_state(cls, drone: "Drone", new_state: State):
         if isinstance(new_state, AvailableState):
             drone._allocation = await drone.batch_system_agent.get_allocation(
                 drone_uuid=drone.resource_attributes["drone_uuid"]
@@ -201,20 +221,6 @@ class DrainState(State):
 
 
 class DrainingState(State):
-    transition = {
-        ResourceStatus.Running: lambda: {
-            MachineStatus.Draining: lambda: DrainingState(),
-            MachineStatus.Available: lambda: DrainState(),
-            MachineStatus.Drained: lambda: DisintegrateState(),
-            MachineStatus.NotAvailable: lambda: ShutDownState(),
-        },
-        # In case the job is retried by HTCondor, resources can transition to
-        # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Deleted: lambda: defaultdict(lambda: DownState),
-        ResourceStatus.Stopped: lambda: defaultdict(lambda: CleanupState),
-        ResourceStatus.Error: lambda: defaultdict(lambda: CleanupState),
-    }
     processing_pipeline = [resource_status, batchsystem_machine_status]
 
     @classmethod
@@ -234,16 +240,6 @@ class DisintegrateState(State):
 
 
 class ShutDownState(State):
-    transition = {
-        # In case the job is retried by HTCondor, resources can transition to
-        # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: ShuttingDownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
-    }
-
     processing_pipeline = [resource_status]
 
     @classmethod
@@ -253,7 +249,10 @@ class ShutDownState(State):
             f"Stopping VM with ID {drone.resource_attributes.remote_resource_uuid}"
         )
 
-        new_state = await cls.run_processing_pipeline(drone)
+        await cls.change_state(drone, await cls.run_processing_pipeline(drone))
+
+    @classmethod
+    async def change_state(cls, drone: "Drone", new_state: State):
         if isinstance(new_state, ShuttingDownState):
             try:
                 await drone.site_agent.stop_resource(drone.resource_attributes)
@@ -267,15 +266,6 @@ class ShutDownState(State):
 
 
 class ShuttingDownState(State):
-    transition = {
-        # In case the job is retried by HTCondor, resources can transition to
-        # BootingState again. In this case the job should be removed.
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: ShuttingDownState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
-    }
     processing_pipeline = [resource_status]
 
     @classmethod
@@ -289,21 +279,16 @@ class ShuttingDownState(State):
 
 
 class CleanupState(State):
-    transition = {
-        ResourceStatus.Booting: lambda: CleanupState(),
-        ResourceStatus.Running: lambda: DrainState(),
-        ResourceStatus.Stopped: lambda: CleanupState(),
-        ResourceStatus.Deleted: lambda: DownState(),
-        ResourceStatus.Error: lambda: CleanupState(),
-    }
     processing_pipeline = [resource_status]
 
     @classmethod
     async def run(cls, drone: "Drone"):
         logger.info(f"Drone {drone.resource_attributes} in CleanupState")
 
-        new_state = await cls.run_processing_pipeline(drone)
+        await cls.change_state(drone, await cls.run_processing_pipeline(drone))
 
+    @classmethod
+    async def change_state(cls, drone: "Drone", new_state: State):
         if isinstance(new_state, CleanupState):
             try:
                 logger.debug(
@@ -331,3 +316,116 @@ class DownState(State):
     async def run(cls, drone: "Drone"):
         logger.info(f"Drone {drone.resource_attributes} in DownState")
         drone.demand = 0
+
+
+# Transition tables of the states evaluating the resource status and optionally the
+# machine status, compiled into nested tuples of states at import time. A state
+# given instead of a nested table applies to any machine status.
+
+BootingState.transition = compile_transition_table(
+    BootingState,
+    {
+        ResourceStatus.Booting: BootingState,
+        ResourceStatus.Running: IntegrateState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+)
+
+IntegratingState.transition = compile_transition_table(
+    IntegratingState,
+    {
+        ResourceStatus.Running: {
+            MachineStatus.NotAvailable: IntegratingState,
+            MachineStatus.Available: AvailableState,
+            MachineStatus.Draining: DrainingState,
+            MachineStatus.Drained: DisintegrateState,
+        },
+        ResourceStatus.Booting: BootingState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+    MachineStatus,
+)
+
+AvailableState.transition = compile_transition_table(
+    AvailableState,
+    {
+        ResourceStatus.Running: {
+            MachineStatus.Available: AvailableState,
+            MachineStatus.NotAvailable: ShutDownState,
+            MachineStatus.Draining: DrainingState,
+            MachineStatus.Drained: DisintegrateState,
+        },
+        ResourceStatus.Booting: BootingState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+    MachineStatus,
+)
+
+DrainingState.transition = compile_transition_table(
+    DrainingState,
+    {
+        ResourceStatus.Running: {
+            MachineStatus.Draining: DrainingState,
+            MachineStatus.Available: DrainState,
+            MachineStatus.Drained: DisintegrateState,
+            MachineStatus.NotAvailable: ShutDownState,
+        },
+        # In case the job is retried by HTCondor, resources can transition to
+        # BootingState again. In this case the job should be removed.
+        ResourceStatus.Booting: CleanupState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+    MachineStatus,
+)
+
+ShutDownState.transition = compile_transition_table(
+    ShutDownState,
+    {
+        # In case the job is retried by HTCondor, resources can transition to
+        # BootingState again. In this case the job should be removed.
+        ResourceStatus.Booting: CleanupState,
+        ResourceStatus.Running: ShuttingDownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+)
+
+ShuttingDownState.transition = compile_transition_table(
+    ShuttingDownState,
+    {
+        # In case the job is retried by HTCondor, resources can transition to
+        # BootingState again. In this case the job should be removed.
+        ResourceStatus.Booting: CleanupState,
+        ResourceStatus.Running: ShuttingDownState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+)
+
+CleanupState.transition = compile_transition_table(
+    CleanupState,
+    {
+        ResourceStatus.Booting: CleanupState,
+        ResourceStatus.Running: DrainState,
+        ResourceStatus.Stopped: CleanupState,
+        ResourceStatus.Deleted: DownState,
+        ResourceStatus.Error: CleanupState,
+    },
+    ResourceStatus,
+)
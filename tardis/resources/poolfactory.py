@@ -1,11 +1,14 @@
 from typing import Iterable, Optional
 
+from tardis.interfaces.instrumentationsink import InstrumentationSink
 from tardis.interfaces.plugin import Plugin
 from tardis.interfaces.state import State
 from ..agents.batchsystemagent import BatchSystemAgent
 from ..agents.siteagent import SiteAgent
 from ..configuration.configuration import Configuration
 from ..resources.drone import Drone
+from ..utilities.instrumentation import Instrumentation
+from ..utilities.plugindispatcher import PluginDispatcher
 from ..utilities.utils import load_states
 
 from cobald.composite.weighted import WeightedComposite
@@ -33,6 +36,7 @@ def create_composite_pool(configuration: str = None) -> WeightedComposite:
     batch_system_agent = BatchSystemAgent(batch_system_adapter=batch_system_adapter())
 
     plugins = load_plugins()
+    enable_instrumentation(plugins)
 
     for site in configuration.Sites:
         site_composites = []
@@ -114,6 +118,18 @@ def get_drones_to_restore(plugins: dict, site, machine_type: str):
         )
 
 
+def enable_instrumentation(plugins: dict):
+    """Enable the instrumentation if configured, plugins act as its sinks"""
+    instrumentation = Instrumentation.from_configuration()
+    if instrumentation is None:
+        return
+    for plugin in plugins.values():
+        if isinstance(plugin, PluginDispatcher):
+            plugin = plugin.plugin
+        if isinstance(plugin, InstrumentationSink):
+            instrumentation.add_sink(plugin)
+
+
 def load_plugins():
     """Load plugins specified in configuration"""
     try:
@@ -123,9 +139,13 @@ def load_plugins():
     else:
 
         def create_instance(plugin):
-            return getattr(
+            instance = getattr(
                 import_module(name=f"tardis.plugins.{plugin.lower()}"), f"{plugin}"
             )()
+            dispatch = getattr(plugin_configuration[plugin] or {}, "dispatch", None)
+            if dispatch is None:
+                return instance
+            return PluginDispatcher(instance, **dispatch)
 
         return {
             plugin: create_instance(plugin) for plugin in plugin_configuration.keys()
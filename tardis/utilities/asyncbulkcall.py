@@ -1,11 +1,15 @@
 from typing import TypeVar, Generic, Iterable, List, Tuple, Optional, Set
+from typing import Callable, Dict, Hashable
 from typing_extensions import Protocol
 import asyncio
+import itertools
 import time
 import sys
 
 from backports.cached_property import cached_property
 
+from .histogram import Histogram
+
 
 T = TypeVar("T")
 R = TypeVar("R")
@@ -25,6 +29,37 @@ class BulkCommand(Protocol[T, R]):
         ...
 
 
+class BulkCallStats(object):
+    """
+    Statistics of the bulks executed by an :py:class:`~.AsyncBulkCall`
+
+    :param size: maximum number of tasks per bulk
+    """
+
+    __slots__ = (
+        "bulk_size",
+        "queue_wait",
+        "command_duration",
+        "retries",
+        "isolated_failures",
+    )
+
+    def __init__(self, size: int):
+        #: number of tasks per bulk, in buckets of powers of two
+        self.bulk_size = Histogram(
+            tuple(2**exponent for exponent in range(size.bit_length()))
+            + (float("inf"),)
+        )
+        #: time in seconds tasks waited before the execution of their bulk
+        self.queue_wait = Histogram()
+        #: duration in seconds of each execution of the command
+        self.command_duration = Histogram()
+        #: number of parts of failed bulks executed again
+        self.retries = 0
+        #: number of tasks failing on their own after bisecting their bulk
+        self.isolated_failures = 0
+
+
 class AsyncBulkCall(Generic[T, R]):
     """
     Framework for queueing and executing several tasks via bulk commands
@@ -33,6 +68,10 @@ class AsyncBulkCall(Generic[T, R]):
     :param size: maximum number of tasks to execute in one bulk
     :param delay: maximum time window for tasks to execute in one bulk
     :param concurrent: how often the `command` may be executed at the same time
+    :param adaptive: whether to execute bulks early based on the observed load
+    :param key: callable deriving a key of tasks to deduplicate them by
+    :param retry_delay: initial delay in seconds before retrying parts of a failed
+        bulk, or :py:data:`None` to fail all tasks of a failed bulk
 
     Given some bulk-task callable ``(T, ...) -> (R, ...)`` (the ``command``),
     :py:class:`~.BulkExecution` represents a single-task callable ``(T) -> R``.
@@ -54,6 +93,28 @@ class AsyncBulkCall(Generic[T, R]):
     Possible values for ``concurrent`` are :py:data:`None` for unlimited concurrency
     or an integer above 0 to set a precise concurrency limit.
 
+    If ``adaptive`` is set, tasks are only queued for as long as waiting pays off:
+    the queueing time is limited by the typical duration of the ``command`` as
+    well, and a bulk is executed right away once the next task is not expected
+    to arrive within that time, judged by the typical interval between tasks.
+    An idle :py:class:`~.BulkExecution` thus executes single tasks without delay,
+    while a busy one still collects full bulks: tasks already queued are always
+    taken up to ``size``, even once the queueing time has passed. Statistics of
+    the bulks are available via :py:attr:`~.stats` in either case.
+
+    Tasks may be queued with a ``priority``, executing tasks with a lower value
+    first and tasks of the same priority in the order they were queued.
+    If a ``key`` callable is given, tasks of the same key are only executed once
+    while one of them is queued or executed; all callers share its result.
+    A task is removed from the queue once all its callers are cancelled.
+
+    By default, a ``command`` failing with an :py:class:`Exception` fails all tasks
+    of its bulk. If a ``retry_delay`` is given, a failed bulk is instead split into
+    halves which are executed again concurrently after the delay, doubling the
+    delay for each further split. This isolates tasks failing on their own while
+    the other tasks of the bulk succeed eventually. Since the ``command`` did run,
+    a bulk whose results do not match its tasks fails without being retried.
+
     .. note::
 
         If the ``command`` requires additional arguments,
@@ -67,28 +128,56 @@ class AsyncBulkCall(Generic[T, R]):
         size: int,
         delay: float,
         concurrent: Optional[int] = None,
+        adaptive: bool = False,
+        key: Optional[Callable[[T], Hashable]] = None,
+        retry_delay: Optional[float] = None,
     ):
         self._command = command
         self._size = size
         self._delay = delay
         self._concurrency = sys.maxsize if concurrent is None else concurrent
+        self._adaptive = adaptive
+        self._key = key
+        self._retry_delay = retry_delay
+        # queued or executing results and the number of their callers, by key
+        self._in_flight: Dict[Hashable, "asyncio.Future[R]"] = {}
+        self._callers: Dict[Hashable, int] = {}
+        # order of tasks of the same priority
+        self._sequence = itertools.count()
+        # moving averages of the interval between tasks and the command duration
+        self._last_arrival: Optional[float] = None
+        self._arrival_interval: Optional[float] = None
+        self._command_duration: Optional[float] = None
         # task handling dispatch from queue to command execution
         self._dispatch_task: Optional[asyncio.Task] = None
         # tasks handling individual command executions
         self._bulk_tasks: Set[asyncio.Task] = set()
         self._verify_settings()
+        self._stats = BulkCallStats(self._size)
 
     @cached_property
     def _concurrent(self) -> "asyncio.BoundedSemaphore":
         """synchronized counter for active commands"""
         return asyncio.BoundedSemaphore(value=self._concurrency)
 
+    @property
+    def stats(self) -> BulkCallStats:
+        """Statistics of the bulks executed so far"""
+        return self._stats
+
     @cached_property
-    def _queue(self) -> "asyncio.Queue[Tuple[T, asyncio.Future[R]]]":
-        """queue of outstanding tasks"""
-        return asyncio.Queue()
+    def _queue(
+        self,
+    ) -> "asyncio.PriorityQueue[Tuple[int, int, T, asyncio.Future[R], float]]":
+        """queue of outstanding tasks by priority and order"""
+        return asyncio.PriorityQueue()
 
     def _verify_settings(self):
+        if self._retry_delay is not None and self._retry_delay < 0:
+            raise ValueError(
+                "'retry_delay' must be None or a number of at least 0"
+                f", got {self._retry_delay!r} instead"
+            )
         if not isinstance(self._size, int) or self._size <= 0:
             raise ValueError(f"expected 'size' > 0, got {self._size!r} instead")
         if self._delay <= 0:
@@ -99,15 +188,53 @@ class AsyncBulkCall(Generic[T, R]):
                 f", got {self._concurrency!r} instead"
             )
 
-    async def __call__(self, __task: T) -> R:
+    async def __call__(self, __task: T, priority: int = 0) -> R:
         """Queue a ``task`` for bulk execution and return the result when available"""
+        key = None if self._key is None else self._key(__task)
+        if key is None:
+            return await self._queue_task(__task, priority)
+        result = self._in_flight.get(key)
+        # a finished result is released right away, its done callback is deferred
+        if result is not None and result.done():
+            self._release(key, result)
+            result = None
+        if result is None:
+            result = self._queue_task(__task, priority)
+            self._in_flight[key] = result
+            self._callers[key] = 0
+            result.add_done_callback(lambda _: self._release(key, result))
+        self._callers[key] += 1
+        try:
+            return await asyncio.shield(result)
+        except asyncio.CancelledError:
+            # only give up the task if no other caller is waiting for it
+            if not result.done():
+                self._callers[key] -= 1
+                if not self._callers[key]:
+                    result.cancel()
+                    self._release(key, result)
+            raise
+
+    def _queue_task(self, task: T, priority: int) -> "asyncio.Future[R]":
+        """Queue a ``task`` for bulk execution and return its future result"""
         result: "asyncio.Future[R]" = asyncio.get_event_loop().create_future()
+        now = time.monotonic()
+        if self._last_arrival is not None:
+            self._arrival_interval = _moving_average(
+                self._arrival_interval, now - self._last_arrival
+            )
+        self._last_arrival = now
         # queue item first so that the dispatch task does not finish before
-        self._queue.put_nowait((__task, result))
+        self._queue.put_nowait((priority, next(self._sequence), task, result, now))
         # ensure there is a worker to dispatch items for command execution
         if self._dispatch_task is None:
             self._dispatch_task = asyncio.ensure_future(self._bulk_dispatch())
-        return await result
+        return result
+
+    def _release(self, key: Hashable, result: "asyncio.Future[R]") -> None:
+        """Stop sharing ``result`` for tasks of ``key``, unless already replaced"""
+        if self._in_flight.get(key) is result:
+            del self._in_flight[key], self._callers[key]
 
     async def _bulk_dispatch(self):
         """Collect tasks into bulks and dispatch them for command execution"""
@@ -115,12 +242,14 @@ class AsyncBulkCall(Generic[T, R]):
             bulk = list(zip(*(await self._get_bulk())))
             if not bulk:
                 continue
-            tasks, futures = bulk
+            tasks, futures, queued = bulk
             # limit concurrent bulk execution
             # We must make sure *here* that a new bulk can be launched, but
             # we must release the claim *in the task* when it is done.
             await self._concurrent.acquire()
-            task = asyncio.ensure_future(self._bulk_execute(tuple(tasks), futures))
+            task = asyncio.ensure_future(
+                self._bulk_execute(tuple(tasks), futures, queued)
+            )
             task.add_done_callback(lambda _: self._concurrent.release)
             # track tasks via strong references to avoid them being garbage collected.
             # see bpo#44665
@@ -131,17 +260,33 @@ class AsyncBulkCall(Generic[T, R]):
             await asyncio.sleep(0)
         self._dispatch_task = None
 
-    async def _get_bulk(self) -> "List[Tuple[T, asyncio.Future[R]]]":
+    async def _get_bulk(self) -> "List[Tuple[T, asyncio.Future[R], float]]":
         """Fetch the next bulk from the internal queue"""
         max_items, queue = self._size, self._queue
         # always pull in at least one item asynchronously
         # this avoids stalling for very low delays and efficiently waits for items
         results = [await queue.get()]
         queue.task_done()
-        deadline = time.monotonic() + self._delay
-        while len(results) < max_items and time.monotonic() < deadline:
+        delay, arrival_interval, drain = self._delay, None, False
+        if self._adaptive:
+            arrival_interval = self._arrival_interval
+            if self._command_duration is not None:
+                delay = min(delay, self._command_duration)
+            # the shortened delay only limits waiting for tasks, not taking queued
+            # ones, so that a fast command does not split a full queue into crumbs
+            drain = True
+        deadline = time.monotonic() + delay
+        while len(results) < max_items and (
+            time.monotonic() < deadline or (drain and not queue.empty())
+        ):
             try:
                 if queue.empty():
+                    # do not wait for a task that is not expected in time
+                    if (
+                        arrival_interval is not None
+                        and time.monotonic() + arrival_interval > deadline
+                    ):
+                        break
                     item = await asyncio.wait_for(
                         queue.get(), deadline - time.monotonic()
                     )
@@ -152,14 +297,52 @@ class AsyncBulkCall(Generic[T, R]):
             else:
                 results.append(item)
                 queue.task_done()
-        return results
+        # tasks of cancelled callers are dropped from the bulk
+        return [
+            (task, result, queued)
+            for _, _, task, result, queued in results
+            if not result.cancelled()
+        ]
 
     async def _bulk_execute(
-        self, tasks: Tuple[T, ...], futures: "List[asyncio.Future[R]]"
+        self,
+        tasks: Tuple[T, ...],
+        futures: "List[asyncio.Future[R]]",
+        queued: Tuple[float, ...],
     ) -> None:
         """Execute several ``tasks`` in bulk and set their ``futures``' result"""
+        start = time.monotonic()
+        for queued_time in queued:
+            self._stats.queue_wait.observe(start - queued_time)
+        await self._execute(tasks, futures)
+
+    async def _execute(
+        self,
+        tasks: Tuple[T, ...],
+        futures: "List[asyncio.Future[R]]",
+        retry_delay: Optional[float] = None,
+    ) -> None:
+        """Execute ``tasks`` once, bisecting them if the command fails and enabled"""
+        self._stats.bulk_size.observe(len(tasks))
+        start = time.monotonic()
+        try:
+            try:
+                results = await self._command(*tasks)
+            finally:
+                duration = time.monotonic() - start
+                self._stats.command_duration.observe(duration)
+                self._command_duration = _moving_average(
+                    self._command_duration, duration
+                )
+        except Exception as task_exception:
+            if self._retry_delay is not None and len(tasks) > 1:
+                await self._bisect(tasks, futures, retry_delay)
+                return
+            if retry_delay is not None:
+                self._stats.isolated_failures += 1
+            _set_exception(futures, task_exception)
+            return
         try:
-            results = await self._command(*tasks)
             # make sure we can cleanly match input to output
             results = [None] * len(futures) if results is None else list(results)
             if len(results) != len(futures):
@@ -168,8 +351,43 @@ class AsyncBulkCall(Generic[T, R]):
                     f", expected {len(futures)} results or 'None'"
                 )
         except Exception as task_exception:
-            for future in futures:
-                future.set_exception(task_exception)
+            # the command did run, so its tasks are not executed again
+            _set_exception(futures, task_exception)
         else:
             for future, result in zip(futures, results):
-                future.set_result(result)
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def _bisect(
+        self,
+        tasks: Tuple[T, ...],
+        futures: "List[asyncio.Future[R]]",
+        retry_delay: Optional[float],
+    ) -> None:
+        """Execute both halves of failed ``tasks`` again after a delay"""
+        retry_delay = self._retry_delay if retry_delay is None else retry_delay * 2
+        await asyncio.sleep(retry_delay)
+        half = len(tasks) // 2
+        parts = []
+        for part in (slice(None, half), slice(half, None)):
+            # tasks of callers cancelled meanwhile are not retried
+            part_tasks, part_futures = tasks[part], futures[part]
+            if all(future.cancelled() for future in part_futures):
+                continue
+            self._stats.retries += 1
+            parts.append(self._execute(part_tasks, part_futures, retry_delay))
+        await asyncio.gather(*parts)
+
+
+def _set_exception(futures: "List[asyncio.Future[R]]", exception: Exception):
+    """Fail all ``futures`` that are not cancelled with ``exception``"""
+    for future in futures:
+        if not future.cancelled():
+            future.set_exception(exception)
+
+
+def _moving_average(average: Optional[float], value: float) -> float:
+    """Exponentially weighted moving average of ``value``"""
+    if average is None:
+        return value
+    return average + (value - average) * 0.2
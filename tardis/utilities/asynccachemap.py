@@ -1,22 +1,149 @@
 from ..exceptions.executorexceptions import CommandExecutionFailure
+from .instrumentation import CACHE_REFRESH_DURATION, CACHE_STALENESS
+from .instrumentation import Instrumentation
 from collections.abc import Mapping
 from datetime import datetime
 from datetime import timedelta
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Set
+from weakref import WeakValueDictionary
 
 import asyncio
 import logging
 import json
+import random
 
 logger = logging.getLogger("cobald.runtime.tardis.utilities.asynccachemap")
 
 
+class CacheMapDiff(NamedTuple):
+    """Difference between two consecutive contents of an :py:class:`AsyncCacheMap`"""
+
+    #: entries not present before the update
+    added: Dict[Hashable, Any]
+    #: entries not present anymore after the update, with their former values
+    removed: Dict[Hashable, Any]
+    #: entries with a different value after the update, with their new values
+    changed: Dict[Hashable, Any]
+
+    @classmethod
+    def between(cls, old: Dict, new: Dict) -> "CacheMapDiff":
+        return cls(
+            added={key: value for key, value in new.items() if key not in old},
+            removed={key: value for key, value in old.items() if key not in new},
+            changed={
+                key: value
+                for key, value in new.items()
+                if key in old and old[key] != value
+            },
+        )
+
+    @property
+    def affected_keys(self) -> Set[Hashable]:
+        """All keys added, removed or changed"""
+        return self.added.keys() | self.removed.keys() | self.changed.keys()
+
+
 class AsyncCacheMap(Mapping):
-    def __init__(self, update_coroutine, max_age: int = 60 * 15):
+    """
+    Read-only mapping of data provided by an ``update_coroutine``, refreshed
+    via :py:meth:`~.update_status` once it is older than ``max_age`` seconds
+
+    :param update_coroutine: coroutine function providing the data
+    :param max_age: maximum age of the data in seconds
+    :param max_stale_age: maximum age in seconds of data served while it is
+        refreshed in the background, :py:data:`None` to refresh inline
+    :param refresh_jitter: fraction of ``max_age`` by which background refreshes
+        are randomly advanced
+    :param name: name of the map to label its metrics with
+
+    By default, the first reader finding the data older than ``max_age`` runs
+    the update while all other readers wait for it. If ``max_stale_age`` is set,
+    a background task refreshes the data shortly before ``max_age`` expires,
+    randomly advanced by up to ``refresh_jitter`` to spread the refreshes of
+    several maps. Readers do not wait but get the last good data, unless it is
+    older than ``max_stale_age``, for example if refreshes keep failing. The
+    background task ends if the map has not been read for ``max_stale_age``
+    seconds and is started again by the next reader.
+
+    If the :py:class:`~tardis.utilities.instrumentation.Instrumentation` is
+    enabled, the duration of updates and the staleness of the data served to
+    readers are recorded.
+
+    After each update changing the data, a :py:class:`CacheMapDiff` is passed to
+    all callbacks registered via :py:meth:`~.subscribe`. Callbacks registered via
+    :py:meth:`~.watch` are called if the entry of their key has been added,
+    removed or changed. Callbacks are called synchronously and should only
+    schedule further work.
+    """
+
+    #: maps shared by all users of the same key, see :py:meth:`~.shared`
+    _shared: "WeakValueDictionary[Hashable, AsyncCacheMap]" = WeakValueDictionary()
+
+    def __init__(
+        self,
+        update_coroutine,
+        max_age: int = 60 * 15,
+        max_stale_age: Optional[float] = None,
+        refresh_jitter: float = 0.1,
+        name: str = "",
+    ):
+        if max_stale_age is not None and max_stale_age < max_age:
+            raise ValueError(
+                "'max_stale_age' must be None or at least 'max_age'"
+                f", got {max_stale_age!r} instead"
+            )
+        if not 0 <= refresh_jitter < 1:
+            raise ValueError(
+                "'refresh_jitter' must be a number from 0 to below 1"
+                f", got {refresh_jitter!r} instead"
+            )
         self._update_coroutine = update_coroutine
         self._max_age = max_age
+        self._max_stale_age = max_stale_age
+        self._refresh_jitter = refresh_jitter
+        self._name = name
         self._last_update = datetime.fromtimestamp(0)
+        # start of the last update, whether it succeeded or not
+        self._last_attempt = self._last_update
+        self._last_read = self._last_update
         self._data = {}
         self._lock = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._subscribers: List[Callable[[CacheMapDiff], None]] = []
+        self._watchers: Dict[Hashable, List[Callable[[], None]]] = {}
+
+    @classmethod
+    def shared(
+        cls,
+        key: Hashable,
+        update_coroutine,
+        max_age: int = 60 * 15,
+        max_stale_age: Optional[float] = None,
+        refresh_jitter: float = 0.1,
+        name: str = "",
+    ) -> "AsyncCacheMap":
+        """
+        Get the map shared by all users of the same ``key``, e.g. the executor
+        and query providing the data, or create it from the parameters if needed
+
+        Users of the same ``key`` but a different ``max_age``, ``max_stale_age``
+        or ``refresh_jitter`` get separate maps. A shared map is kept while it is
+        used and takes its ``update_coroutine`` and ``name`` from the user
+        creating it.
+        """
+        shared_key = (key, max_age, max_stale_age, refresh_jitter)
+        try:
+            return cls._shared[shared_key]
+        except KeyError:
+            cache_map = cls._shared[shared_key] = cls(
+                update_coroutine,
+                max_age=max_age,
+                max_stale_age=max_stale_age,
+                refresh_jitter=refresh_jitter,
+                name=name,
+            )
+            return cache_map
 
     @property
     def _async_lock(self):
@@ -28,15 +155,48 @@ class AsyncCacheMap(Mapping):
 
     @property
     def last_update(self) -> datetime:
+        """
+        Start of the update providing the current data, anything created before
+        is included in the data
+        """
         return self._last_update
 
+    @property
+    def staleness(self) -> float:
+        """Age of the current data in seconds"""
+        return (datetime.now() - self._last_update).total_seconds()
+
     async def update_status(self) -> None:
         current_time = datetime.now()
+        if self._max_stale_age is None:
+            await self._update(current_time, self._max_age)
+        else:
+            self._last_read = current_time
+            if self._refresh_task is None:
+                self._refresh_task = asyncio.ensure_future(self._refresh())
+            await self._update(current_time, self._max_stale_age)
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.observe(CACHE_STALENESS, self.staleness, cache=self._name)
 
+    async def _update(self, current_time: datetime, max_age: float) -> None:
+        """Update the data unless it has been updated since ``max_age`` before"""
+        max_age = timedelta(seconds=max_age)
+        # readers of data fresh enough must not wait for a refresh in progress
+        if current_time - self._last_update <= max_age:
+            return
         async with self._async_lock:
-            if (current_time - self._last_update) > timedelta(seconds=self._max_age):
+            # the data may have been updated while waiting for the lock
+            if current_time - self._last_update > max_age:
+                update_time = self._last_attempt = datetime.now()
+                update = self._update_coroutine()
+                instrumentation = Instrumentation.active
+                if instrumentation is not None:
+                    update = instrumentation.timed(
+                        update, CACHE_REFRESH_DURATION, cache=self._name
+                    )
                 try:
-                    data = await self._update_coroutine()
+                    data = await update
                 except json.decoder.JSONDecodeError as je:
                     logger.warning(
                         f"AsyncMap update_status failed: Could not decode json {je}"
@@ -44,8 +204,64 @@ class AsyncCacheMap(Mapping):
                 except CommandExecutionFailure as cf:
                     logger.warning(f"AsyncMap update_status failed: {cf}")
                 else:
-                    self._data = data
-                    self._last_update = current_time
+                    old_data, self._data = self._data, data
+                    self._last_update = update_time
+                    self._notify(old_data, data)
+
+    async def _refresh(self) -> None:
+        """Refresh the data in the background while it is read"""
+        try:
+            while (datetime.now() - self._last_read).total_seconds() < (
+                self._max_stale_age
+            ):
+                refresh_age = self._max_age * (
+                    1 - self._refresh_jitter * random.random()
+                )
+                # due after the start of the last attempt, retrying failed refreshes
+                delay = refresh_age - (
+                    (datetime.now() - self._last_attempt).total_seconds()
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    await self._update(datetime.now(), 0)
+                except Exception as err:
+                    logger.exception(f"AsyncMap background refresh failed: {err!r}")
+        finally:
+            self._refresh_task = None
+
+    def subscribe(self, callback: Callable[[CacheMapDiff], None]) -> None:
+        """Call ``callback`` with the difference after each update changing data"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[CacheMapDiff], None]) -> None:
+        self._subscribers.remove(callback)
+
+    def watch(self, key: Hashable, callback: Callable[[], None]) -> None:
+        """Call ``callback`` after each update changing the entry of ``key``"""
+        self._watchers.setdefault(key, []).append(callback)
+
+    def unwatch(self, key: Hashable, callback: Callable[[], None]) -> None:
+        callbacks = self._watchers[key]
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._watchers[key]
+
+    def _notify(self, old_data: Dict, new_data: Dict) -> None:
+        if not self._subscribers and not self._watchers:
+            return
+        diff = CacheMapDiff.between(old_data, new_data)
+        if not (diff.added or diff.removed or diff.changed):
+            return
+        callbacks = [partial(callback, diff) for callback in self._subscribers]
+        if self._watchers:
+            for key in diff.affected_keys:
+                callbacks.extend(self._watchers.get(key, ()))
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as err:
+                logger.exception(f"AsyncMap change notification failed: {err!r}")
 
     def __iter__(self):
         return iter(self._data)
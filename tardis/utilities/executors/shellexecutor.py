@@ -11,6 +11,13 @@ class ShellExecutor(Executor):
     def __init__(self, *args, **kwargs):
         pass
 
+    # all instances run commands alike, e.g. to share the caches of their results
+    def __eq__(self, other):
+        return type(other) is ShellExecutor
+
+    def __hash__(self):
+        return hash(ShellExecutor)
+
     async def run_command(self, command, stdin_input=None):
         sub_process = await asyncio.create_subprocess_shell(
             command,
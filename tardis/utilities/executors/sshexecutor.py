@@ -1,16 +1,25 @@
-from typing import Optional
+from typing import List, Optional, Tuple
 from ...configuration.utilities import enable_yaml_load
 from ...exceptions.executorexceptions import CommandExecutionFailure
 from ...interfaces.executor import Executor
 from ..attributedict import AttributeDict
+from ..histogram import Histogram
 
 import asyncio
 import asyncssh
+import itertools
+import logging
+import random
+import shlex
+import time
+import uuid
 from asyncstdlib import (
     ExitStack as AsyncExitStack,
     contextmanager as asynccontextmanager,
 )
 
+logger = logging.getLogger("cobald.runtime.tardis.utilities.executors.sshexecutor")
+
 
 async def probe_max_session(connection: asyncssh.SSHClientConnection):
     """
@@ -31,28 +40,293 @@ async def probe_max_session(connection: asyncssh.SSHClientConnection):
     return sessions
 
 
+class RemoteShell(object):
+    """
+    Persistent remote shell running commands one after another
+
+    :param process: the remote shell process, e.g. ``/bin/sh``
+    :param timeout: seconds a command may run before the shell is failed, or
+        :py:data:`None` for no limit
+
+    Commands are written to the shell as they are requested and run in a
+    subshell each, without opening a new SSH session and without starting a
+    new login shell. Each command and its input are passed to the shell as
+    quoted strings, so that a malformed command fails by itself instead of
+    corrupting the shell. After each command, the shell frames its output by
+    writing a marker and the exit code of the command to ``stdout`` and
+    ``stderr``. Both are read concurrently, in the order of the commands.
+    """
+
+    def __init__(
+        self, process: asyncssh.SSHClientProcess, timeout: Optional[float] = None
+    ):
+        self._process = process
+        self._timeout = timeout
+        # prefix of markers that do not appear in the output of commands
+        self._marker_prefix = f"TARDIS-{uuid.uuid4().hex}"
+        self._sequence = itertools.count()
+        self._closed = False
+        # commands whose stdout and stderr have not both been read yet
+        self._load = 0
+        self._stdout_pending: "asyncio.Queue[Tuple[str, asyncio.Future]]" = (
+            asyncio.Queue()
+        )
+        self._stderr_pending: "asyncio.Queue[Tuple[str, asyncio.Future]]" = (
+            asyncio.Queue()
+        )
+        self._readers = [
+            asyncio.ensure_future(
+                self._read_responses(self._stdout_pending, self._read_stdout)
+            ),
+            asyncio.ensure_future(
+                self._read_responses(self._stderr_pending, self._read_stderr)
+            ),
+        ]
+
+    @property
+    def closed(self) -> bool:
+        """Whether the shell cannot run further commands"""
+        return self._closed
+
+    @property
+    def load(self) -> int:
+        """Number of commands queued or running in the shell"""
+        return self._load
+
+    async def run(self, command: str, stdin_input: Optional[str] = None):
+        """
+        Run a ``command`` and return its ``stdout``, ``stderr`` and exit code
+
+        The ``stdin_input`` is passed to the command exactly as given.
+        """
+        if self.closed:
+            raise ConnectionError("remote shell is closed")
+        marker = f"{self._marker_prefix}-{next(self._sequence)}"
+        if stdin_input is None:
+            invocation = f"( eval {shlex.quote(command)} ) < /dev/null"
+        else:
+            invocation = (
+                f"printf '%s' {shlex.quote(stdin_input)}"
+                f" | ( eval {shlex.quote(command)} )"
+            )
+        self._process.stdin.write(
+            f"{invocation}\n"
+            f"printf '\\n%s %d\\n' '{marker}' $?\n"
+            f"printf '\\n%s\\n' '{marker}' >&2\n"
+        )
+        loop = asyncio.get_event_loop()
+        stdout, stderr = loop.create_future(), loop.create_future()
+        self._stdout_pending.put_nowait((marker, stdout))
+        self._stderr_pending.put_nowait((marker, stderr))
+        self._load += 1
+        responses = asyncio.gather(stdout, stderr)
+        responses.add_done_callback(self._command_done)
+        # the command keeps running in the shell even if the caller is cancelled
+        (output, exit_code), error = await asyncio.shield(responses)
+        return AttributeDict(stdout=output, stderr=error, exit_code=exit_code)
+
+    def _command_done(self, responses: asyncio.Future) -> None:
+        self._load -= 1
+        # the caller may have been cancelled and not retrieve a failure
+        if not responses.cancelled():
+            responses.exception()
+
+    async def _read_responses(self, pending: asyncio.Queue, read):
+        """Complete the ``pending`` responses by what ``read`` gets for the marker"""
+        while True:
+            marker, response = await pending.get()
+            try:
+                result = await read(marker)
+            except asyncio.CancelledError:
+                self._fail(ConnectionError("remote shell is closed"), response)
+                raise
+            except Exception as err:
+                # the output cannot be matched to commands anymore
+                self._fail(err, response)
+                return
+            if not response.done():
+                response.set_result(result)
+
+    async def _read_stdout(self, marker: str) -> Tuple[str, int]:
+        stdout = self._process.stdout
+        try:
+            output = await asyncio.wait_for(
+                stdout.readuntil(f"\n{marker} "), self._timeout
+            )
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(
+                f"command did not finish within {self._timeout} s"
+            ) from None
+        return output[: -len(marker) - 2], int(await stdout.readline())
+
+    async def _read_stderr(self, marker: str) -> str:
+        error = await self._process.stderr.readuntil(f"\n{marker}\n")
+        return error[: -len(marker) - 2]
+
+    def _fail(self, exception: BaseException, *responses: asyncio.Future) -> None:
+        """Close the shell and fail the ``responses`` and all queued commands"""
+        self._closed = True
+        self._process.close()
+        for pending in (self._stdout_pending, self._stderr_pending):
+            while not pending.empty():
+                responses += (pending.get_nowait()[1],)
+        for response in responses:
+            if not response.done():
+                response.set_exception(exception)
+        for reader in self._readers:
+            reader.cancel()
+
+    def close(self) -> None:
+        """Terminate the shell, failing all queued commands"""
+        self._fail(ConnectionError("remote shell is closed"))
+
+
 @enable_yaml_load("!SSHExecutor")
 class SSHExecutor(Executor):
-    def __init__(self, **parameters):
+    """
+    Execute commands remotely via SSH
+
+    :param persistent_shells: number of persistent remote shells to run commands
+        in, or 0 to run each command in its own SSH session
+    :param command_timeout: seconds a command may run in a persistent shell before
+        the shell is replaced, or :py:data:`None` for no limit
+    :param reconnect_delay: initial delay in seconds before connecting again
+        after a failed attempt
+    :param max_reconnect_delay: maximum delay in seconds before connecting again
+    :param max_waiting: maximum number of commands waiting for the connection
+        or a session, or :py:data:`None` for no limit
+    :param parameters: parameters passed to :py:func:`asyncssh.connect`
+
+    By default, each command opens a new SSH session and starts a new login
+    shell on the remote host. With ``persistent_shells``, commands are instead
+    written to the least busy of a few long-lived
+    :py:class:`~.RemoteShell` processes, which avoids the startup for every
+    command. Each shell runs its commands one after another. A shell that
+    breaks or exceeds the ``command_timeout`` fails its queued commands and is
+    replaced by a new shell on the same connection.
+
+    If connecting fails, further attempts are delayed by ``reconnect_delay``,
+    doubling the delay after each failure up to ``max_reconnect_delay``. The
+    delays are randomised so that several clients do not reconnect in lockstep.
+    Commands fail right away while the connection is down and no attempt is due.
+    A connection closed by the remote host or by failing keepalives, see the
+    ``keepalive_interval`` parameter of :py:func:`asyncssh.connect`, is
+    re-established in the background.
+    """
+
+    def __init__(
+        self,
+        persistent_shells: int = 0,
+        command_timeout: Optional[float] = None,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 300.0,
+        max_waiting: Optional[int] = None,
+        **parameters,
+    ):
         self._parameters = parameters
+        self._persistent_shells = persistent_shells
+        self._command_timeout = command_timeout
+        self._reconnect_delay = reconnect_delay
+        self._max_reconnect_delay = max_reconnect_delay
+        self._max_waiting = max_waiting
+        # number of commands waiting for the connection or a session
+        self._waiting = 0
+        # the current delay between connection attempts, 0 while connected
+        self._backoff = 0.0
+        # time before which no connection attempt is made
+        self._retry_at = 0.0
+        # time since which the connection is down, None unless it failed
+        self._down_since: Optional[float] = None
         # the current SSH connection or None if it must be (re-)established
         self._ssh_connection: Optional[asyncssh.SSHClientConnection] = None
         # the bound on MaxSession running concurrently
         self._session_bound: Optional[asyncio.Semaphore] = None
+        self._max_session = 0
+        # persistent shells of the current SSH connection
+        self._remote_shells: List[RemoteShell] = []
+        # task re-establishing the current connection once it is closed
+        self._watcher: Optional[asyncio.Task] = None
+        self._state = "disconnected"
+        self._state_since = time.monotonic()
         self._lock = None
 
-    async def _establish_connection(self):
-        for retry in range(1, 10):
-            try:
-                return await asyncssh.connect(**self._parameters)
-            except (
-                ConnectionResetError,
-                asyncssh.DisconnectError,
-                asyncssh.ConnectionLost,
-                BrokenPipeError,
-            ):
-                await asyncio.sleep(retry * 10)
-        return await asyncssh.connect(**self._parameters)
+    # executors for the same endpoint run commands alike, e.g. to share the caches
+    # of their results, while each keeps its own connection
+    def __eq__(self, other):
+        return type(other) is SSHExecutor and other._parameters == self._parameters
+
+    def __hash__(self):
+        parameters = self._parameters
+        return hash(
+            (
+                SSHExecutor,
+                parameters.get("host"),
+                parameters.get("port"),
+                parameters.get("username"),
+            )
+        )
+
+    @property
+    def connection_state(self) -> str:
+        """State of the connection, ``connected``, ``connecting`` or ``disconnected``"""
+        return self._state
+
+    def _set_state(self, state: str) -> None:
+        """Change the :py:attr:`connection_state`, recording the time spent in it"""
+        if state == self._state:
+            return
+        # imported here since the instrumentation imports all executors
+        from ..instrumentation import SSH_CONNECTION_STATE, Instrumentation
+
+        now = time.monotonic()
+        host = str(self._parameters.get("host"))
+        instrumentation = Instrumentation.active
+        if instrumentation is not None:
+            instrumentation.observe(
+                SSH_CONNECTION_STATE,
+                now - self._state_since,
+                host=host,
+                state=self._state,
+            )
+        logger.info(f"Connection to {host} changed from {self._state} to {state}")
+        self._state, self._state_since = state, now
+
+    async def _establish_connection(self) -> asyncssh.SSHClientConnection:
+        """Connect once, delaying the next attempt if that fails"""
+        # imported here since the instrumentation imports all executors
+        from ..instrumentation import SSH_BACKOFF, SSH_DOWNTIME, Instrumentation
+
+        instrumentation = Instrumentation.active
+        host = str(self._parameters.get("host"))
+        try:
+            connection = await asyncssh.connect(**self._parameters)
+        except (OSError, asyncio.TimeoutError, asyncssh.Error) as err:
+            now = time.monotonic()
+            if self._down_since is None:
+                self._down_since = now
+            self._backoff = min(
+                self._backoff * 2 or self._reconnect_delay, self._max_reconnect_delay
+            )
+            delay = self._backoff * random.uniform(0.5, 1.0)
+            self._retry_at = now + delay
+            if instrumentation is not None:
+                instrumentation.observe(SSH_BACKOFF, delay, host=host)
+            logger.warning(
+                f"Connecting to {host} failed, retrying in {delay:.1f} s: {err!r}"
+            )
+            raise CommandExecutionFailure(
+                message=f"Could not connect via SSHExecutor: {err}",
+                exit_code=255,
+                stdout="",
+                stderr="SSH Broken Connection",
+            ) from err
+        if self._down_since is not None:
+            if instrumentation is not None:
+                downtime = time.monotonic() - self._down_since
+                instrumentation.observe(SSH_DOWNTIME, downtime, host=host)
+            self._down_since = None
+        self._backoff = 0.0
+        return connection
 
     @property
     @asynccontextmanager
@@ -64,18 +338,134 @@ class SSHExecutor(Executor):
         :py:class:`~asyncssh.SSHClientConnection`
         so that only `MaxSessions` commands run at once.
         """
-        if self._ssh_connection is None:
-            async with self.lock:
-                # check that connection has not been initialized in a different task
-                while self._ssh_connection is None:
-                    self._ssh_connection = await self._establish_connection()
-                    max_session = await probe_max_session(self._ssh_connection)
-                    self._session_bound = asyncio.Semaphore(value=max_session)
-        assert self._ssh_connection is not None
-        assert self._session_bound is not None
-        bound, session = self._session_bound, self._ssh_connection
-        async with bound:
+        async with self._waiting_slot():
+            if self._ssh_connection is None:
+                async with self.lock:
+                    await self._connect()
+            assert self._ssh_connection is not None
+            assert self._session_bound is not None
+            bound, session = self._session_bound, self._ssh_connection
+            await bound.acquire()
+        try:
             yield session
+        finally:
+            bound.release()
+
+    @asynccontextmanager
+    async def _waiting_slot(self):
+        """Wait for the connection as one of at most ``max_waiting`` commands"""
+        if self._max_waiting is not None and self._waiting >= self._max_waiting:
+            raise CommandExecutionFailure(
+                message=(
+                    f"Too many commands waiting for {self._parameters.get('host')}"
+                ),
+                exit_code=255,
+                stdout="",
+                stderr="SSH Queue Full",
+            )
+        self._waiting += 1
+        try:
+            yield
+        finally:
+            self._waiting -= 1
+
+    async def _connect(self):
+        """Establish the connection unless it exists, must hold the :py:attr:`lock`"""
+        # check that connection has not been initialized in a different task
+        if self._ssh_connection is not None:
+            return
+        retry_in = self._retry_at - time.monotonic()
+        if retry_in > 0:
+            raise CommandExecutionFailure(
+                message=(
+                    f"SSH connection to {self._parameters.get('host')} is down,"
+                    f" retrying in {retry_in:.1f} s"
+                ),
+                exit_code=255,
+                stdout="",
+                stderr="SSH Broken Connection",
+            )
+        self._set_state("connecting")
+        try:
+            connection = await self._establish_connection()
+            self._max_session = await probe_max_session(connection)
+        except BaseException:
+            self._set_state("disconnected")
+            raise
+        self._session_bound = asyncio.Semaphore(value=self._max_session)
+        self._ssh_connection = connection
+        self._set_state("connected")
+        # a watcher re-establishing the connection itself finishes right after this
+        if self._watcher is not None:
+            self._watcher.cancel()
+        self._watcher = asyncio.ensure_future(self._watch_connection(connection))
+
+    def _connection_lost(self, connection: asyncssh.SSHClientConnection):
+        """Replace ``connection`` during the next command if it is still in use"""
+        if connection is self._ssh_connection:
+            self._ssh_connection = None
+            self._down_since = time.monotonic()
+            for shell in self._remote_shells:
+                shell.close()
+            self._remote_shells = []
+            connection.close()
+            self._set_state("disconnected")
+
+    async def _watch_connection(self, connection: asyncssh.SSHClientConnection):
+        """Re-establish ``connection`` in the background once it is closed"""
+        await connection.wait_closed()
+        if connection is not self._ssh_connection:
+            return
+        logger.warning(f"Connection to {self._parameters.get('host')} was closed")
+        self._connection_lost(connection)
+        while self._ssh_connection is None:
+            await asyncio.sleep(max(self._retry_at - time.monotonic(), 0))
+            async with self.lock:
+                try:
+                    await self._connect()
+                except asyncio.CancelledError:
+                    raise
+                except CommandExecutionFailure:
+                    # the failed attempt is logged and delays the next one
+                    pass
+                except Exception as err:
+                    logger.warning(
+                        f"Reconnecting to {self._parameters.get('host')} failed:"
+                        f" {err!r}"
+                    )
+
+    async def _remote_shell(self) -> RemoteShell:
+        """Get the least busy persistent shell of the current connection"""
+        self._remote_shells = [
+            shell for shell in self._remote_shells if not shell.closed
+        ]
+        if len(self._remote_shells) < self.capacity or self._ssh_connection is None:
+            async with self._waiting_slot(), self.lock:
+                await self._connect()
+                connection = self._ssh_connection
+                try:
+                    while len(self._remote_shells) < self.capacity:
+                        process = await connection.create_process("/bin/sh")
+                        self._remote_shells.append(
+                            RemoteShell(process, timeout=self._command_timeout)
+                        )
+                except (OSError, asyncssh.Error) as err:
+                    # no shell can be started, so replace the connection itself
+                    self._connection_lost(connection)
+                    raise CommandExecutionFailure(
+                        message=f"Could not start remote shell via SSHExecutor: {err}",
+                        exit_code=255,
+                        stdout="",
+                        stderr="SSH Broken Connection",
+                    ) from err
+        return min(self._remote_shells, key=lambda shell: shell.load)
+
+    @property
+    def capacity(self) -> int:
+        """Number of commands running at once, 1 until the connection is established"""
+        if self._persistent_shells:
+            return min(self._persistent_shells, self._max_session) or 1
+        return self._max_session or 1
 
     @property
     def lock(self):
@@ -87,6 +477,8 @@ class SSHExecutor(Executor):
         return self._lock
 
     async def run_command(self, command, stdin_input=None):
+        if self._persistent_shells:
+            return await self._run_in_shell(command, stdin_input)
         async with self.bounded_connection as ssh_connection:
             try:
                 response = await ssh_connection.run(
@@ -103,8 +495,7 @@ class SSHExecutor(Executor):
             except asyncssh.ChannelOpenError as coe:
                 # clear broken connection to get it replaced
                 # by a new connection during next command
-                if ssh_connection is self._ssh_connection:
-                    self._ssh_connection = None
+                self._connection_lost(ssh_connection)
                 raise CommandExecutionFailure(
                     message=(
                         f"Could not run command {command} due to SSH failure: {coe}"
@@ -119,3 +510,296 @@ class SSHExecutor(Executor):
                     stderr=response.stderr,
                     exit_code=response.exit_status,
                 )
+
+    async def _run_in_shell(self, command, stdin_input=None):
+        remote_shell = await self._remote_shell()
+        try:
+            response = await remote_shell.run(command, stdin_input)
+        except (
+            asyncssh.Error,
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+        ) as err:
+            # replace only the broken shell during next command
+            remote_shell.close()
+            raise CommandExecutionFailure(
+                message=f"Could not run command {command} due to SSH failure: {err}",
+                exit_code=255,
+                stdout="",
+                stderr="SSH Broken Connection",
+            ) from err
+        if response.exit_code:
+            raise CommandExecutionFailure(
+                message=f"Run command {command} via SSHExecutor failed",
+                exit_code=response.exit_code,
+                stdin=stdin_input,
+                stdout=response.stdout,
+                stderr=response.stderr,
+            )
+        return response
+
+
+class SSHPoolStats(object):
+    """Statistics of the commands run by an :py:class:`~.SSHExecutorPool`"""
+
+    __slots__ = ("wait_time", "utilisation", "host_failures", "rejected")
+
+    def __init__(self):
+        #: time in seconds commands waited for a free session slot
+        self.wait_time = Histogram()
+        #: fraction of the session slots of available hosts in use per command
+        self.utilisation = Histogram(
+            tuple(step / 10 for step in range(1, 11)) + (float("inf"),)
+        )
+        #: number of commands failing due to their host or connection
+        self.host_failures = 0
+        #: number of commands rejected since no host was available
+        self.rejected = 0
+
+
+class _PooledConnection(object):
+    """Single connection of an :py:class:`~.SSHExecutorPool`"""
+
+    __slots__ = ("host", "executor", "in_flight")
+
+    def __init__(self, host: "_PoolHost", executor: SSHExecutor):
+        self.host = host
+        self.executor = executor
+        self.in_flight = 0
+
+    @property
+    def free(self) -> bool:
+        return self.in_flight < self.executor.capacity
+
+
+class _PoolHost(object):
+    """Host of an :py:class:`~.SSHExecutorPool` and the state of its circuit"""
+
+    __slots__ = ("name", "connections", "failures", "retry_at", "probing")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.connections: List[_PooledConnection] = []
+        #: number of consecutive failures
+        self.failures = 0
+        #: time to probe the host again once its circuit is open
+        self.retry_at = 0.0
+        self.probing = False
+
+
+@enable_yaml_load("!SSHExecutorPool")
+class SSHExecutorPool(Executor):
+    """
+    Execute commands remotely via a pool of SSH connections to equivalent hosts
+
+    :param hosts: equivalent hosts to connect to, by default the ``host`` of the
+        ``parameters``
+    :param connections: number of connections per host
+    :param placement: placement of commands on connections, either
+        ``"least_loaded"`` or ``"round_robin"``
+    :param failure_threshold: number of consecutive failures after which a host
+        is not used anymore
+    :param recovery_timeout: time in seconds before probing an unused host again
+    :param health_check: command probing whether an unused host works again
+    :param persistent_shells: number of persistent remote shells per connection,
+        see :py:class:`~.SSHExecutor`
+    :param parameters: parameters passed to :py:func:`asyncssh.connect`
+
+    Each connection is an :py:class:`~.SSHExecutor` bounded by the `MaxSessions`
+    of its host. Commands are placed on a connection with a free session slot,
+    either the least loaded one or the next one in turn; while all connections
+    are busy, commands wait for the first slot to become free.
+
+    A failure of the connection, as opposed to a failure of the command, counts
+    against its host. Once ``failure_threshold`` failures happen in a row, the
+    circuit of the host opens and commands are placed on other hosts only. After
+    ``recovery_timeout`` seconds, the ``health_check`` command is run on the host
+    to close its circuit again. Commands fail right away while all circuits are
+    open and no host is about to be probed. Statistics of the pool are available
+    via :py:attr:`~.stats`.
+    """
+
+    def __init__(
+        self,
+        hosts: Optional[List[str]] = None,
+        connections: int = 1,
+        placement: str = "least_loaded",
+        failure_threshold: int = 3,
+        recovery_timeout: float = 60,
+        health_check: str = "true",
+        persistent_shells: int = 0,
+        **parameters,
+    ):
+        if connections < 1:
+            raise ValueError(
+                f"'connections' must be an integer above 0, got {connections!r} instead"
+            )
+        if placement not in ("least_loaded", "round_robin"):
+            raise ValueError(
+                "'placement' must be 'least_loaded' or 'round_robin'"
+                f", got {placement!r} instead"
+            )
+        if failure_threshold < 1:
+            raise ValueError(
+                "'failure_threshold' must be an integer above 0"
+                f", got {failure_threshold!r} instead"
+            )
+        host = parameters.pop("host", None)
+        hosts = list(hosts) if hosts is not None else [host]
+        self._parameters = parameters
+        self._placement = placement
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._health_check = health_check
+        self._hosts: List[_PoolHost] = []
+        self._connections: List[_PooledConnection] = []
+        for name in hosts:
+            host = _PoolHost(name)
+            for _ in range(connections):
+                executor = SSHExecutor(
+                    persistent_shells=persistent_shells, host=name, **parameters
+                )
+                host.connections.append(_PooledConnection(host, executor))
+            self._hosts.append(host)
+            self._connections.extend(host.connections)
+        # index of the connection to place the next command on in turn
+        self._next_connection = 0
+        self._waiters: "List[asyncio.Future[None]]" = []
+        self._stats = SSHPoolStats()
+
+    def __eq__(self, other):
+        return (
+            type(other) is SSHExecutorPool
+            and other._parameters == self._parameters
+            and [host.name for host in other._hosts]
+            == [host.name for host in self._hosts]
+        )
+
+    def __hash__(self):
+        return hash(
+            (
+                SSHExecutorPool,
+                tuple(host.name for host in self._hosts),
+                self._parameters.get("port"),
+                self._parameters.get("username"),
+            )
+        )
+
+    @property
+    def stats(self) -> SSHPoolStats:
+        """Statistics of the commands run by the pool"""
+        return self._stats
+
+    @property
+    def unavailable_hosts(self) -> List[str]:
+        """Hosts whose circuit is open"""
+        return [host.name for host in self._hosts if not self._available(host)]
+
+    @property
+    def utilisation(self) -> float:
+        """Fraction of the session slots of available hosts currently in use"""
+        in_flight = capacity = 0
+        for connection in self._connections:
+            if self._available(connection.host):
+                in_flight += connection.in_flight
+                capacity += connection.executor.capacity
+        return in_flight / capacity if capacity else 1.0
+
+    async def run_command(self, command, stdin_input=None):
+        start = time.monotonic()
+        connection = await self._acquire(command)
+        self._stats.wait_time.observe(time.monotonic() - start)
+        self._stats.utilisation.observe(self.utilisation)
+        try:
+            response = await connection.executor.run_command(command, stdin_input)
+        except CommandExecutionFailure as cef:
+            # exit code 255 signals a failure of ssh instead of the command
+            if cef.exit_code == 255:
+                self._host_failed(connection.host)
+            raise
+        except Exception:
+            self._host_failed(connection.host)
+            raise
+        else:
+            connection.host.failures = 0
+            return response
+        finally:
+            connection.in_flight -= 1
+            self._wake_waiters()
+
+    def _available(self, host: _PoolHost) -> bool:
+        return host.failures < self._failure_threshold
+
+    async def _acquire(self, command) -> _PooledConnection:
+        """Reserve a session slot of a connection, waiting until one is free"""
+        while True:
+            self._probe_hosts()
+            connection = self._place()
+            if connection is not None:
+                connection.in_flight += 1
+                return connection
+            if not any(self._available(host) or host.probing for host in self._hosts):
+                self._stats.rejected += 1
+                raise CommandExecutionFailure(
+                    message=f"Could not run command {command}: no SSH host available",
+                    exit_code=255,
+                    stdout="",
+                    stderr="SSH Broken Connection",
+                )
+            waiter = asyncio.get_event_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+
+    def _place(self) -> Optional[_PooledConnection]:
+        """Pick a connection with a free session slot, if any"""
+        candidates = [
+            connection
+            for connection in self._connections
+            if connection.free and self._available(connection.host)
+        ]
+        if not candidates:
+            return None
+        if self._placement == "least_loaded":
+            return min(
+                candidates,
+                key=lambda connection: connection.in_flight
+                / connection.executor.capacity,
+            )
+        connections = self._connections
+        for offset in range(len(connections)):
+            index = (self._next_connection + offset) % len(connections)
+            if connections[index] in candidates:
+                self._next_connection = index + 1
+                return connections[index]
+
+    def _wake_waiters(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _host_failed(self, host: _PoolHost):
+        self._stats.host_failures += 1
+        host.failures += 1
+        if host.failures == self._failure_threshold:
+            host.retry_at = time.monotonic() + self._recovery_timeout
+
+    def _probe_hosts(self):
+        """Start probing unavailable hosts that are due"""
+        now = time.monotonic()
+        for host in self._hosts:
+            if not self._available(host) and not host.probing and host.retry_at <= now:
+                host.probing = True
+                asyncio.ensure_future(self._probe_host(host))
+
+    async def _probe_host(self, host: _PoolHost):
+        try:
+            await host.connections[0].executor.run_command(self._health_check)
+        except Exception:
+            host.retry_at = time.monotonic() + self._recovery_timeout
+        else:
+            host.failures = 0
+        finally:
+            host.probing = False
+            self._wake_waiters()
@@ -0,0 +1,169 @@
+from ..configuration.configuration import Configuration
+from ..interfaces.instrumentationsink import InstrumentationSink
+from .histogram import DEFAULT_BUCKETS, Histogram
+
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+import asyncio
+import time
+
+T = TypeVar("T")
+
+STATE_DURATION = "tardis_state_duration_seconds"
+STAGE_DURATION = "tardis_pipeline_stage_duration_seconds"
+HEARTBEAT_DRIFT = "tardis_heartbeat_drift_seconds"
+LOOP_LAG = "tardis_event_loop_lag_seconds"
+CACHE_REFRESH_DURATION = "tardis_cache_refresh_duration_seconds"
+CACHE_STALENESS = "tardis_cache_staleness_seconds"
+SSH_BACKOFF = "tardis_ssh_backoff_seconds"
+SSH_DOWNTIME = "tardis_ssh_downtime_seconds"
+SSH_CONNECTION_STATE = "tardis_ssh_connection_state_seconds"
+
+#: metrics recorded by the :py:class:`~.Instrumentation` and their description
+METRICS = {
+    STATE_DURATION: "Duration of running the state of drones",
+    STAGE_DURATION: "Duration of a stage of the processing pipeline of a state",
+    HEARTBEAT_DRIFT: "Delay of drone heartbeats behind their due time",
+    LOOP_LAG: "Delay of the event loop in resuming a sleeping task",
+    CACHE_REFRESH_DURATION: "Duration of updating a cached status, e.g. condor_q",
+    CACHE_STALENESS: "Age of cached status data served to drones",
+    SSH_BACKOFF: "Delay before connecting again after a failed SSH connection",
+    SSH_DOWNTIME: "Duration of SSH connections being down until re-established",
+    SSH_CONNECTION_STATE: "Time SSH connections spent in a state before changing it",
+}
+
+
+class HistogramSink(InstrumentationSink):
+    """
+    Aggregate observations in memory, per metric and labels
+
+    :param buckets: sorted upper bounds of the buckets of all histograms
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._histograms: Dict[str, Dict[Tuple[Tuple[str, str], ...], Histogram]] = {}
+
+    def observe(self, metric: str, value: float, labels: Dict[str, str]) -> None:
+        histograms = self._histograms.setdefault(metric, {})
+        key = tuple(sorted(labels.items()))
+        try:
+            histogram = histograms[key]
+        except KeyError:
+            histogram = histograms[key] = Histogram(self._buckets)
+        histogram.observe(value)
+
+    def get(self, metric: str, **labels: str) -> Optional[Histogram]:
+        """Get the histogram of ``metric`` with exactly ``labels``, if any"""
+        return self._histograms.get(metric, {}).get(tuple(sorted(labels.items())))
+
+
+class Instrumentation(object):
+    """
+    Record the timing of drones and the event loop
+
+    :param loop_lag_interval: interval in seconds of probing the event loop lag
+
+    The instrumentation records the durations of drone states and of the stages
+    of their processing pipelines, the delay of drone heartbeats behind their
+    due time and the lag of the event loop. Observations are passed on to all
+    registered :py:class:`~tardis.interfaces.instrumentationsink.InstrumentationSink`
+    instances, such as the
+    :py:class:`~tardis.plugins.prometheusmonitoring.PrometheusMonitoring` plugin.
+
+    Instrumented code only looks up :py:attr:`~.active`, which is
+    :py:data:`None` unless the instrumentation is enabled by adding an
+    ``Instrumentation`` section to the configuration, see
+    :py:meth:`~.from_configuration`.
+    """
+
+    #: the enabled instrumentation, :py:data:`None` if disabled
+    active: Optional["Instrumentation"] = None
+
+    def __init__(self, loop_lag_interval: float = 1.0):
+        if loop_lag_interval <= 0:
+            raise ValueError(
+                "'loop_lag_interval' must be a number above 0"
+                f", got {loop_lag_interval!r} instead"
+            )
+        self._loop_lag_interval = loop_lag_interval
+        self._sinks: List[InstrumentationSink] = []
+        self._loop_lag_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_configuration(cls) -> Optional["Instrumentation"]:
+        """
+        Enable the instrumentation if an ``Instrumentation`` section is present in
+        the configuration and return it, otherwise :py:data:`None`
+        """
+        try:
+            configuration = Configuration().Instrumentation
+        except AttributeError:
+            return None
+        if cls.active is None:
+            cls(**(configuration or {})).enable()
+        return cls.active
+
+    @property
+    def sinks(self) -> List[InstrumentationSink]:
+        """The sinks receiving the observations"""
+        return self._sinks
+
+    def add_sink(self, sink: InstrumentationSink) -> None:
+        if sink not in self._sinks:
+            self._sinks.append(sink)
+
+    def remove_sink(self, sink: InstrumentationSink) -> None:
+        self._sinks.remove(sink)
+
+    def enable(self) -> None:
+        """Make this the :py:attr:`~.active` instrumentation"""
+        if Instrumentation.active is not None and Instrumentation.active is not self:
+            Instrumentation.active.disable()
+        Instrumentation.active = self
+
+    def disable(self) -> None:
+        """Stop recording any observations"""
+        if Instrumentation.active is self:
+            Instrumentation.active = None
+        if self._loop_lag_task is not None:
+            self._loop_lag_task.cancel()
+            self._loop_lag_task = None
+
+    def observe(self, metric: str, value: float, **labels: str) -> None:
+        for sink in self._sinks:
+            sink.observe(metric, value, labels)
+
+    async def timed(self, awaitable: Awaitable[T], metric: str, **labels: str) -> T:
+        """Await ``awaitable`` and observe its duration as ``metric``"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.observe(metric, time.perf_counter() - start, **labels)
+
+    def stage_timer(self, state: str, site: str) -> Callable[[Callable, float], None]:
+        """
+        Callback observing the durations of pipeline stages, see
+        :py:meth:`~tardis.utilities.pipeline.PipelineProcessor.run_pipeline`
+        """
+
+        def observe_stage(stage: Callable, duration: float) -> None:
+            self.observe(
+                STAGE_DURATION, duration, state=state, stage=stage.__name__, site=site
+            )
+
+        return observe_stage
+
+    def start_loop_lag_probe(self) -> None:
+        """Start probing the event loop lag unless it is already probed"""
+        if self._loop_lag_task is None or self._loop_lag_task.done():
+            self._loop_lag_task = asyncio.ensure_future(self._probe_loop_lag())
+
+    async def _probe_loop_lag(self):
+        loop = asyncio.get_event_loop()
+        interval = self._loop_lag_interval
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.observe(LOOP_LAG, max(loop.time() - start - interval, 0.0))
@@ -1,4 +1,8 @@
 import asyncio
+import logging
+import time
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.pipeline")
 
 
 class StopProcessing(BaseException):
@@ -10,21 +14,148 @@ class StopProcessing(BaseException):
         return self._last_result
 
 
+def bulk_stage(bulk_func):
+    """
+    Register ``bulk_func`` as variant of the decorated pipeline stage processing
+    several drones at once, see :py:meth:`PipelineProcessor.run_pipeline_bulk`
+    """
+
+    def decorator(func):
+        func.bulk = bulk_func
+        return func
+
+    return decorator
+
+
 class PipelineProcessor(object):
+    """
+    Process an input by a pipeline of stages, each receiving the result of the
+    previous one. Stages are either coroutine functions or plain functions, the
+    latter are run inline without a detour via the event loop. Any stage may
+    raise :py:class:`StopProcessing` to end processing with its ``last_result``.
+
+    The run methods accept an optional ``stage_timer``, which is called with
+    each stage and its duration in seconds after the stage finished.
+    """
+
     def __init__(self, pipeline=None):
-        self._processing_pipeline = pipeline or []
+        self._processing_pipeline = []
+        # pairs of stage and whether it has to be awaited
+        self._stages = []
+        for func in pipeline or []:
+            self.add_to_pipeline(func)
 
     def add_to_pipeline(self, func):
         if callable(func):
             self._processing_pipeline.append(func)
+            self._stages.append((func, asyncio.iscoroutinefunction(func)))
 
-    async def run_pipeline(self, pipeline_input, *args, **kwargs):
+    async def run_pipeline(self, pipeline_input, *args, stage_timer=None, **kwargs):
+        if stage_timer is not None:
+            return await self._run_pipeline_timed(
+                pipeline_input, *args, stage_timer=stage_timer, **kwargs
+            )
         try:
-            pipeline = asyncio.Future()
-            pipeline.set_result(pipeline_input)
-
-            for func_call in self._processing_pipeline:
-                pipeline = func_call(await pipeline, *args, **kwargs)
-            return await pipeline
+            for func_call, is_coroutine in self._stages:
+                if is_coroutine:
+                    pipeline_input = await func_call(pipeline_input, *args, **kwargs)
+                else:
+                    pipeline_input = func_call(pipeline_input, *args, **kwargs)
+            return pipeline_input
         except StopProcessing as ex:
             return ex.last_result
+
+    async def _run_pipeline_timed(self, pipeline_input, *args, stage_timer, **kwargs):
+        for func_call, is_coroutine in self._stages:
+            start = time.perf_counter()
+            try:
+                if is_coroutine:
+                    pipeline_input = await func_call(pipeline_input, *args, **kwargs)
+                else:
+                    pipeline_input = func_call(pipeline_input, *args, **kwargs)
+            except StopProcessing as ex:
+                return ex.last_result
+            finally:
+                stage_timer(func_call, time.perf_counter() - start)
+        return pipeline_input
+
+    async def run_pipeline_bulk(
+        self, pipeline_input, drones, stage_timer=None, **kwargs
+    ):
+        """
+        Run the pipeline for several ``drones`` at once
+
+        Stages with a variant registered via :py:func:`bulk_stage` are called
+        once with the intermediate results and drones still being processed.
+        They return one result per drone, where a :py:class:`StopProcessing`
+        instance stops the processing of the corresponding drone. All other
+        stages are called for each drone individually. The ``stage_timer`` is
+        called once per stage with the duration for all drones.
+
+        An :py:class:`Exception` raised for a drone stops its processing and is
+        returned as its result, without affecting the other drones. A bulk stage
+        failing as a whole is logged and repeated for each drone individually.
+        Cancellation and other exceptions not derived from :py:class:`Exception`
+        abort processing of all drones.
+        """
+        results = [pipeline_input] * len(drones)
+        active = list(range(len(drones)))
+        for func_call, is_coroutine in self._stages:
+            if not active:
+                break
+            start = time.perf_counter()
+            outputs = None
+            bulk_call = getattr(func_call, "bulk", None)
+            if bulk_call is not None:
+                try:
+                    outputs = await bulk_call(
+                        [results[idx] for idx in active],
+                        [drones[idx] for idx in active],
+                        **kwargs,
+                    )
+                except Exception:
+                    # isolate the drones causing the failure
+                    logger.warning(
+                        f"Bulk stage {func_call.__name__} failed for {len(active)}"
+                        " drones, repeating it for each drone",
+                        exc_info=True,
+                    )
+            if outputs is None:
+                outputs = await asyncio.gather(
+                    *(
+                        self._run_stage(
+                            func_call,
+                            is_coroutine,
+                            results[idx],
+                            drone=drones[idx],
+                            **kwargs,
+                        )
+                        for idx in active
+                    ),
+                    return_exceptions=True,
+                )
+            if stage_timer is not None:
+                stage_timer(func_call, time.perf_counter() - start)
+            still_active = []
+            for idx, output in zip(active, outputs):
+                if isinstance(output, StopProcessing):
+                    results[idx] = output.last_result
+                elif isinstance(output, Exception):
+                    results[idx] = output
+                elif isinstance(output, BaseException):
+                    # not a failure of the drone, e.g. cancellation
+                    raise output
+                else:
+                    results[idx] = output
+                    still_active.append(idx)
+            active = still_active
+        return results
+
+    @staticmethod
+    async def _run_stage(func_call, is_coroutine, pipeline_input, *args, **kwargs):
+        try:
+            if is_coroutine:
+                return await func_call(pipeline_input, *args, **kwargs)
+            return func_call(pipeline_input, *args, **kwargs)
+        except StopProcessing as ex:
+            return ex
@@ -0,0 +1,166 @@
+from ..interfaces.plugin import Plugin
+from ..interfaces.state import State
+from .attributedict import AttributeDict
+
+from backports.cached_property import cached_property
+from enum import Enum
+from typing import Dict, Optional, Tuple, Union
+
+import asyncio
+import logging
+
+logger = logging.getLogger("cobald.runtime.tardis.utilities.plugindispatcher")
+
+
+class DispatchPolicy(Enum):
+    """Behaviour of a :py:class:`~.PluginDispatcher` with a full queue"""
+
+    #: wait until the queue has room for the notification
+    block = "block"
+    #: discard the oldest queued notification
+    drop_oldest = "drop_oldest"
+    #: replace a queued notification of the same drone, otherwise wait
+    coalesce = "coalesce"
+
+
+class PluginDispatcher(Plugin):
+    """
+    Decouple the notification of a plugin from the drones via a bounded queue
+
+    :param plugin: the plugin to notify
+    :param max_queue_size: maximum number of notifications waiting for dispatch
+    :param policy: behaviour when the queue is full, see :py:class:`~.DispatchPolicy`
+
+    Notifications are queued together with a snapshot of the resource attributes
+    and delivered by a single worker task, so that a slow plugin does not stall
+    the state machine of the drones. As the worker delivers notifications in
+    order, the order of notifications per drone is kept. Plugins requiring every
+    single notification, such as the
+    :py:class:`~tardis.plugins.sqliteregistry.SqliteRegistry`, only support the
+    ``block`` policy.
+
+    Apart from :py:meth:`~.notify`, all attributes are looked up on the
+    wrapped plugin.
+    """
+
+    def __init__(
+        self,
+        plugin: Plugin,
+        max_queue_size: int = 1000,
+        policy: Union[str, DispatchPolicy] = DispatchPolicy.block,
+    ):
+        policy = DispatchPolicy(policy)
+        if max_queue_size <= 0:
+            raise ValueError(
+                "'max_queue_size' must be an integer above 0"
+                f", got {max_queue_size!r} instead"
+            )
+        if policy is not DispatchPolicy.block and plugin.requires_all_notifications:
+            raise ValueError(
+                f"{plugin.__class__.__name__} requires all notifications"
+                f" and does not support the {policy.value!r} policy"
+            )
+        self._plugin = plugin
+        self._max_queue_size = max_queue_size
+        self._policy = policy
+        # notifications waiting per drone_uuid, only used to coalesce
+        self._pending: Dict[str, Tuple[State, AttributeDict, float]] = {}
+        self._worker_task: Optional[asyncio.Task] = None
+        self._dispatched = 0
+        self._dropped = 0
+        self._coalesced = 0
+        self._latency = 0.0
+
+    @cached_property
+    def _queue(self) -> asyncio.Queue:
+        # queue is created lazily to bind it to the running event loop
+        return asyncio.Queue(maxsize=self._max_queue_size)
+
+    @property
+    def plugin(self) -> Plugin:
+        """The plugin notified by the dispatcher"""
+        return self._plugin
+
+    @property
+    def queue_length(self) -> int:
+        """Number of notifications waiting for dispatch"""
+        return self._queue.qsize()
+
+    @property
+    def latency(self) -> float:
+        """Seconds between queueing and delivery of the last notification"""
+        return self._latency
+
+    @property
+    def dispatched(self) -> int:
+        """Number of notifications delivered to the plugin"""
+        return self._dispatched
+
+    @property
+    def dropped(self) -> int:
+        """Number of notifications discarded due to a full queue"""
+        return self._dropped
+
+    @property
+    def coalesced(self) -> int:
+        """Number of notifications replaced by a later one of the same drone"""
+        return self._coalesced
+
+    def __getattr__(self, item):
+        try:
+            plugin = self.__dict__["_plugin"]
+        except KeyError:
+            raise AttributeError(item) from None
+        return getattr(plugin, item)
+
+    async def notify(self, state: State, resource_attributes: AttributeDict) -> None:
+        entry = (
+            state,
+            AttributeDict(resource_attributes),
+            asyncio.get_event_loop().time(),
+        )
+        queue = self._queue
+        if self._policy is DispatchPolicy.coalesce:
+            drone_uuid = resource_attributes.drone_uuid
+            if drone_uuid in self._pending:
+                self._coalesced += 1
+                self._pending[drone_uuid] = entry
+            else:
+                self._pending[drone_uuid] = entry
+                await queue.put(drone_uuid)
+        elif self._policy is DispatchPolicy.drop_oldest:
+            if queue.full():
+                queue.get_nowait()
+                queue.task_done()
+                self._dropped += 1
+            queue.put_nowait(entry)
+        else:
+            await queue.put(entry)
+        # the worker only runs while notifications are queued
+        if self._worker_task is None or self._worker_task.done():
+            self._worker_task = asyncio.ensure_future(self._worker())
+
+    async def flush(self) -> None:
+        """Wait until all queued notifications are delivered"""
+        await self._queue.join()
+
+    async def _worker(self):
+        loop = asyncio.get_event_loop()
+        queue = self._queue
+        while not queue.empty():
+            item = queue.get_nowait()
+            try:
+                if self._policy is DispatchPolicy.coalesce:
+                    state, resource_attributes, queued = self._pending.pop(item)
+                else:
+                    state, resource_attributes, queued = item
+                await self._plugin.notify(state, resource_attributes)
+            except Exception as err:
+                logger.exception(
+                    f"Notifying {self._plugin.__class__.__name__} failed: {err!r}"
+                )
+            else:
+                self._dispatched += 1
+                self._latency = loop.time() - queued
+            finally:
+                queue.task_done()
@@ -0,0 +1,54 @@
+from ..interfaces.state import State
+
+from enum import Enum
+from typing import Mapping, Tuple, Type, Union
+
+
+def compile_transition_table(
+    state: Type[State], table: Mapping, *dimensions: Type[Enum]
+) -> Tuple:
+    """
+    Compile a declarative transition table into nested tuples of states
+
+    The ``table`` maps the members of the first of the ``dimensions`` either to
+    the :py:class:`~tardis.interfaces.state.State` to transition to, regardless
+    of the remaining dimensions, or to a nested table for the next dimension.
+    The compiled table is indexed by ``member.value - 1`` of each dimension and
+    holds the interned state instances, so that looking up a transition does
+    not allocate any objects.
+
+    :param state: the state the table belongs to, used in error messages only
+    :param table: the declarative transition table
+    :param dimensions: the enums the table is indexed by, in order of lookup
+    :return: the compiled transition table
+    :rtype: Tuple
+    """
+    for dimension in dimensions:
+        if [member.value for member in dimension] != list(range(1, len(dimension) + 1)):
+            raise ValueError(
+                f"{dimension.__name__} values must be consecutive integers from 1"
+            )
+    return _compile(state, table, dimensions)
+
+
+def _compile(
+    state: Type[State], table: Union[Mapping, Type[State]], dimensions
+) -> Union[Tuple, State]:
+    if not dimensions:
+        if not (isinstance(table, type) and issubclass(table, State)):
+            raise TypeError(
+                f"Transition table of {state.__name__} contains {table!r}"
+                " instead of a State"
+            )
+        return table()
+    dimension, *remaining = dimensions
+    if not isinstance(table, Mapping):
+        # a state independent of the remaining dimensions
+        return tuple(_compile(state, table, remaining) for _ in dimension)
+    missing = [member for member in dimension if member not in table]
+    if missing:
+        raise ValueError(
+            f"Transition table of {state.__name__} lacks transitions for"
+            f" {', '.join(str(member) for member in missing)}"
+        )
+    return tuple(_compile(state, table[member], remaining) for member in dimension)
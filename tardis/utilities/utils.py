@@ -99,11 +99,12 @@ def machine_meta_data_translation(
 
 
 def load_states(resources):
-    import tardis.resources.dronestates
+    # importing the drone states registers them by name
+    import tardis.resources.dronestates  # noqa: F401
+    from ..interfaces.state import State
 
     for entry in resources:
-        state_class = getattr(tardis.resources.dronestates, str(entry["state"]))
-        entry["state"] = state_class()
+        entry["state"] = State.from_name(str(entry["state"]))
     return resources
 
 
@@ -142,3 +143,14 @@ def convert_to(
         return convert_to_type(value)
     except ValueError:
         return default
+
+
+def copy_exception(exception: Exception) -> Exception:
+    """Copy ``exception`` including its attributes, cause and traceback"""
+    # __new__ does not run __init__, which may require other arguments than args
+    copied = type(exception).__new__(type(exception), *exception.args)
+    copied.__dict__.update(getattr(exception, "__dict__", {}))
+    copied.__cause__ = exception.__cause__
+    copied.__context__ = exception.__context__
+    copied.__suppress_context__ = exception.__suppress_context__
+    return copied.with_traceback(exception.__traceback__)
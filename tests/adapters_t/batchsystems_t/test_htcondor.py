@@ -5,10 +5,11 @@ from tardis.adapters.batchsystems.htcondor import htcondor_status_updater
 from tardis.interfaces.batchsystemadapter import MachineStatus
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.asynccachemap import AsyncCacheMap
 
 from functools import partial
 from shlex import quote
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
 
 import logging
@@ -50,6 +51,7 @@ class TestHTCondorAdapter(TestCase):
         cls.mock_executor_patcher.stop()
 
     def setUp(self):
+        AsyncCacheMap._shared.clear()
         self.cpu_ratio = CPU_RATIO
         self.memory_ratio = MEMORY_RATIO
         self.command = (
@@ -80,11 +82,23 @@ class TestHTCondorAdapter(TestCase):
             "memory_ratio": "Real(TotalSlotMemory-Memory)/TotalSlotMemory",
         }
         self.config.BatchSystem.max_age = 10
+        self.config.BatchSystem.max_stale_age = None
+        self.config.BatchSystem.refresh_jitter = 0.1
         if options:
             self.config.BatchSystem.options = options
         else:
             self.config.BatchSystem.options = {}
 
+    def test_shared_status(self):
+        adapter = HTCondorAdapter()
+        self.assertIs(adapter._htcondor_status, self.htcondor_adapter._htcondor_status)
+
+        self.setup_config_mock(options={"pool": "other-pool.local"})
+        adapter = HTCondorAdapter()
+        self.assertIsNot(
+            adapter._htcondor_status, self.htcondor_adapter._htcondor_status
+        )
+
     def test_disintegrate_machine(self):
         self.assertIsNone(
             run_async(self.htcondor_adapter.disintegrate_machine, drone_uuid="test")
@@ -214,6 +228,32 @@ class TestHTCondorAdapter(TestCase):
         self.mock_executor.return_value.run_command.assert_called_with(self.command)
 
     @mock_executor_run_command(stdout=CONDOR_RETURN)
+    def test_get_machine_status_bulk(self):
+        self.assertEqual(
+            run_async(
+                self.htcondor_adapter.get_machine_status_bulk,
+                drone_uuids=["test", "not_exists", "test_drain", "test_drained"],
+            ),
+            [
+                MachineStatus.Available,
+                MachineStatus.NotAvailable,
+                MachineStatus.Draining,
+                MachineStatus.Drained,
+            ],
+        )
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            self.command
+        )
+
+    def test_watch_machine(self):
+        callback = MagicMock()
+        self.assertTrue(self.htcondor_adapter.watch_machine("test", callback))
+        run_async(self.htcondor_adapter.get_machine_status, drone_uuid="test")
+        callback.assert_called_once_with()
+
+        self.htcondor_adapter.unwatch_machine("test", callback)
+        self.assertEqual(self.htcondor_adapter._htcondor_status._watchers, {})
+
     def test_get_machine_status(self):
         self.assertEqual(
             run_async(self.htcondor_adapter.get_machine_status, drone_uuid="test"),
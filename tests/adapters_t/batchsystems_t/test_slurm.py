@@ -9,10 +9,11 @@ from tardis.adapters.batchsystems.slurm import slurm_status_updater
 from tardis.interfaces.batchsystemadapter import MachineStatus
 
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
+from tardis.utilities.asynccachemap import AsyncCacheMap
 
 from functools import partial
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from unittest import TestCase
 
 SINFO_RETURN = """\
@@ -48,6 +49,7 @@ class TestSlurmAdapter(TestCase):
         cls.mock_executor_patcher.stop()
 
     def setUp(self):
+        AsyncCacheMap._shared.clear()
         self.cpu_ratio = 0.5
         self.memory_ratio = 0.25
 
@@ -67,12 +69,22 @@ class TestSlurmAdapter(TestCase):
     def setup_config_mock(self, options=None):
         self.config = self.mock_config.return_value
         self.config.BatchSystem.max_age = 10
+        self.config.BatchSystem.max_stale_age = None
+        self.config.BatchSystem.refresh_jitter = 0.1
         self.config.BatchSystem.executor = self.mock_executor.return_value
         if options:
             self.config.BatchSystem.options = options
         else:
             self.config.BatchSystem.options = {}
 
+    def test_shared_status(self):
+        adapter = SlurmAdapter()
+        self.assertIs(adapter._slurm_status, self.slurm_adapter._slurm_status)
+
+        self.setup_config_mock(options={"pool": "other-pool.local"})
+        adapter = SlurmAdapter()
+        self.assertIsNot(adapter._slurm_status, self.slurm_adapter._slurm_status)
+
     def test_disintegrate_machine(self):
         self.assertIsNone(
             run_async(self.slurm_adapter.disintegrate_machine, drone_uuid="test")
@@ -158,6 +170,16 @@ class TestSlurmAdapter(TestCase):
             0.0,
         )
 
+    @mock_executor_run_command(stdout=SINFO_RETURN)
+    def test_watch_machine(self):
+        callback = MagicMock()
+        self.assertTrue(self.slurm_adapter.watch_machine("VM-1", callback))
+        run_async(self.slurm_adapter.get_machine_status, drone_uuid="VM-1")
+        callback.assert_called_once_with()
+
+        self.slurm_adapter.unwatch_machine("VM-1", callback)
+        self.assertEqual(self.slurm_adapter._slurm_status._watchers, {})
+
     @mock_executor_run_command(stdout=SINFO_RETURN)
     def test_get_machine_status(self):
         state_mapping = {
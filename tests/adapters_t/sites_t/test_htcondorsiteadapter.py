@@ -1,18 +1,23 @@
-from tardis.adapters.sites.htcondor import HTCondorAdapter
+from tardis.adapters.sites.htcondor import HTCondorAdapter, HTCondorQueueUpdater
+from tardis.adapters.sites.htcondor import DroneJDL, _submit_description
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
 from tardis.exceptions.tardisexceptions import TardisError
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.utilities.asynccachemap import AsyncCacheMap
 from tardis.utilities.attributedict import AttributeDict
-from ...utilities.utilities import mock_executor_run_command
+from ...utilities.utilities import async_return, mock_executor_run_command
 from ...utilities.utilities import run_async
 
 from datetime import datetime
 from datetime import timedelta
 from unittest import TestCase
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+import asyncio
 import logging
+import os
+import tempfile
 
 CONDOR_SUBMIT_OUTPUT = """Submitting job(s)
 ** Proc 1351043.0:
@@ -38,13 +43,23 @@ RequestDisk = 167772160
 RequestMemory = 32768
 """
 
-CONDOR_Q_OUTPUT_IDLE = "test\t1\t1351043\t0"
-CONDOR_Q_OUTPUT_RUN = "test\t2\t1351043\t0"
-CONDOR_Q_OUTPUT_REMOVING = "test\t3\t1351043\t0"
-CONDOR_Q_OUTPUT_COMPLETED = "test\t4\t1351043\t0"
-CONDOR_Q_OUTPUT_HELD = "test\t5\t1351043\t0"
-CONDOR_Q_OUTPUT_TRANSFERING_OUTPUT = "test\t6\t1351043\t0"
-CONDOR_Q_OUTPUT_SUSPENDED = "test\t7\t1351043\t0"
+CONDOR_SUBMIT_BULK_OUTPUT = """Submitting job(s)
+** Proc 1351044.0:
+ClusterId = 1351044
+ProcId = 0
+
+** Proc 1351044.1:
+ClusterId = 1351044
+ProcId = 1
+"""
+
+CONDOR_Q_OUTPUT_IDLE = "1\t1351043\t0"
+CONDOR_Q_OUTPUT_RUN = "2\t1351043\t0"
+CONDOR_Q_OUTPUT_REMOVING = "3\t1351043\t0"
+CONDOR_Q_OUTPUT_COMPLETED = "4\t1351043\t0"
+CONDOR_Q_OUTPUT_HELD = "5\t1351043\t0"
+CONDOR_Q_OUTPUT_TRANSFERING_OUTPUT = "6\t1351043\t0"
+CONDOR_Q_OUTPUT_SUSPENDED = "7\t1351043\t0"
 
 CONDOR_RM_OUTPUT = "Job 1351043.0 marked for removal"
 CONDOR_RM_FAILED_OUTPUT = "Job 1351043.0 not found"
@@ -129,7 +144,17 @@ class TestHTCondorSiteAdapter(TestCase):
         test_site_config.executor = self.mock_executor.return_value
         test_site_config.bulk_size = 100
         test_site_config.bulk_delay = 0.1
+        test_site_config.bulk_adaptive = False
+        test_site_config.bulk_retry_delay = None
         test_site_config.max_age = 10
+        test_site_config.resync_interval = None
+        test_site_config.owner = None
+        test_site_config.tag_jobs = False
+        test_site_config.batch_name = None
+        test_site_config.constraint = None
+        AsyncCacheMap._shared.clear()
+        test_site_config.max_stale_age = None
+        test_site_config.refresh_jitter = 0.1
 
         self.adapter = HTCondorAdapter(machine_type="test2large", site_name="TestSite")
 
@@ -151,6 +176,61 @@ class TestHTCondorSiteAdapter(TestCase):
             testunkownresource=AttributeDict(jdl="tests/data/submit.jdl"),
         )
 
+    def test_shared_queue(self):
+        adapter = HTCondorAdapter(machine_type="test2large_args", site_name="TestSite")
+        self.assertIs(adapter._htcondor_queue, self.adapter._htcondor_queue)
+
+        self.mock_config.return_value.TestSite.owner = "pilot"
+        adapter = HTCondorAdapter(machine_type="test2large_args", site_name="TestSite")
+        self.assertIsNot(adapter._htcondor_queue, self.adapter._htcondor_queue)
+
+    @mock_executor_run_command(stdout=CONDOR_SUBMIT_OUTPUT)
+    def test_job_tags(self):
+        test_site_config = self.mock_config.return_value.TestSite
+        test_site_config.owner = "pilot"
+        test_site_config.tag_jobs = True
+        test_site_config.batch_name = "tardis"
+        test_site_config.constraint = "RequestCpus == 8"
+        adapter = HTCondorAdapter(machine_type="test2large", site_name="TestSite")
+
+        run_async(
+            adapter.deploy_resource,
+            AttributeDict(
+                drone_uuid="test-123",
+                obs_machine_meta_data_translation_mapping=AttributeDict(
+                    Cores=1,
+                    Memory=1024,
+                    Disk=1024 * 1024,
+                ),
+            ),
+        )
+        _, kwargs = self.mock_executor.return_value.run_command.call_args
+        self.assertEqual(
+            kwargs["stdin_input"],
+            '+TardisDroneUuid = "test-123"\nbatch_name = tardis\n'
+            + CONDOR_SUBMIT_JDL_CONDOR_OBS,
+        )
+
+        self.mock_executor.return_value.run_command.return_value = async_return(
+            return_value=AttributeDict(
+                stdout=CONDOR_Q_OUTPUT_IDLE, stderr="", exit_code=0
+            )
+        )
+        run_async(
+            adapter.resource_status, AttributeDict(remote_resource_uuid="1351043.0")
+        )
+        self.mock_executor.return_value.run_command.assert_called_with(
+            "condor_q -af:t JobStatus ClusterId ProcId -constraint "
+            '\'(Owner == "pilot") && (TardisDroneUuid =!= undefined)'
+            ' && (JobBatchName == "tardis") && (RequestCpus == 8)\''
+        )
+
+        test_site_config.tag_jobs = False
+        test_site_config.batch_name = None
+        test_site_config.constraint = None
+        adapter = HTCondorAdapter(machine_type="test2large", site_name="TestSite")
+        self.assertEqual(adapter._queue_constraint(), 'Owner == "pilot"')
+
     @mock_executor_run_command(stdout=CONDOR_SUBMIT_OUTPUT)
     def test_deploy_resource_htcondor_obs(self):
         response = run_async(
@@ -234,6 +314,106 @@ class TestHTCondorSiteAdapter(TestCase):
         )
         self.mock_executor.reset()
 
+    @mock_executor_run_command(stdout=CONDOR_SUBMIT_BULK_OUTPUT)
+    def test_deploy_resource_bulk(self):
+        async def deploy_resources():
+            return await asyncio.gather(
+                *(
+                    self.adapter.deploy_resource(
+                        AttributeDict(
+                            drone_uuid=drone_uuid,
+                            obs_machine_meta_data_translation_mapping=AttributeDict(
+                                Cores=1,
+                                Memory=1024,
+                                Disk=1024 * 1024,
+                            ),
+                        )
+                    )
+                    for drone_uuid in ("test-123", "test-456")
+                )
+            )
+
+        responses = run_async(deploy_resources)
+        self.assertEqual(
+            [response.remote_resource_uuid for response in responses],
+            ["1351044.0", "1351044.1"],
+        )
+        self.mock_executor.return_value.run_command.assert_called_once()
+        _, kwargs = self.mock_executor.return_value.run_command.call_args
+        self.assertEqual(
+            kwargs["stdin_input"],
+            CONDOR_SUBMIT_JDL_CONDOR_OBS.replace(
+                "test-123", "$(tardis_drone_uuid)"
+            ).replace(
+                "queue 1", "queue tardis_drone_uuid from (\ntest-123\ntest-456\n)"
+            ),
+        )
+        self.mock_executor.return_value.run_command.reset_mock()
+
+    def test_submit_jdl(self):
+        translation_mapping = AttributeDict(Cores=1, Memory=1024, Disk=1024 * 1024)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jdl_file = os.path.join(tmp_dir, "submit.jdl")
+            with open(jdl_file, "w") as f:
+                f.write("request_cpus=${Cores}")
+            os.utime(jdl_file, ns=(0, 0))
+            self.mock_config.return_value.TestSite.MachineTypeConfiguration = (
+                AttributeDict(test2large=AttributeDict(jdl=jdl_file))
+            )
+            try:
+                submit_jdl = self.adapter._submit_jdl(translation_mapping)
+                self.assertEqual(submit_jdl, "request_cpus=8")
+                self.assertIs(
+                    self.adapter._submit_jdl(AttributeDict(translation_mapping)),
+                    submit_jdl,
+                )
+
+                # the template is only read again once it is modified
+                with open(jdl_file, "w") as f:
+                    f.write("request_memory=${Memory}")
+                os.utime(jdl_file, ns=(0, 0))
+                self.assertEqual(
+                    self.adapter._submit_jdl(translation_mapping), "request_cpus=8"
+                )
+                os.utime(jdl_file, ns=(1, 1))
+                self.assertEqual(
+                    self.adapter._submit_jdl(translation_mapping),
+                    "request_memory=32768",
+                )
+            finally:
+                self.mock_config.return_value.TestSite.MachineTypeConfiguration = (
+                    self.machine_type_configuration
+                )
+
+    def test_submit_description(self):
+        drone_jdl = "environment=TardisDroneUuid=$(tardis_drone_uuid)"
+        other_jdl = "environment=TardisDroneUuid=other"
+        submit_description, job_indices = _submit_description(
+            (
+                DroneJDL(drone_jdl, "test-1"),
+                other_jdl,
+                DroneJDL(drone_jdl, "test-2"),
+                DroneJDL(drone_jdl, "test 3"),
+            )
+        )
+        self.assertEqual(
+            submit_description,
+            "\n".join(
+                (
+                    drone_jdl,
+                    "queue tardis_drone_uuid from (",
+                    "test-1",
+                    "test-2",
+                    ")",
+                    other_jdl,
+                    "queue 1",
+                    "environment=TardisDroneUuid=test 3",
+                    "queue 1",
+                )
+            ),
+        )
+        self.assertEqual(job_indices, [0, 2, 1, 3])
+
     def test_translate_resources_raises_logs(self):
         self.adapter = HTCondorAdapter(
             machine_type="testunkownresource", site_name="TestSite"
@@ -263,6 +443,27 @@ class TestHTCondorSiteAdapter(TestCase):
     def test_site_name(self):
         self.assertEqual(self.adapter.site_name, "TestSite")
 
+    def test_background_refresh(self):
+        self.assertIsNone(self.adapter._htcondor_queue._max_stale_age)
+
+        self.mock_config.return_value.TestSite.max_stale_age = 20
+        AsyncCacheMap._shared.clear()
+        adapter = HTCondorAdapter(machine_type="test2large", site_name="TestSite")
+        self.assertEqual(adapter._htcondor_queue._max_age, 600)
+        self.assertEqual(adapter._htcondor_queue._max_stale_age, 1200)
+        self.assertEqual(adapter._htcondor_queue._name, "TestSite/condor_q")
+
+    def test_incremental_queue_update(self):
+        self.assertNotIsInstance(
+            self.adapter._htcondor_queue._update_coroutine, HTCondorQueueUpdater
+        )
+
+        self.mock_config.return_value.TestSite.resync_interval = 30
+        adapter = HTCondorAdapter(machine_type="test2large", site_name="TestSite")
+        queue_updater = adapter._htcondor_queue._update_coroutine
+        self.assertIsInstance(queue_updater, HTCondorQueueUpdater)
+        self.assertEqual(queue_updater._full_resync_interval, 1800)
+
     @mock_executor_run_command(stdout=CONDOR_Q_OUTPUT_IDLE)
     def test_resource_status_idle(self):
         response = run_async(
@@ -271,6 +472,19 @@ class TestHTCondorSiteAdapter(TestCase):
         )
         self.assertEqual(response.resource_status, ResourceStatus.Booting)
 
+    @mock_executor_run_command(stdout=CONDOR_Q_OUTPUT_IDLE)
+    def test_watch_resource(self):
+        callback = MagicMock()
+        self.assertTrue(self.adapter.watch_resource("1351043.0", callback))
+        run_async(
+            self.adapter.resource_status,
+            AttributeDict(remote_resource_uuid="1351043.0"),
+        )
+        callback.assert_called_once_with()
+
+        self.adapter.unwatch_resource("1351043.0", callback)
+        self.assertEqual(self.adapter._htcondor_queue._watchers, {})
+
     @mock_executor_run_command(stdout=CONDOR_Q_OUTPUT_RUN)
     def test_resource_status_run(self):
         response = run_async(
@@ -319,6 +533,21 @@ class TestHTCondorSiteAdapter(TestCase):
         )
         self.assertEqual(response.resource_status, ResourceStatus.Stopped)
 
+    @mock_executor_run_command(stdout=CONDOR_Q_OUTPUT_RUN)
+    def test_resource_status_bulk(self):
+        future_timestamp = datetime.now() + timedelta(minutes=1)
+        running, unknown = run_async(
+            self.adapter.resource_status_bulk,
+            [
+                AttributeDict(remote_resource_uuid="1351043.0"),
+                AttributeDict(
+                    remote_resource_uuid="1351044.0", created=future_timestamp
+                ),
+            ],
+        )
+        self.assertEqual(running.resource_status, ResourceStatus.Running)
+        self.assertIsInstance(unknown, TardisResourceStatusUpdateFailed)
+
     @mock_executor_run_command(
         stdout="",
         raise_exception=CommandExecutionFailure(
@@ -405,6 +634,28 @@ class TestHTCondorSiteAdapter(TestCase):
         )
         self.assertEqual(response.remote_resource_uuid, "1351043.0")
 
+    @mock_executor_run_command(stdout=CONDOR_RM_OUTPUT)
+    def test_terminate_resource_deduplicated(self):
+        async def terminate_resources():
+            return await asyncio.gather(
+                *(
+                    self.adapter.terminate_resource(
+                        AttributeDict(remote_resource_uuid=remote_resource_uuid)
+                    )
+                    for remote_resource_uuid in ("1351043.0", "1351043")
+                )
+            )
+
+        self.mock_executor.return_value.run_command.reset_mock()
+        responses = run_async(terminate_resources)
+        self.assertEqual(
+            [response.remote_resource_uuid for response in responses],
+            ["1351043.0", "1351043"],
+        )
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            "condor_rm 1351043.0"
+        )
+
     @mock_executor_run_command(stdout=CONDOR_RM_FAILED_OUTPUT)
     def test_terminate_resource_failed_redo(self):
         with self.assertRaises(TardisResourceStatusUpdateFailed):
@@ -443,3 +694,87 @@ class TestHTCondorSiteAdapter(TestCase):
 
         for to_raise, to_catch in matrix:
             test_exception_handling(to_raise, to_catch)
+
+
+class TestHTCondorQueueUpdater(TestCase):
+    def setUp(self):
+        self.executor = MagicMock()
+        self.queue_updater = HTCondorQueueUpdater(
+            self.executor, full_resync_interval=600
+        )
+
+    def condor_q(self, stdout, now):
+        self.executor.run_command.return_value = async_return(
+            return_value=AttributeDict(stdout=stdout, stderr="", exit_code=0)
+        )
+        with patch("tardis.adapters.sites.htcondor.time.monotonic") as monotonic:
+            monotonic.return_value = now
+            return run_async(self.queue_updater)
+
+    def test_incremental_update(self):
+        full_command = "condor_q -af:t JobStatus ClusterId ProcId EnteredCurrentStatus"
+        queue = self.condor_q(
+            "1\t1351043\t0\t1641297637\n2\t1351044\t0\t1641297640",
+            now=0,
+        )
+        self.executor.run_command.assert_called_with(full_command)
+        self.assertEqual(queue["1351043.0"]["JobStatus"], "1")
+        self.assertEqual(queue["1351044.0"]["JobStatus"], "2")
+
+        previous_queue = queue
+        queue = self.condor_q(
+            "2\t1351043\t0\t1641297700\n1\t1351045\t0\t1641297700",
+            now=60,
+        )
+        self.executor.run_command.assert_called_with(
+            f"{full_command} -constraint 'EnteredCurrentStatus >= 1641297640'"
+        )
+        self.assertEqual(
+            {job_id: job["JobStatus"] for job_id, job in queue.items()},
+            {"1351043.0": "2", "1351044.0": "2", "1351045.0": "1"},
+        )
+        # the previous queue is not modified
+        self.assertEqual(previous_queue["1351043.0"]["JobStatus"], "1")
+        self.assertNotIn("1351045.0", previous_queue)
+
+        # no changes keep the watermark
+        queue = self.condor_q("", now=120)
+        self.executor.run_command.assert_called_with(
+            f"{full_command} -constraint 'EnteredCurrentStatus >= 1641297700'"
+        )
+        self.assertEqual(len(queue), 3)
+
+        # jobs that left the queue are removed by the full resync
+        queue = self.condor_q("2\t1351045\t0\t1641297800", now=600)
+        self.executor.run_command.assert_called_with(full_command)
+        self.assertEqual(list(queue), ["1351045.0"])
+
+    def test_terminal_jobs(self):
+        full_command = "condor_q -af:t JobStatus ClusterId ProcId EnteredCurrentStatus"
+        queue = self.condor_q(
+            "2\t1351043\t0\t1641297637\n2\t1351044\t0\t1641297640"
+            "\n3\t1351045\t0\t1641297640",
+            now=0,
+        )
+        self.assertEqual(list(queue), ["1351043.0", "1351044.0"])
+
+        # jobs removed or completed between full queries leave the queue at once
+        queue = self.condor_q(
+            "3\t1351043\t0\t1641297700\n4\t1351044\t0\t1641297700", now=60
+        )
+        self.executor.run_command.assert_called_with(
+            f"{full_command} -constraint 'EnteredCurrentStatus >= 1641297640'"
+        )
+        self.assertEqual(queue, {})
+        # and do not return once they are gone from the schedd as well
+        queue = self.condor_q("", now=120)
+        self.assertEqual(queue, {})
+        self.assertEqual(self.queue_updater._watermark, 1641297700)
+
+    def test_empty_queue(self):
+        self.condor_q("", now=0)
+        self.condor_q("", now=60)
+        # without any job seen, every update queries the full queue
+        self.executor.run_command.assert_called_with(
+            "condor_q -af:t JobStatus ClusterId ProcId EnteredCurrentStatus"
+        )
@@ -5,6 +5,7 @@ from tardis.exceptions.tardisexceptions import TardisTimeout
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.interfaces.siteadapter import ResourceStatus
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.asynccachemap import AsyncCacheMap
 from tests.utilities.utilities import mock_executor_run_command
 from tests.utilities.utilities import run_async
 
@@ -81,6 +82,14 @@ ERROR:  invalid job specified (4761849)
 
 """
 
+TEST_TERMINATE_RESOURCE_BULK_RESPONSE = """
+job '4761849' cancelled
+"""
+
+TEST_TERMINATE_DEAD_RESOURCE_BULK_RESPONSE = """
+ERROR:  invalid job specified (4761850)
+"""
+
 STATE_TRANSLATIONS = [
     ("BatchHold", ResourceStatus.Stopped),
     ("Canceling", ResourceStatus.Running),
@@ -153,6 +162,7 @@ class TestMoabAdapter(TestCase):
         cls.mock_executor_patcher.stop()
 
     def setUp(self):
+        AsyncCacheMap._shared.clear()
         config = self.mock_config.return_value
         config.TestSite = MagicMock(
             spec=[
@@ -160,6 +170,8 @@ class TestMoabAdapter(TestCase):
                 "StatusUpdate",
                 "MachineTypeConfiguration",
                 "executor",
+                "bulk_size",
+                "bulk_delay",
             ]
         )
         self.test_site_config = config.TestSite
@@ -167,6 +179,8 @@ class TestMoabAdapter(TestCase):
         self.test_site_config.StatusUpdate = 10
         self.test_site_config.MachineTypeConfiguration = self.machine_type_configuration
         self.test_site_config.executor = self.mock_executor.return_value
+        self.test_site_config.bulk_size = 100
+        self.test_site_config.bulk_delay = 0.01
 
         self.moab_adapter = MoabAdapter(machine_type="test2large", site_name="TestSite")
 
@@ -281,6 +295,26 @@ class TestMoabAdapter(TestCase):
     def test_site_name(self):
         self.assertEqual(self.moab_adapter.site_name, "TestSite")
 
+    def test_shared_status(self):
+        moab_adapter = MoabAdapter(machine_type="test2large", site_name="TestSite")
+        self.assertIs(moab_adapter._moab_status, self.moab_adapter._moab_status)
+
+    @mock_executor_run_command(TEST_RESOURCE_STATUS_RESPONSE)
+    def test_watch_resource(self):
+        callback = MagicMock()
+        remote_resource_uuid = self.resource_attributes.remote_resource_uuid
+        self.assertTrue(
+            self.moab_adapter.watch_resource(remote_resource_uuid, callback)
+        )
+        run_async(
+            self.moab_adapter.resource_status,
+            resource_attributes=self.resource_attributes,
+        )
+        callback.assert_called_once_with()
+
+        self.moab_adapter.unwatch_resource(remote_resource_uuid, callback)
+        self.assertEqual(self.moab_adapter._moab_status._watchers, {})
+
     @mock_executor_run_command(TEST_RESOURCE_STATUS_RESPONSE)
     def test_resource_status(self):
         expected_resource_attributes = self.resource_attributes
@@ -399,6 +433,39 @@ class TestMoabAdapter(TestCase):
                 resource_attributes=self.resource_attributes,
             )
 
+    @mock_executor_run_command(
+        "",
+        raise_exception=CommandExecutionFailure(
+            message="Test",
+            stdout=TEST_TERMINATE_RESOURCE_BULK_RESPONSE,
+            stderr=TEST_TERMINATE_DEAD_RESOURCE_BULK_RESPONSE,
+            exit_code=1,
+        ),
+    )
+    def test_terminate_resource_bulk(self):
+        async def terminate_resources():
+            return await asyncio.gather(
+                *(
+                    self.moab_adapter.terminate_resource(
+                        AttributeDict(
+                            self.resource_attributes, remote_resource_uuid=uuid
+                        )
+                    )
+                    for uuid in (4761849, 4761850, 4761851)
+                ),
+                return_exceptions=True,
+            )
+
+        self.mock_executor.return_value.run_command.reset_mock()
+        with self.assertLogs(level=logging.WARNING):
+            cancelled, dead, failed = run_async(terminate_resources)
+        self.assertEqual(cancelled.resource_status, ResourceStatus.Stopped)
+        self.assertEqual(dead.resource_status, ResourceStatus.Stopped)
+        self.assertIsInstance(failed, TardisError)
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            "canceljob 4761849 4761850 4761851"
+        )
+
     def test_resource_status_raise(self):
         # Update interval is 10 minutes, so set last update back by 2 minutes in
         # order to execute sacct command and creation date to current date
@@ -461,9 +528,3 @@ class TestMoabAdapter(TestCase):
 
         for to_raise, to_catch in matrix:
             test_exception_handling(to_raise, to_catch)
-
-    def test_check_remote_resource_uuid(self):
-        with self.assertRaises(TardisError):
-            self.moab_adapter.check_remote_resource_uuid(
-                AttributeDict(remote_resource_uuid=1), regex=r"^(\d)$", response="2"
-            )
@@ -5,6 +5,7 @@ from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
 from tardis.interfaces.siteadapter import ResourceStatus
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.asynccachemap import AsyncCacheMap
 from ...utilities.utilities import mock_executor_run_command
 from ...utilities.utilities import run_async
 
@@ -63,6 +64,10 @@ TEST_DEPLOY_RESOURCE_RESPONSE = """
 Submitted batch job 1390065
 """
 
+TEST_DEPLOY_RESOURCE_BULK_RESPONSE = """Submitted batch job 1390065
+Batch job submission failed
+Submitted batch job 1390066"""
+
 
 class TestSlurmAdapter(TestCase):
     mock_config_patcher = None
@@ -90,6 +95,7 @@ class TestSlurmAdapter(TestCase):
         cls.mock_executor_patcher.stop()
 
     def setUp(self):
+        AsyncCacheMap._shared.clear()
         config = self.mock_config.return_value
         config.TestSite = MagicMock(
             spec=[
@@ -97,6 +103,8 @@ class TestSlurmAdapter(TestCase):
                 "StatusUpdate",
                 "MachineTypeConfiguration",
                 "executor",
+                "bulk_size",
+                "bulk_delay",
             ]
         )
         self.test_site_config = config.TestSite
@@ -104,6 +112,8 @@ class TestSlurmAdapter(TestCase):
         self.test_site_config.StatusUpdate = 10
         self.test_site_config.MachineTypeConfiguration = self.machine_type_configuration
         self.test_site_config.executor = self.mock_executor.return_value
+        self.test_site_config.bulk_size = 100
+        self.test_site_config.bulk_delay = 0.01
 
         self.slurm_adapter = SlurmAdapter(
             machine_type="test2large", site_name="TestSite"
@@ -234,6 +244,42 @@ class TestSlurmAdapter(TestCase):
             "sbatch -p normal -N 1 -n 20 -t 60 --gres=tmp:1G --mem=63488mb --export=SLURM_Walltime=60,TardisDroneCores=20,TardisDroneMemory=62000,TardisDroneDisk=100000,TardisDroneUuid=testsite-1390065 pilot.sh"  # noqa: B950
         )
 
+    @mock_executor_run_command(TEST_DEPLOY_RESOURCE_BULK_RESPONSE)
+    def test_deploy_resource_bulk(self):
+        async def deploy_resources():
+            return await asyncio.gather(
+                *(
+                    self.slurm_adapter.deploy_resource(
+                        AttributeDict(
+                            machine_type="test2large",
+                            site_name="TestSite",
+                            obs_machine_meta_data_translation_mapping=AttributeDict(
+                                Cores=1,
+                                Memory=1024,
+                                Disk=1024,
+                            ),
+                            drone_uuid=f"testsite-{idx}",
+                        )
+                    )
+                    for idx in range(3)
+                ),
+                return_exceptions=True,
+            )
+
+        self.mock_executor.return_value.run_command.reset_mock()
+        first, second, third = run_async(deploy_resources)
+        self.assertEqual(first.remote_resource_uuid, 1390065)
+        self.assertIsInstance(second, CommandExecutionFailure)
+        self.assertEqual(third.remote_resource_uuid, 1390066)
+
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            "\n".join(
+                f"sbatch -p normal -N 1 -n 20 -t 60 --mem=63488mb --export=SLURM_Walltime=60,TardisDroneCores=20,TardisDroneMemory=63488,TardisDroneDisk=102400,TardisDroneUuid=testsite-{idx} pilot.sh || echo Batch job submission failed"  # noqa: B950
+                for idx in range(3)
+            )
+        )
+        self.mock_executor.reset_mock()
+
     def test_machine_meta_data(self):
         self.assertEqual(
             self.slurm_adapter.machine_meta_data, self.machine_meta_data["test2large"]
@@ -245,6 +291,26 @@ class TestSlurmAdapter(TestCase):
     def test_site_name(self):
         self.assertEqual(self.slurm_adapter.site_name, "TestSite")
 
+    def test_shared_status(self):
+        slurm_adapter = SlurmAdapter(machine_type="test2large", site_name="TestSite")
+        self.assertIs(slurm_adapter._slurm_status, self.slurm_adapter._slurm_status)
+
+    @mock_executor_run_command(TEST_RESOURCE_STATUS_RESPONSE)
+    def test_watch_resource(self):
+        callback = MagicMock()
+        remote_resource_uuid = self.resource_attributes.remote_resource_uuid
+        self.assertTrue(
+            self.slurm_adapter.watch_resource(remote_resource_uuid, callback)
+        )
+        run_async(
+            self.slurm_adapter.resource_status,
+            resource_attributes=self.resource_attributes,
+        )
+        callback.assert_called_once_with()
+
+        self.slurm_adapter.unwatch_resource(remote_resource_uuid, callback)
+        self.assertEqual(self.slurm_adapter._slurm_status._watchers, {})
+
     @mock_executor_run_command(TEST_RESOURCE_STATUS_RESPONSE)
     def test_resource_status(self):
         expected_resource_attributes = self.resource_attributes
@@ -438,6 +504,39 @@ class TestSlurmAdapter(TestCase):
             "scancel 1390065"
         )
 
+    @mock_executor_run_command(
+        stdout="",
+        raise_exception=CommandExecutionFailure(
+            message="Failed",
+            stdout="",
+            stderr="scancel: error: Kill job error on job id 1390066: "
+            "Invalid job id specified",
+            exit_code=1,
+        ),
+    )
+    def test_terminate_resource_bulk(self):
+        async def terminate_resources():
+            return await asyncio.gather(
+                *(
+                    self.slurm_adapter.terminate_resource(
+                        AttributeDict(
+                            self.resource_attributes, remote_resource_uuid=uuid
+                        )
+                    )
+                    for uuid in (1390065, 1390066)
+                ),
+                return_exceptions=True,
+            )
+
+        self.mock_executor.return_value.run_command.reset_mock()
+        with self.assertLogs(level=logging.WARNING):
+            terminated, failed = run_async(terminate_resources)
+        self.assertEqual(terminated.resource_status, ResourceStatus.Stopped)
+        self.assertIsInstance(failed, TardisResourceStatusUpdateFailed)
+        self.mock_executor.return_value.run_command.assert_called_once_with(
+            "scancel 1390065 1390066"
+        )
+
     def test_exception_handling(self):
         def test_exception_handling(to_raise, to_catch):
             with self.assertRaises(to_catch):
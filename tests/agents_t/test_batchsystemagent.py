@@ -5,7 +5,7 @@ from tardis.interfaces.batchsystemadapter import BatchSystemAdapter
 from tardis.utilities.attributedict import AttributeDict
 
 from unittest import TestCase
-from unittest.mock import create_autospec, PropertyMock
+from unittest.mock import MagicMock, create_autospec, PropertyMock
 
 
 class TestBatchSystemAgent(TestCase):
@@ -38,6 +38,11 @@ class TestBatchSystemAgent(TestCase):
         run_async(self.batch_system_agent.get_machine_status, drone_uuid="test")
         self.batch_system_adapter.get_machine_status.assert_called_with("test")
 
+    def test_get_machine_status_bulk(self):
+        self.batch_system_adapter.get_machine_status_bulk.side_effect = async_return
+        run_async(self.batch_system_agent.get_machine_status_bulk, drone_uuids=["test"])
+        self.batch_system_adapter.get_machine_status_bulk.assert_called_with(["test"])
+
     def test_get_utilisation(self):
         self.batch_system_adapter.get_utilisation.side_effect = async_return
         run_async(self.batch_system_agent.get_utilisation, drone_uuid="test")
@@ -58,3 +63,12 @@ class TestBatchSystemAgent(TestCase):
         )
 
         machine_meta_data_translation_mock.assert_called_once_with()
+
+    def test_watch_machine(self):
+        callback = MagicMock()
+        self.batch_system_adapter.watch_machine.return_value = True
+        self.assertTrue(self.batch_system_agent.watch_machine("test", callback))
+        self.batch_system_adapter.watch_machine.assert_called_with("test", callback)
+
+        self.batch_system_agent.unwatch_machine("test", callback)
+        self.batch_system_adapter.unwatch_machine.assert_called_with("test", callback)
@@ -1,10 +1,12 @@
 from ..utilities.utilities import run_async
 from ..utilities.utilities import async_return
 from tardis.agents.siteagent import SiteAgent
+from tardis.exceptions.tardisexceptions import TardisTimeout
 from tardis.interfaces.siteadapter import SiteAdapter
+from tardis.utilities.attributedict import AttributeDict
 
 from unittest import TestCase
-from unittest.mock import create_autospec
+from unittest.mock import MagicMock, create_autospec
 from unittest.mock import PropertyMock
 
 
@@ -28,6 +30,14 @@ class TestSiteAgent(TestCase):
         self.assertEqual(self.site_agent.drone_heartbeat_interval(), 60)
         self.site_adapter.drone_heartbeat_interval.assert_called_with()
 
+    def test_drone_heartbeat_backoff(self):
+        self.site_adapter.drone_heartbeat_intervals.return_value = {}
+        self.assertEqual(self.site_agent.drone_heartbeat_intervals(), {})
+        self.site_adapter.drone_heartbeat_backoff.return_value = 2.0
+        self.assertEqual(self.site_agent.drone_heartbeat_backoff(), 2.0)
+        self.site_adapter.drone_heartbeat_max_interval.return_value = 900
+        self.assertEqual(self.site_agent.drone_heartbeat_max_interval(), 900)
+
     def test_drone_minimum_lifetime(self):
         self.site_adapter.drone_minimum_lifetime.return_value = None
         self.assertIsNone(self.site_agent.drone_minimum_lifetime())
@@ -57,6 +67,28 @@ class TestSiteAgent(TestCase):
         run_async(self.site_agent.resource_status, resource_attributes="test")
         self.site_adapter.resource_status.assert_called_with(resource_attributes="test")
 
+    def test_resource_status_bulk(self):
+        error = TardisTimeout("timeout")
+
+        async def resource_status_bulk(resource_attributes):
+            return [AttributeDict(test=1), error]
+
+        self.site_adapter.resource_status_bulk.side_effect = resource_status_bulk
+        self.assertEqual(
+            run_async(self.site_agent.resource_status_bulk, ["test1", "test2"]),
+            [AttributeDict(test=1), error],
+        )
+        self.site_adapter.resource_status_bulk.assert_called_with(["test1", "test2"])
+
+        self.site_adapter.resource_status_bulk.side_effect = TardisTimeout("all")
+        responses = run_async(self.site_agent.resource_status_bulk, ["test1", "test2"])
+        self.assertEqual(len(responses), 2)
+        for response in responses:
+            self.assertIsInstance(response, TardisTimeout)
+            self.assertEqual(str(response), "all")
+        # each drone handles an exception of its own
+        self.assertIsNot(*responses)
+
     def test_site_name(self):
         type(self.site_adapter).site_name = PropertyMock(return_value="Test123")
         self.assertEqual(self.site_agent.site_name, "Test123")
@@ -72,3 +104,12 @@ class TestSiteAgent(TestCase):
         self.site_adapter.terminate_resource.assert_called_with(
             resource_attributes="test"
         )
+
+    def test_watch_resource(self):
+        callback = MagicMock()
+        self.site_adapter.watch_resource.return_value = True
+        self.assertTrue(self.site_agent.watch_resource("test", callback))
+        self.site_adapter.watch_resource.assert_called_with("test", callback)
+
+        self.site_agent.unwatch_resource("test", callback)
+        self.site_adapter.unwatch_resource.assert_called_with("test", callback)
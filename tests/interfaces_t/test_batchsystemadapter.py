@@ -31,6 +31,10 @@ class TestBatchSystemAdapter(TestCase):
         with self.assertRaises(NotImplementedError):
             run_async(self.batch_system_adapter.get_machine_status, "test-123")
 
+    def test_get_machine_status_bulk(self):
+        with self.assertRaises(NotImplementedError):
+            run_async(self.batch_system_adapter.get_machine_status_bulk, ["test-123"])
+
     def test_get_utilisation(self):
         with self.assertRaises(NotImplementedError):
             run_async(self.batch_system_adapter.get_utilisation, "test-123")
@@ -38,3 +42,7 @@ class TestBatchSystemAdapter(TestCase):
     def test_machine_meta_data_translation_mapping(self):
         with self.assertRaises(NotImplementedError):
             self.batch_system_adapter.machine_meta_data_translation_mapping
+
+    def test_watch_machine(self):
+        self.assertFalse(self.batch_system_adapter.watch_machine("test-123", print))
+        self.assertIsNone(self.batch_system_adapter.unwatch_machine("test-123", print))
@@ -93,6 +93,36 @@ class TestSiteAdapter(TestCase):
             # noinspection PyStatementEffect
             self.site_adapter.drone_heartbeat_interval
 
+    def test_drone_heartbeat_backoff(self):
+        self.assertEqual(self.site_adapter.drone_heartbeat_intervals, {})
+        self.assertIsNone(self.site_adapter.drone_heartbeat_backoff)
+        self.assertEqual(self.site_adapter.drone_heartbeat_max_interval, 900)
+
+        # noinspection PyUnresolvedReferences
+        SiteAdapter.site_configuration.fget.cache_clear()
+
+        self.config.Sites[0]["drone_heartbeat_intervals"] = {"BootingState": 10}
+        self.config.Sites[0]["drone_heartbeat_backoff"] = 2
+        self.config.Sites[0]["drone_heartbeat_max_interval"] = 600
+        self.assertEqual(
+            self.site_adapter.drone_heartbeat_intervals, {"BootingState": 10}
+        )
+        self.assertEqual(self.site_adapter.drone_heartbeat_backoff, 2)
+        self.assertEqual(self.site_adapter.drone_heartbeat_max_interval, 600)
+
+        for option, value in (
+            ("drone_heartbeat_intervals", {"BootingState": -1}),
+            ("drone_heartbeat_backoff", 1),
+            ("drone_heartbeat_max_interval", 0),
+        ):
+            # noinspection PyUnresolvedReferences
+            SiteAdapter.site_configuration.fget.cache_clear()
+            self.config.Sites[0][option] = value
+            with self.assertRaises(ValidationError):
+                # noinspection PyStatementEffect
+                self.site_adapter.site_configuration
+            del self.config.Sites[0][option]
+
     def test_drone_minimum_lifetime(self):
         self.assertEqual(self.site_adapter.drone_minimum_lifetime, None)
 
@@ -204,6 +234,12 @@ class TestSiteAdapter(TestCase):
         with self.assertRaises(NotImplementedError):
             run_async(self.site_adapter.resource_status, dict())
 
+    def test_resource_status_bulk(self):
+        responses = run_async(self.site_adapter.resource_status_bulk, [dict(), dict()])
+        self.assertEqual(len(responses), 2)
+        for response in responses:
+            self.assertIsInstance(response, NotImplementedError)
+
     def test_site_configuration(self):
         self.assertEqual(
             self.site_adapter.site_configuration,
@@ -213,6 +249,10 @@ class TestSiteAdapter(TestCase):
                 quota=1,
                 drone_minimum_lifetime=None,
                 drone_heartbeat_interval=60,
+                drone_heartbeat_intervals={},
+                drone_heartbeat_backoff=None,
+                drone_heartbeat_max_interval=900,
+                drone_wakeup_on_change=False,
             ),
         )
 
@@ -229,6 +269,10 @@ class TestSiteAdapter(TestCase):
                 quota=inf,
                 drone_minimum_lifetime=None,
                 drone_heartbeat_interval=60,
+                drone_heartbeat_intervals={},
+                drone_heartbeat_backoff=None,
+                drone_heartbeat_max_interval=900,
+                drone_wakeup_on_change=False,
             ),
         )
 
@@ -246,6 +290,10 @@ class TestSiteAdapter(TestCase):
                     quota=inf,
                     drone_minimum_lifetime=None,
                     drone_heartbeat_interval=60,
+                    drone_heartbeat_intervals={},
+                    drone_heartbeat_backoff=None,
+                    drone_heartbeat_max_interval=900,
+                    drone_wakeup_on_change=False,
                 ),
             )
 
@@ -273,3 +321,8 @@ class TestSiteAdapter(TestCase):
     def test_terminate_resource(self):
         with self.assertRaises(NotImplementedError):
             run_async(self.site_adapter.terminate_resource, dict())
+
+    def test_watch_resource(self):
+        self.assertFalse(self.site_adapter.drone_wakeup_on_change)
+        self.assertFalse(self.site_adapter.watch_resource("test-123", print))
+        self.assertIsNone(self.site_adapter.unwatch_resource("test-123", print))
@@ -0,0 +1,36 @@
+from tardis.interfaces.state import State
+from tardis.resources.dronestates import BootingState, RequestState
+
+from unittest import TestCase
+
+
+class TestState(TestCase):
+    def test_interned_instances(self):
+        self.assertIs(RequestState(), RequestState())
+        self.assertIsNot(RequestState(), BootingState())
+        self.assertEqual(
+            {RequestState(), RequestState(), BootingState()},
+            {
+                RequestState(),
+                BootingState(),
+            },
+        )
+
+    def test_abstract_state(self):
+        with self.assertRaises(TypeError):
+            State()
+
+    def test_from_name(self):
+        self.assertIs(State.from_name("RequestState"), RequestState())
+        self.assertIs(State.from_name("BootingState"), BootingState())
+        with self.assertRaises(KeyError):
+            State.from_name("NotExistingState")
+
+    def test_str(self):
+        self.assertEqual(str(RequestState()), "RequestState")
+        self.assertEqual(repr(BootingState()), "BootingState")
+
+    def test_pipeline_processor(self):
+        pipeline_processor = BootingState._pipeline_processor()
+        self.assertIs(BootingState._pipeline_processor(), pipeline_processor)
+        self.assertIsNot(RequestState._pipeline_processor(), pipeline_processor)
@@ -2,6 +2,9 @@ from tardis.plugins.prometheusmonitoring import PrometheusMonitoring
 from tardis.resources.dronestates import RequestState
 from tardis.utilities.attributedict import AttributeDict
 from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.utilities.instrumentation import STATE_DURATION
+
+from aioprometheus import REGISTRY
 
 from datetime import datetime
 from unittest import TestCase
@@ -29,6 +32,8 @@ class TestPrometheusMonitoring(TestCase):
         self.config.Plugins.PrometheusMonitoring.addr = "127.0.0.1"
         self.config.Plugins.PrometheusMonitoring.port = get_free_port()
 
+        # metrics can only be registered once per process
+        REGISTRY.clear()
         self.plugin = PrometheusMonitoring()
 
     @patch("tardis.plugins.prometheusmonitoring.logging", Mock())
@@ -70,6 +75,16 @@ class TestPrometheusMonitoring(TestCase):
         )
         self.assert_gauges([1, 0, 0, 1, 2])
 
+    def test_observe(self):
+        labels = {"state": "RequestState", "site": "test-site"}
+        self.plugin.observe(STATE_DURATION, 0.2, labels)
+        self.plugin.observe(STATE_DURATION, 0.3, labels)
+
+        histogram = REGISTRY.get(STATE_DURATION)
+        self.assertIs(histogram, self.plugin._histograms[STATE_DURATION])
+        self.assertEqual(histogram.get(labels)["count"], 2)
+        self.assertAlmostEqual(histogram.get(labels)["sum"], 0.5)
+
     def assert_gauges(self, values):
         assert all(
             [
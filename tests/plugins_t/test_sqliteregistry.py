@@ -315,3 +315,4 @@ class TestSqliteRegistry(TestCase):
         }
 
         self.assertEqual(status, {state for state in State.get_all_states()})
+        self.assertEqual(set(self.registry._state_ids), status)
@@ -3,14 +3,23 @@ from ..utilities.utilities import async_return, run_async, set_awaitable_return_
 from tardis.interfaces.plugin import Plugin
 from tardis.interfaces.state import State
 from tardis.resources.drone import Drone
-from tardis.resources.dronestates import DrainState, DownState
+from tardis.resources.dronestates import DrainState, DownState, RequestState
 from tardis.plugins.sqliteregistry import SqliteRegistry
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.instrumentation import HistogramSink, Instrumentation
+from tardis.utilities.instrumentation import HEARTBEAT_DRIFT, STATE_DURATION
+from tardis.utilities.plugindispatcher import PluginDispatcher
 
 from logging import DEBUG
 from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
+import asyncio
+
+
+async def run_bulk_succeeded(drones):
+    return [None] * len(drones)
+
 
 class TestDrone(TestCase):
     mock_batch_system_agent_patcher = None
@@ -35,6 +44,10 @@ class TestDrone(TestCase):
         self.mock_site_agent.machine_meta_data = AttributeDict(Cores=8)
         self.mock_site_agent.drone_minimum_lifetime = None
         self.mock_site_agent.drone_heartbeat_interval = 60
+        self.mock_site_agent.drone_heartbeat_intervals = {}
+        self.mock_site_agent.drone_heartbeat_backoff = None
+        self.mock_site_agent.drone_heartbeat_max_interval = 900
+        self.mock_site_agent.drone_wakeup_on_change = False
         self.mock_plugin = MagicMock(spec=Plugin)()
         self.mock_plugin.notify.return_value = async_return()
         self.drone = Drone(
@@ -59,6 +72,12 @@ class TestDrone(TestCase):
 
         self.assertEqual(self.drone._database, sql_registry)
 
+        self.drone.remove_plugins(sql_registry)
+        self.drone.register_plugins(PluginDispatcher(sql_registry))
+        self.drone.__dict__.pop("_database")  # reset cached_property's cache
+
+        self.assertEqual(self.drone._database, sql_registry)
+
     def test_database_state(self):
         self.assertIsNone(run_async(self.drone.database_state))
 
@@ -89,6 +108,45 @@ class TestDrone(TestCase):
         self.mock_site_agent.drone_heartbeat_interval = 10
         self.assertEqual(self.drone.heartbeat_interval, 10)
 
+    def test_state_heartbeat_interval(self):
+        self.mock_site_agent.drone_heartbeat_intervals = {"RequestState": 5}
+        self.assertEqual(self.drone.heartbeat_interval, 60)
+        run_async(self.drone.set_state, RequestState())
+        self.assertEqual(self.drone.heartbeat_interval, 5)
+        run_async(self.drone.set_state, DrainState())
+        self.assertEqual(self.drone.heartbeat_interval, 60)
+
+    def test_heartbeat_backoff(self):
+        self.mock_site_agent.drone_heartbeat_intervals = {"RequestState": 100}
+        self.mock_site_agent.drone_heartbeat_backoff = 2.0
+        self.mock_site_agent.drone_heartbeat_max_interval = 300
+
+        mocked_state = MagicMock(spec=State)
+        mocked_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_state)
+
+        intervals = []
+        for _ in range(5):
+            mocked_state.run.return_value = async_return()
+            self.assertTrue(run_async(self.drone.heartbeat))
+            intervals.append(self.drone.heartbeat_interval)
+        self.assertEqual(intervals, [120, 240, 300, 300, 300])
+
+        # a state change resets the backoff
+        async def change_state(drone):
+            await drone.set_state(RequestState())
+
+        mocked_state.run.side_effect = change_state
+        self.assertTrue(run_async(self.drone.heartbeat))
+        self.assertEqual(self.drone.heartbeat_interval, 100)
+
+        # the configured interval of a state is kept above the maximum
+        self.mock_site_agent.drone_heartbeat_max_interval = 50
+        with patch.object(RequestState, "run") as run:
+            run.side_effect = async_return
+            self.assertTrue(run_async(self.drone.heartbeat))
+        self.assertEqual(self.drone.heartbeat_interval, 100)
+
     def test_life_time(self):
         self.assertIsNone(self.drone.minimum_lifetime, None)
         self.mock_site_agent.drone_minimum_lifetime = 3600
@@ -141,6 +199,148 @@ class TestDrone(TestCase):
         mocked_state.run.assert_called_once()
         mocked_down_state.run.assert_called_once()
 
+    @patch("tardis.resources.drone.DroneScheduler")
+    def test_run_scheduled(self, mocked_drone_scheduler):
+        scheduler = mocked_drone_scheduler.from_configuration.return_value
+        scheduler.schedule.return_value = async_return()
+
+        run_async(self.drone.run)
+        self.assertIsInstance(self.drone.state, RequestState)
+        scheduler.schedule.assert_called_once_with(self.drone, spread=False)
+
+        scheduler.schedule.return_value = async_return()
+        run_async(self.drone.run)
+        scheduler.schedule.assert_called_with(self.drone, spread=True)
+
+    def test_heartbeat(self):
+        mocked_state = MagicMock(spec=State)
+        mocked_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_state)
+        self.assertTrue(run_async(self.drone.heartbeat))
+        mocked_state.run.assert_called_once_with(self.drone)
+
+        mocked_down_state = MagicMock(spec=DownState)
+        mocked_down_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_down_state)
+        with self.assertLogs(level=DEBUG):
+            self.assertFalse(run_async(self.drone.heartbeat))
+        self.assertEqual(self.drone.demand, 0)
+
+    def test_bulk_heartbeat(self):
+        other_drone = Drone(
+            site_agent=self.mock_site_agent,
+            batch_system_agent=self.mock_batch_system_agent,
+        )
+        drones = [self.drone, other_drone]
+        for drone in drones:
+            run_async(drone.set_state, RequestState())
+        with patch.object(RequestState, "run_bulk") as run_bulk:
+            run_bulk.side_effect = run_bulk_succeeded
+            self.assertEqual(run_async(Drone.bulk_heartbeat, drones), [True, True])
+            run_bulk.assert_called_once_with(drones)
+
+            # failures are reported for the drones raising them only
+            error = RuntimeError("failed")
+            run_bulk.side_effect = None
+            run_bulk.return_value = [error, None]
+            self.assertEqual(run_async(Drone.bulk_heartbeat, drones), [error, True])
+
+        for drone in drones:
+            run_async(drone.set_state, DownState())
+        with patch.object(DownState, "run_bulk") as run_bulk:
+            run_bulk.side_effect = run_bulk_succeeded
+            with self.assertLogs(level=DEBUG):
+                self.assertEqual(
+                    run_async(Drone.bulk_heartbeat, drones), [False, False]
+                )
+            run_bulk.assert_called_once_with(drones)
+        self.assertEqual(self.drone.demand, 0)
+
+    def test_wakeup_on_change(self):
+        self.mock_site_agent.drone_wakeup_on_change = True
+        self.mock_site_agent.watch_resource.return_value = True
+        self.mock_batch_system_agent.watch_machine.return_value = True
+        self.mock_site_agent.watch_resource.reset_mock()
+        self.mock_site_agent.unwatch_resource.reset_mock()
+        self.mock_batch_system_agent.watch_machine.reset_mock()
+        self.mock_batch_system_agent.unwatch_machine.reset_mock()
+        drone_uuid = self.drone.resource_attributes.drone_uuid
+
+        mocked_state = MagicMock(spec=State)
+        mocked_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_state)
+        self.assertTrue(run_async(self.drone.heartbeat))
+        # resources are watched once they are known to the site
+        self.mock_site_agent.watch_resource.assert_not_called()
+        self.mock_batch_system_agent.watch_machine.assert_called_once_with(
+            drone_uuid, self.drone.wake
+        )
+
+        for remote_resource_uuid in ("1", "1", "2"):
+            self.drone.resource_attributes.remote_resource_uuid = remote_resource_uuid
+            mocked_state.run.return_value = async_return()
+            self.assertTrue(run_async(self.drone.heartbeat))
+        self.assertEqual(self.mock_site_agent.watch_resource.call_count, 2)
+        self.mock_site_agent.watch_resource.assert_called_with("2", self.drone.wake)
+        self.mock_site_agent.unwatch_resource.assert_called_once_with(
+            "1", self.drone.wake
+        )
+        self.mock_batch_system_agent.watch_machine.assert_called_once()
+
+        async def sleep():
+            sleeping = asyncio.ensure_future(self.drone._sleep(60))
+            await asyncio.sleep(0)
+            self.drone.wake()
+            await asyncio.wait_for(sleeping, 1)
+
+        run_async(sleep)
+        self.assertIsNone(self.drone._wakeup)
+
+        mocked_down_state = MagicMock(spec=DownState)
+        mocked_down_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_down_state)
+        with self.assertLogs(level=DEBUG):
+            self.assertFalse(run_async(self.drone.heartbeat))
+        self.mock_site_agent.unwatch_resource.assert_called_with("2", self.drone.wake)
+        self.mock_batch_system_agent.unwatch_machine.assert_called_once_with(
+            drone_uuid, self.drone.wake
+        )
+
+    @patch("tardis.resources.drone.asyncio.sleep")
+    def test_instrumentation(self, mocked_asyncio_sleep):
+        mocked_asyncio_sleep.side_effect = async_return
+        sink = HistogramSink()
+        instrumentation = Instrumentation()
+        instrumentation.add_sink(sink)
+        instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+        # the probe would never yield with asyncio.sleep being mocked
+        instrumentation.start_loop_lag_probe = MagicMock()
+        site_name = self.drone.resource_attributes.site_name
+
+        mocked_state = MagicMock(spec=State)
+        mocked_state.__str__.return_value = "MockedState"
+        mocked_state.run.return_value = async_return()
+        run_async(self.drone.set_state, mocked_state)
+        self.assertTrue(run_async(self.drone.heartbeat))
+        histogram = sink.get(STATE_DURATION, state="MockedState", site=site_name)
+        self.assertEqual(histogram.count, 1)
+
+        with patch.object(type(mocked_state), "run_bulk", create=True) as run_bulk:
+            run_bulk.side_effect = run_bulk_succeeded
+            run_async(Drone.bulk_heartbeat, [self.drone])
+        self.assertEqual(histogram.count, 2)
+
+        async def mocked_run(drone):
+            await drone.set_state(DownState())
+
+        mocked_state.run.side_effect = mocked_run
+        with self.assertLogs(level=DEBUG):
+            run_async(self.drone.run)
+        self.assertEqual(histogram.count, 3)
+        self.assertEqual(sink.get(HEARTBEAT_DRIFT, site=site_name).count, 1)
+        instrumentation.start_loop_lag_probe.assert_called_once()
+
     def test_register_plugins(self):
         self.assertEqual(self.drone._plugins, [])
         self.drone.register_plugins(self.mock_plugin)
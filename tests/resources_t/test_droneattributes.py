@@ -0,0 +1,123 @@
+from tardis.resources.droneattributes import DroneAttributes, MachineTypeAttributes
+from tardis.utilities.attributedict import AttributeDict
+
+from datetime import datetime
+from unittest import TestCase
+
+import copy
+
+
+class TestMachineTypeAttributes(TestCase):
+    def test_get(self):
+        mapping = AttributeDict(Cores=1)
+        shared = MachineTypeAttributes.get("TestSite", "TestMachineType", mapping)
+        self.assertIs(
+            MachineTypeAttributes.get("TestSite", "TestMachineType", mapping), shared
+        )
+        self.assertIsNot(
+            MachineTypeAttributes.get("TestSite", "OtherMachineType", mapping), shared
+        )
+        self.assertIsNot(
+            MachineTypeAttributes.get(
+                "TestSite", "TestMachineType", AttributeDict(Cores=1)
+            ),
+            shared,
+        )
+
+
+class TestDroneAttributes(TestCase):
+    def setUp(self):
+        self.mapping = AttributeDict(Cores=1, Memory=1024, Disk=1024 * 1024)
+        self.shared = MachineTypeAttributes.get(
+            "TestSite", "TestMachineType", self.mapping
+        )
+        self.now = datetime.now()
+        self.attributes = DroneAttributes(
+            self.shared,
+            remote_resource_uuid=None,
+            drone_uuid="testsite-abc123",
+            created=self.now,
+            updated=self.now,
+        )
+        self.expected = AttributeDict(
+            site_name="TestSite",
+            machine_type="TestMachineType",
+            obs_machine_meta_data_translation_mapping=self.mapping,
+            remote_resource_uuid=None,
+            drone_uuid="testsite-abc123",
+            created=self.now,
+            updated=self.now,
+        )
+
+    def test_mapping(self):
+        self.assertEqual(self.attributes, self.expected)
+        self.assertEqual(self.expected, self.attributes)
+        self.assertEqual(dict(self.attributes), self.expected)
+        self.assertEqual({**self.attributes}, self.expected)
+        self.assertEqual(len(self.attributes), len(self.expected))
+        self.assertEqual(set(self.attributes), set(self.expected))
+        self.assertEqual(str(self.attributes), str(dict(self.attributes)))
+        self.assertIsNone(self.attributes.get("resource_status"))
+
+        bind_parameters = {"state": "RequestState"}
+        bind_parameters.update(self.attributes)
+        self.assertEqual(bind_parameters, {"state": "RequestState", **self.expected})
+
+    def test_access(self):
+        self.assertEqual(self.attributes.drone_uuid, "testsite-abc123")
+        self.assertEqual(self.attributes["drone_uuid"], "testsite-abc123")
+        self.assertEqual(self.attributes.site_name, "TestSite")
+        self.assertIs(
+            self.attributes.obs_machine_meta_data_translation_mapping, self.mapping
+        )
+        with self.assertRaises(AttributeError):
+            self.attributes.resource_status  # noqa: B018
+        with self.assertRaises(KeyError):
+            self.attributes["resource_status"]  # noqa: B018
+        with self.assertRaises(AttributeError):
+            self.attributes.unknown  # noqa: B018
+
+    def test_update(self):
+        self.attributes.update(resource_status="Running", JobId="123")
+        self.attributes.remote_resource_uuid = "123"
+        self.expected.update(
+            resource_status="Running", JobId="123", remote_resource_uuid="123"
+        )
+        self.assertEqual(self.attributes, self.expected)
+        self.assertEqual(self.attributes.JobId, "123")
+
+        # overriding shared attributes only affects a single drone
+        self.attributes.site_name = "OtherSite"
+        self.assertEqual(self.attributes.site_name, "OtherSite")
+        self.assertEqual(self.shared.site_name, "TestSite")
+        self.assertEqual(list(self.attributes).count("site_name"), 1)
+
+        # setting the shared objects themselves stores nothing per drone
+        self.attributes.update(
+            AttributeDict(self.attributes, site_name=self.shared.site_name)
+        )
+        self.assertEqual(self.attributes.site_name, "TestSite")
+        self.assertEqual(set(self.attributes._extra), {"JobId"})
+
+    def test_delete(self):
+        del self.attributes.drone_uuid
+        self.assertNotIn("drone_uuid", self.attributes)
+        with self.assertRaises(AttributeError):
+            self.attributes.drone_uuid  # noqa: B018
+        with self.assertRaises(AttributeError):
+            del self.attributes.drone_uuid
+
+        self.attributes.JobId = "123"
+        del self.attributes["JobId"]
+        self.assertNotIn("JobId", self.attributes)
+        with self.assertRaises(KeyError):
+            del self.attributes["JobId"]
+
+    def test_copy(self):
+        self.attributes.JobId = "123"
+        attributes = copy.copy(self.attributes)
+        self.assertEqual(attributes, self.attributes)
+        attributes.JobId = "456"
+        self.assertEqual(self.attributes.JobId, "123")
+        self.expected.JobId = "123"
+        self.assertEqual(AttributeDict(self.attributes), self.expected)
@@ -0,0 +1,261 @@
+from tardis.resources.dronescheduler import DroneScheduler
+from tardis.resources.dronestates import BootingState
+from tardis.resources.dronestates import IntegratingState
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.instrumentation import HEARTBEAT_DRIFT
+from tardis.utilities.instrumentation import HistogramSink, Instrumentation
+
+from ..utilities.utilities import run_async
+
+from unittest import TestCase
+from unittest.mock import MagicMock, patch
+
+import asyncio
+
+
+class MockDrone(object):
+    def __init__(self, drone_uuid, site_name="TestSite", heartbeats=3, interval=0):
+        self.resource_attributes = AttributeDict(
+            drone_uuid=drone_uuid, site_name=site_name
+        )
+        self.site_agent = site_name
+        self.state = BootingState()
+        self.heartbeat_interval = interval
+        self.remaining_heartbeats = heartbeats
+        self.heartbeat_times = []
+        self.bulk_sizes = []
+
+    async def heartbeat(self):
+        self.heartbeat_times.append(asyncio.get_event_loop().time())
+        self.remaining_heartbeats -= 1
+        return self.remaining_heartbeats > 0
+
+    @staticmethod
+    async def bulk_heartbeat(drones):
+        for drone in drones:
+            drone.bulk_sizes.append(len(drones))
+        return [await drone.heartbeat() for drone in drones]
+
+
+class TestDroneScheduler(TestCase):
+    def setUp(self):
+        self.scheduler = DroneScheduler()
+
+    def tearDown(self):
+        DroneScheduler._instance = None
+
+    def test_invalid_settings(self):
+        for max_concurrent_runs in (0, -1):
+            with self.assertRaises(ValueError):
+                DroneScheduler(max_concurrent_runs=max_concurrent_runs)
+        for batch_window in (0, -1.0):
+            with self.assertRaises(ValueError):
+                DroneScheduler(batch_window=batch_window)
+
+    @patch("tardis.resources.dronescheduler.Configuration")
+    def test_from_configuration(self, mock_configuration):
+        mock_configuration.return_value = MagicMock(spec=[])
+        self.assertIsNone(DroneScheduler.from_configuration())
+
+        mock_configuration.return_value = AttributeDict(
+            DroneScheduler=AttributeDict(max_concurrent_runs=5)
+        )
+        scheduler = DroneScheduler.from_configuration()
+        self.assertIsInstance(scheduler, DroneScheduler)
+        self.assertEqual(scheduler._max_concurrent_runs, 5)
+        self.assertIs(DroneScheduler.from_configuration(), scheduler)
+
+    def test_schedule(self):
+        drones = [MockDrone(f"drone-{idx}", heartbeats=idx + 1) for idx in range(5)]
+
+        async def run_drones():
+            await asyncio.gather(*(self.scheduler.schedule(drone) for drone in drones))
+
+        run_async(run_drones)
+
+        for idx, drone in enumerate(drones):
+            self.assertEqual(len(drone.heartbeat_times), idx + 1)
+        self.assertEqual(self.scheduler.scheduled, 0)
+        self.assertEqual(self.scheduler.running, 0)
+        self.assertEqual(self.scheduler.queue_depth, 0)
+        self.assertGreaterEqual(self.scheduler.lag, 0.0)
+
+    def test_instrumentation(self):
+        sink = HistogramSink()
+        instrumentation = Instrumentation()
+        instrumentation.add_sink(sink)
+        instrumentation.enable()
+        self.addCleanup(instrumentation.disable)
+
+        run_async(self.scheduler.schedule, MockDrone("drone-0", heartbeats=3))
+        self.assertEqual(sink.get(HEARTBEAT_DRIFT, site="TestSite").count, 3)
+
+        self.scheduler = DroneScheduler(batch_window=0.01)
+        drones = [MockDrone(f"drone-{idx}", heartbeats=2) for idx in range(3)]
+
+        async def run_drones():
+            await asyncio.gather(*(self.scheduler.schedule(drone) for drone in drones))
+
+        run_async(run_drones)
+        # drift is observed once per batch
+        self.assertEqual(sink.get(HEARTBEAT_DRIFT, site="TestSite").count, 5)
+
+    def test_heartbeat_interval(self):
+        drone = MockDrone("drone-interval", heartbeats=3, interval=0.05)
+        run_async(self.scheduler.schedule, drone)
+        first, second, third = drone.heartbeat_times
+        self.assertGreaterEqual(second - first, 0.04)
+        self.assertGreaterEqual(third - second, 0.04)
+
+    def test_wake(self):
+        drone = MockDrone("drone-wake", heartbeats=2, interval=60)
+        # drones not scheduled are not affected
+        self.scheduler.wake(drone)
+        self.assertEqual(self.scheduler.scheduled, 0)
+
+        async def run_drone():
+            schedule = asyncio.ensure_future(self.scheduler.schedule(drone))
+            while not drone.heartbeat_times:
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            self.scheduler.wake(drone)
+            self.scheduler.wake(drone)
+            self.assertEqual(self.scheduler.scheduled, 1)
+            await asyncio.wait_for(schedule, 1)
+
+        run_async(run_drone)
+        self.assertEqual(len(drone.heartbeat_times), 2)
+        self.assertEqual(self.scheduler.scheduled, 0)
+        # stale heap entries of the woken drone are skipped
+        self.assertEqual(drone.remaining_heartbeats, 0)
+
+    def test_spread(self):
+        drones = [
+            MockDrone(f"drone-{idx}", heartbeats=1, interval=1) for idx in range(3)
+        ]
+        phases = [DroneScheduler._phase(drone) for drone in drones]
+        for phase in phases:
+            self.assertTrue(0.0 <= phase < 1.0)
+        # phases are stable per drone uuid and differ between drones
+        self.assertEqual(phases, [DroneScheduler._phase(drone) for drone in drones])
+        self.assertEqual(len(set(phases)), len(phases))
+
+        async def run_drones():
+            start = asyncio.get_event_loop().time()
+            await asyncio.gather(
+                *(self.scheduler.schedule(drone, spread=True) for drone in drones)
+            )
+            return start
+
+        start = run_async(run_drones)
+        for drone, phase in zip(drones, phases):
+            self.assertGreaterEqual(drone.heartbeat_times[0] - start, phase - 0.01)
+
+    def test_max_concurrent_runs(self):
+        scheduler = DroneScheduler(max_concurrent_runs=2)
+        active = {"TestSite": 0, "OtherSite": 0}
+        maximum = {"TestSite": 0, "OtherSite": 0}
+
+        class SlowDrone(MockDrone):
+            async def heartbeat(self):
+                site_name = self.resource_attributes.site_name
+                active[site_name] += 1
+                maximum[site_name] = max(maximum[site_name], active[site_name])
+                await asyncio.sleep(0.01)
+                active[site_name] -= 1
+                return await super().heartbeat()
+
+        drones = [
+            SlowDrone(f"drone-{idx}", site_name=site_name, heartbeats=2)
+            for idx in range(5)
+            for site_name in ("TestSite", "OtherSite")
+        ]
+
+        async def run_drones():
+            await asyncio.gather(*(scheduler.schedule(drone) for drone in drones))
+
+        run_async(run_drones)
+        self.assertEqual(maximum, {"TestSite": 2, "OtherSite": 2})
+
+    def test_heartbeat_failure(self):
+        drone = MockDrone("drone-failing")
+
+        async def failing_heartbeat():
+            raise RuntimeError("heartbeat failed")
+
+        drone.heartbeat = failing_heartbeat
+
+        with self.assertRaises(RuntimeError):
+            run_async(self.scheduler.schedule, drone)
+        self.assertEqual(self.scheduler.running, 0)
+
+    def test_batch_window(self):
+        scheduler = DroneScheduler(batch_window=0.01)
+        drones = [
+            MockDrone(f"drone-{idx}", site_name=site_name, heartbeats=2, interval=0.01)
+            for idx in range(3)
+            for site_name in ("TestSite", "OtherSite")
+        ]
+        other_state = MockDrone("drone-other-state", heartbeats=2, interval=0.01)
+        other_state.state = IntegratingState()
+
+        async def run_drones():
+            await asyncio.gather(
+                *(scheduler.schedule(drone) for drone in (*drones, other_state))
+            )
+
+        run_async(run_drones)
+        for drone in drones:
+            self.assertEqual(drone.bulk_sizes, [3, 3])
+            # deadlines are aligned to the batch window
+            first, second = drone.heartbeat_times
+            self.assertGreaterEqual(second - first, 0.005)
+        self.assertEqual(other_state.bulk_sizes, [1, 1])
+        self.assertEqual(scheduler.scheduled, 0)
+        self.assertEqual(scheduler.running, 0)
+
+    def test_batch_window_failure(self):
+        scheduler = DroneScheduler(batch_window=0.01)
+
+        class FailingDrone(MockDrone):
+            @staticmethod
+            async def bulk_heartbeat(drones):
+                raise RuntimeError("heartbeat failed")
+
+        drones = [FailingDrone(f"drone-{idx}") for idx in range(2)]
+
+        async def run_drone(drone):
+            with self.assertRaises(RuntimeError):
+                await scheduler.schedule(drone)
+
+        async def run_drones():
+            await asyncio.gather(*(run_drone(drone) for drone in drones))
+
+        run_async(run_drones)
+        self.assertEqual(scheduler.running, 0)
+
+    def test_batch_window_drone_failure(self):
+        scheduler = DroneScheduler(batch_window=0.01)
+
+        class PartlyFailingDrone(MockDrone):
+            @staticmethod
+            async def bulk_heartbeat(drones):
+                return [
+                    RuntimeError("heartbeat failed") if drone.failing else False
+                    for drone in drones
+                ]
+
+        drones = [PartlyFailingDrone(f"drone-{idx}") for idx in range(3)]
+        for drone in drones:
+            drone.failing = drone is drones[0]
+
+        async def run_drones():
+            return await asyncio.gather(
+                *(scheduler.schedule(drone) for drone in drones),
+                return_exceptions=True,
+            )
+
+        results = run_async(run_drones)
+        self.assertIsInstance(results[0], RuntimeError)
+        self.assertEqual(results[1:], [None, None])
+        self.assertEqual(scheduler.running, 0)
@@ -5,6 +5,7 @@ from tardis.exceptions.tardisexceptions import TardisQuotaExceeded
 from tardis.exceptions.tardisexceptions import TardisResourceStatusUpdateFailed
 from tardis.interfaces.batchsystemadapter import MachineStatus
 from tardis.interfaces.siteadapter import ResourceStatus
+from tardis.interfaces.state import State
 from tardis.resources.dronestates import RequestState
 from tardis.resources.dronestates import BootingState
 from tardis.resources.dronestates import IntegrateState
@@ -17,6 +18,7 @@ from tardis.resources.dronestates import ShutDownState
 from tardis.resources.dronestates import ShuttingDownState
 from tardis.resources.dronestates import CleanupState
 from tardis.resources.dronestates import DownState
+from tardis.resources.dronestates import batchsystem_machine_status
 from tardis.utilities.attributedict import AttributeDict
 from ..utilities.utilities import async_return
 from ..utilities.utilities import run_async
@@ -360,3 +362,69 @@ class TestDroneStates(TestCase):
         self.drone.state.return_value = DownState()
         run_async(self.drone.state.return_value.run, self.drone)
         self.assertEqual(self.drone.demand, 0.0)
+
+    def test_run_bulk(self):
+        matrix = [
+            (ResourceStatus.Running, MachineStatus.NotAvailable, IntegratingState),
+            (ResourceStatus.Running, MachineStatus.Available, AvailableState),
+            (ResourceStatus.Booting, MachineStatus.NotAvailable, BootingState),
+            (ResourceStatus.Deleted, MachineStatus.NotAvailable, DownState),
+            (ResourceStatus.Error, MachineStatus.Available, CleanupState),
+        ]
+
+        for resource_status, machine_status, new_state in matrix:
+            self.drone.site_agent.resource_status_bulk.return_value = async_return(
+                return_value=[AttributeDict(resource_status=resource_status)]
+            )
+            self.drone.batch_system_agent.get_machine_status_bulk.return_value = (
+                async_return(return_value=[machine_status])
+            )
+            run_async(IntegratingState.run_bulk, [self.drone])
+            self.assertIsInstance(self.drone.state, new_state)
+            self.drone.site_agent.resource_status_bulk.assert_called_with(
+                [self.drone.resource_attributes]
+            )
+
+        for exception, new_state in (
+            (TardisAuthError, IntegratingState),
+            (TardisTimeout, IntegratingState),
+            (TardisResourceStatusUpdateFailed, IntegratingState),
+            (TardisDroneCrashed, CleanupState),
+        ):
+            self.drone.site_agent.resource_status_bulk.return_value = async_return(
+                return_value=[exception()]
+            )
+            run_async(IntegratingState.run_bulk, [self.drone])
+            self.assertIsInstance(self.drone.state, new_state)
+
+        # unexpected exceptions only affect the drone raising them
+        error = RuntimeError("unexpected")
+        self.drone.site_agent.resource_status_bulk.return_value = async_return(
+            return_value=[error]
+        )
+        state = self.drone.state
+        self.assertEqual(run_async(IntegratingState.run_bulk, [self.drone]), [error])
+        self.assertIs(self.drone.state, state)
+
+        # states without processing pipeline are run for each drone individually
+        self.assertEqual(run_async(IntegrateState.run_bulk, [self.drone]), [None])
+        self.assertIsInstance(self.drone.state, IntegratingState)
+
+    def test_transition_tables(self):
+        for state in (
+            BootingState,
+            IntegratingState,
+            AvailableState,
+            DrainingState,
+            ShutDownState,
+            ShuttingDownState,
+            CleanupState,
+        ):
+            self.assertEqual(len(state.transition), len(ResourceStatus))
+            for row in state.transition:
+                if batchsystem_machine_status in state.processing_pipeline:
+                    self.assertEqual(len(row), len(MachineStatus))
+                    for new_state in row:
+                        self.assertIsInstance(new_state, State)
+                else:
+                    self.assertIsInstance(row, State)
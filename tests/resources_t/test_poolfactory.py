@@ -1,9 +1,12 @@
 from tardis.resources.dronestates import RequestState
 from tardis.resources.poolfactory import create_composite_pool
 from tardis.resources.poolfactory import create_drone
+from tardis.resources.poolfactory import enable_instrumentation
 from tardis.resources.poolfactory import get_drones_to_restore
 from tardis.resources.poolfactory import load_plugins
 from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.instrumentation import HistogramSink
+from tardis.utilities.plugindispatcher import PluginDispatcher
 
 from unittest import TestCase
 from unittest.mock import ANY, MagicMock, call, patch
@@ -141,6 +144,42 @@ class TestPoolFactory(TestCase):
         self.assertEqual(load_plugins(), {})
         self.mock_config.side_effect = None
 
+    def test_load_plugins_dispatch(self):
+        self.config.Plugins = AttributeDict(
+            SqliteRegistry=AttributeDict(
+                db_file="test.db", dispatch=AttributeDict(max_queue_size=10)
+            )
+        )
+        self.mock_sqliteregistry.return_value.requires_all_notifications = True
+        plugins = load_plugins()
+        self.assertIsInstance(plugins["SqliteRegistry"], PluginDispatcher)
+        self.assertEqual(plugins["SqliteRegistry"].plugin, self.mock_sqliteregistry())
+
+        self.config.Plugins.SqliteRegistry.dispatch.policy = "coalesce"
+        with self.assertRaises(ValueError):
+            load_plugins()
+
+    @patch("tardis.resources.poolfactory.Instrumentation")
+    def test_enable_instrumentation(self, mock_instrumentation):
+        sink = HistogramSink()
+        dispatched_sink = HistogramSink()
+        plugins = {
+            "Sink": sink,
+            "DispatchedSink": PluginDispatcher(dispatched_sink),
+            "SqliteRegistry": self.mock_sqliteregistry(),
+        }
+
+        mock_instrumentation.from_configuration.return_value = None
+        enable_instrumentation(plugins)
+
+        instrumentation = MagicMock()
+        mock_instrumentation.from_configuration.return_value = instrumentation
+        enable_instrumentation(plugins)
+        self.assertEqual(
+            instrumentation.add_sink.call_args_list,
+            [call(sink), call(dispatched_sink)],
+        )
+
     def test_get_drones_to_restore(self):
         self.assertEqual(
             get_drones_to_restore(
@@ -56,3 +56,8 @@ class TestAsyncRunCommand(TestCase):
         self.assertEqual(
             run_async(executor.run_command, 'echo "Test" >>/dev/stderr').stderr, "Test"
         )
+
+    def test_equality(self):
+        self.assertEqual(self.executor, ShellExecutor())
+        self.assertEqual(hash(self.executor), hash(ShellExecutor()))
+        self.assertNotEqual(self.executor, object())
@@ -1,14 +1,20 @@
 from tests.utilities.utilities import async_return, run_async
 from tardis.utilities.attributedict import AttributeDict
 from tardis.utilities.executors.sshexecutor import SSHExecutor, probe_max_session
+from tardis.utilities.executors.sshexecutor import SSHExecutorPool
+from tardis.utilities.instrumentation import HistogramSink, Instrumentation
+from tardis.utilities.instrumentation import SSH_BACKOFF, SSH_DOWNTIME
+from tardis.utilities.instrumentation import SSH_CONNECTION_STATE
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
 
 from asyncssh import ChannelOpenError, ConnectionLost, DisconnectError, ProcessError
+from asyncssh import Error
 
 from unittest import TestCase
 from unittest.mock import patch
 
 import asyncio
+import time
 import yaml
 import contextlib
 from asyncstdlib import contextmanager as asynccontextmanager
@@ -17,11 +23,72 @@ from asyncstdlib import contextmanager as asynccontextmanager
 DEFAULT_MAX_SESSIONS = 10
 
 
+def cancel_pending_tasks():
+    """Cancel background tasks such as the watchers of connections"""
+    loop = asyncio.get_event_loop()
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+class LocalShellProcess(object):
+    """Local shell process with the text streams of an asyncssh process"""
+
+    class Reader(object):
+        def __init__(self, reader):
+            self._reader = reader
+
+        async def readuntil(self, separator):
+            return (await self._reader.readuntil(separator.encode())).decode()
+
+        async def readline(self):
+            return (await self._reader.readline()).decode()
+
+    class Writer(object):
+        def __init__(self, writer):
+            self._writer = writer
+
+        def write(self, data):
+            self._writer.write(data.encode())
+
+    def __init__(self, process):
+        self.process = process
+        self.stdin = self.Writer(process.stdin)
+        self.stdout = self.Reader(process.stdout)
+        self.stderr = self.Reader(process.stderr)
+
+    @classmethod
+    async def create(cls, command):
+        return cls(
+            await asyncio.create_subprocess_exec(
+                command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                # asyncssh does not limit the size of read buffers
+                limit=2**24,
+            )
+        )
+
+    def close(self):
+        if self.process.returncode is None:
+            self.process.kill()
+
+
 class MockConnection(object):
     def __init__(self, exception=None, __max_sessions=DEFAULT_MAX_SESSIONS, **kwargs):
         self.exception = exception and exception(**kwargs)
         self.max_sessions = __max_sessions
         self.current_sessions = 0
+        self.commands = []
+        self.closed = asyncio.Event()
+
+    def close(self):
+        self.closed.set()
+
+    async def wait_closed(self):
+        await self.closed.wait()
 
     @contextlib.contextmanager
     def _multiplex_session(self):
@@ -34,19 +101,23 @@ class MockConnection(object):
             self.current_sessions -= 1
 
     async def run(self, command, input=None, **kwargs):
+        self.commands.append(command)
         with self._multiplex_session():
             if self.exception:
                 raise self.exception
             if command.startswith("sleep"):
                 _, duration = command.split()
                 await asyncio.sleep(float(duration))
-            elif command != "Test":
+            elif command not in ("Test", "true"):
                 raise ValueError(f"Unsupported mock command: {command}")
             return AttributeDict(
                 stdout=input and input.decode(), stderr="TestError", exit_status=0
             )
 
-    async def create_process(self):
+    async def create_process(self, command=None):
+        if command is not None:
+            return await LocalShellProcess.create(command)
+
         @asynccontextmanager
         async def fake_process():
             with self._multiplex_session():
@@ -82,6 +153,7 @@ class TestSSHExecutor(TestCase):
         cls.mock_asyncssh.ConnectionLost = ConnectionLost
         cls.mock_asyncssh.DisconnectError = DisconnectError
         cls.mock_asyncssh.ProcessError = ProcessError
+        cls.mock_asyncssh.Error = Error
 
     @classmethod
     def tearDownClass(cls):
@@ -98,7 +170,19 @@ class TestSSHExecutor(TestCase):
         self.executor = SSHExecutor(**self.test_asyncssh_params)
         self.mock_asyncssh.reset_mock()
 
-    @patch("tardis.utilities.executors.sshexecutor.asyncio.sleep", async_return)
+    def tearDown(self) -> None:
+        cancel_pending_tasks()
+
+    def test_equality(self):
+        executor = SSHExecutor(**self.test_asyncssh_params)
+        self.assertEqual(executor, self.executor)
+        self.assertEqual(hash(executor), hash(self.executor))
+        self.assertNotEqual(
+            SSHExecutor(**{**self.test_asyncssh_params, "host": "other_host"}),
+            self.executor,
+        )
+        self.assertNotEqual(self.executor, object())
+
     def test_establish_connection(self):
         self.assertIsInstance(
             run_async(self.executor._establish_connection), MockConnection
@@ -111,19 +195,124 @@ class TestSSHExecutor(TestCase):
             DisconnectError(reason="test_reason", code=255),
             ConnectionLost(reason="test_reason"),
             BrokenPipeError(),
+            ConnectionRefusedError(),
+            asyncio.TimeoutError(),
         ]
 
         for exception in test_exceptions:
+            executor = SSHExecutor(reconnect_delay=10, **self.test_asyncssh_params)
             self.mock_asyncssh.reset_mock()
             self.mock_asyncssh.connect.side_effect = exception
 
-            with self.assertRaises(type(exception)):
-                run_async(self.executor._establish_connection)
+            with self.assertRaises(CommandExecutionFailure) as cm:
+                run_async(executor.run_command, command="Test")
+            self.assertIs(cm.exception.__cause__, exception)
+            self.assertEqual(cm.exception.exit_code, 255)
 
-            self.assertEqual(self.mock_asyncssh.connect.call_count, 10)
+            # commands fail right away until the next attempt is due
+            with self.assertRaises(CommandExecutionFailure):
+                run_async(executor.run_command, command="Test")
+            self.assertEqual(self.mock_asyncssh.connect.call_count, 1)
+            self.assertEqual(executor.connection_state, "disconnected")
 
         self.mock_asyncssh.connect.side_effect = None
 
+    def test_reconnect_backoff(self):
+        executor = SSHExecutor(
+            reconnect_delay=0.01, max_reconnect_delay=0.04, **self.test_asyncssh_params
+        )
+        sink = HistogramSink()
+        instrumentation = Instrumentation()
+        instrumentation.add_sink(sink)
+        instrumentation.enable()
+
+        async def connect():
+            async with executor.lock:
+                await executor._connect()
+
+        self.mock_asyncssh.connect.side_effect = ConnectionResetError()
+        try:
+            for backoff in (0.01, 0.02, 0.04, 0.04):
+                with self.assertRaises(CommandExecutionFailure):
+                    run_async(connect)
+                self.assertEqual(executor._backoff, backoff)
+                # attempts are delayed by a random fraction of the backoff
+                retry_in = executor._retry_at - time.monotonic()
+                self.assertLessEqual(retry_in, backoff)
+                self.assertGreater(retry_in, backoff / 2 - 0.01)
+                executor._retry_at = 0
+            self.mock_asyncssh.connect.side_effect = None
+            run_async(connect)
+            self.assertEqual(executor.connection_state, "connected")
+            self.assertEqual(executor._backoff, 0)
+            self.assertEqual(sink.get(SSH_BACKOFF, host="test_host").count, 4)
+            self.assertEqual(sink.get(SSH_DOWNTIME, host="test_host").count, 1)
+            for state in ("disconnected", "connecting"):
+                self.assertEqual(
+                    sink.get(SSH_CONNECTION_STATE, host="test_host", state=state).count,
+                    5,
+                )
+        finally:
+            self.mock_asyncssh.connect.side_effect = None
+            instrumentation.disable()
+
+    def test_reconnect_in_background(self):
+        attempts = []
+
+        async def connect(**kwargs):
+            attempts.append(kwargs)
+            # unexpected errors do not stop re-establishing the connection
+            if len(attempts) == 2:
+                raise RuntimeError("unexpected")
+            return MockConnection()
+
+        async def close_connection():
+            await self.executor.run_command("Test")
+            connection = self.executor._ssh_connection
+            watcher = self.executor._watcher
+            connection.close()
+            for _ in range(10):
+                await asyncio.sleep(0)
+            self.assertIsNot(self.executor._ssh_connection, connection)
+            self.assertEqual(self.executor.connection_state, "connected")
+            self.assertTrue(watcher.done())
+            self.assertFalse(self.executor._watcher.done())
+
+            # watchers of replaced connections are cancelled
+            watcher = self.executor._watcher
+            async with self.executor.lock:
+                self.executor._ssh_connection = None
+                await self.executor._connect()
+            await asyncio.sleep(0)
+            self.assertTrue(watcher.cancelled())
+
+        self.mock_asyncssh.connect.side_effect = connect
+        try:
+            self.assertEqual(self.executor.connection_state, "disconnected")
+            run_async(close_connection)
+            self.assertEqual(len(attempts), 4)
+        finally:
+            self.mock_asyncssh.connect.side_effect = None
+
+    def test_max_waiting(self):
+        self.mock_asyncssh.connect.return_value = async_return(
+            return_value=MockConnection(None, 1)
+        )
+        executor = SSHExecutor(max_waiting=1, **self.test_asyncssh_params)
+
+        async def run_commands():
+            await executor.run_command("Test")
+            running = asyncio.ensure_future(executor.run_command("sleep 0.05"))
+            waiting = asyncio.ensure_future(executor.run_command("sleep 0.01"))
+            await asyncio.sleep(0)
+            with self.assertRaises(CommandExecutionFailure) as cm:
+                await executor.run_command("Test")
+            self.assertEqual(cm.exception.stderr, "SSH Queue Full")
+            await asyncio.gather(running, waiting)
+            self.assertEqual(executor._waiting, 0)
+
+        run_async(run_commands)
+
     def test_connection_property(self):
         async def force_connection():
             async with self.executor.bounded_connection as connection:
@@ -227,3 +416,297 @@ class TestSSHExecutor(TestCase):
         self.mock_asyncssh.connect.assert_called_with(
             host="test_host", username="test", client_keys=["TestKey"]
         )
+
+    def test_persistent_shells(self):
+        executor = SSHExecutor(
+            persistent_shells=2, command_timeout=1.0, **self.test_asyncssh_params
+        )
+        self.assertEqual(executor, self.executor)
+
+        async def run_commands():
+            try:
+                response = await executor.run_command("cat", stdin_input="Test")
+                self.assertEqual(response.stdout, "Test")
+                response = await executor.run_command("echo Test >&2")
+                self.assertEqual(response.stdout, "")
+                self.assertEqual(response.stderr, "Test\n")
+                self.assertEqual(response.exit_code, 0)
+
+                # commands run in their own subshell
+                with self.assertRaises(CommandExecutionFailure) as cm:
+                    await executor.run_command("printf Test; exit 3")
+                self.assertEqual(cm.exception.exit_code, 3)
+                self.assertEqual(cm.exception.stdout, "Test")
+
+                # commands are pipelined over the shells
+                responses = await asyncio.gather(
+                    *(executor.run_command(f"echo {i}") for i in range(20))
+                )
+                self.assertEqual(
+                    [response.stdout for response in responses],
+                    [f"{i}\n" for i in range(20)],
+                )
+                self.assertEqual(len(executor._remote_shells), 2)
+                self.mock_asyncssh.connect.assert_called_once()
+
+                # commands are spread over the shells while others are running
+                running = asyncio.ensure_future(executor.run_command("sleep 0.5"))
+                await asyncio.sleep(0.1)
+                self.assertEqual(
+                    sorted(shell.load for shell in executor._remote_shells), [0, 1]
+                )
+                before = time.monotonic()
+                response = await executor.run_command("echo Test")
+                self.assertEqual(response.stdout, "Test\n")
+                self.assertLess(time.monotonic() - before, 0.3)
+                await running
+                self.assertEqual(
+                    [shell.load for shell in executor._remote_shells], [0, 0]
+                )
+
+                # malformed commands fail by themselves
+                for command in ('echo "Test', "cat <<EOF"):
+                    with self.assertRaises(CommandExecutionFailure) as cm:
+                        await executor.run_command(f"{command}; exit 3")
+                    self.assertNotIn(cm.exception.exit_code, (0, 255))
+                response = await executor.run_command("echo Test")
+                self.assertEqual(response.stdout, "Test\n")
+
+                # large output on both streams does not block the shell
+                response = await executor.run_command(
+                    "seq 100000 >&2; seq 100000; seq 100000 >&2"
+                )
+                self.assertEqual(len(response.stdout.splitlines()), 100000)
+                self.assertEqual(len(response.stderr.splitlines()), 200000)
+
+                # broken shells are replaced on the same connection
+                broken_shell = executor._remote_shells[0]
+                broken_shell._process.close()
+                with self.assertRaises(CommandExecutionFailure) as cm:
+                    await executor.run_command("echo Test")
+                self.assertEqual(cm.exception.exit_code, 255)
+                self.assertTrue(broken_shell.closed)
+                self.assertIsNotNone(executor._ssh_connection)
+                response = await executor.run_command("echo Test")
+                self.assertEqual(response.stdout, "Test\n")
+                self.assertNotIn(broken_shell, executor._remote_shells)
+                self.assertEqual(len(executor._remote_shells), 2)
+
+                # shells running commands beyond the timeout are replaced
+                with self.assertRaises(CommandExecutionFailure) as cm:
+                    await executor.run_command("sleep 5")
+                self.assertEqual(cm.exception.exit_code, 255)
+                response = await executor.run_command("echo Test")
+                self.assertEqual(response.stdout, "Test\n")
+                self.mock_asyncssh.connect.assert_called_once()
+            finally:
+                for shell in executor._remote_shells:
+                    shell.close()
+
+        self.mock_asyncssh.connect.side_effect = lambda **kwargs: async_return(
+            return_value=MockConnection()
+        )
+        try:
+            run_async(run_commands)
+        finally:
+            self.mock_asyncssh.connect.side_effect = None
+
+
+class TestSSHExecutorPool(TestCase):
+    mock_asyncssh = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock_asyncssh_patcher = patch(
+            "tardis.utilities.executors.sshexecutor.asyncssh"
+        )
+        cls.mock_asyncssh = cls.mock_asyncssh_patcher.start()
+        cls.mock_asyncssh.ChannelOpenError = ChannelOpenError
+        cls.mock_asyncssh.ConnectionLost = ConnectionLost
+        cls.mock_asyncssh.DisconnectError = DisconnectError
+        cls.mock_asyncssh.ProcessError = ProcessError
+        cls.mock_asyncssh.Error = Error
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock_asyncssh.stop()
+
+    def setUp(self) -> None:
+        # connections per host and kwargs of failing connections per host
+        self.connections = {}
+        self.failing = {}
+
+        def connect(host, **kwargs):
+            if host in self.failing:
+                connection = MockConnection(**self.failing[host])
+            else:
+                connection = MockConnection(None, 2)
+            self.connections.setdefault(host, []).append(connection)
+            return async_return(return_value=connection)
+
+        self.mock_asyncssh.reset_mock()
+        self.mock_asyncssh.connect.side_effect = connect
+        self.test_asyncssh_params = AttributeDict(
+            username="test", client_keys=["TestKey"]
+        )
+
+    def tearDown(self) -> None:
+        self.mock_asyncssh.connect.side_effect = None
+        cancel_pending_tasks()
+
+    def commands(self, host):
+        return [
+            command
+            for connection in self.connections.get(host, [])
+            for command in connection.commands
+        ]
+
+    def test_init(self):
+        for parameters in (
+            dict(connections=0),
+            dict(placement="random"),
+            dict(failure_threshold=0),
+        ):
+            with self.subTest(**parameters):
+                with self.assertRaises(ValueError):
+                    SSHExecutorPool(host="test_host", **parameters)
+
+        executor = SSHExecutorPool(
+            host="test_host", connections=2, **self.test_asyncssh_params
+        )
+        self.assertEqual(
+            executor._connections[1].executor._parameters["host"], "test_host"
+        )
+        self.assertEqual(
+            executor, SSHExecutorPool(hosts=["test_host"], **self.test_asyncssh_params)
+        )
+        self.assertEqual(
+            hash(executor),
+            hash(SSHExecutorPool(hosts=["test_host"], **self.test_asyncssh_params)),
+        )
+        self.assertNotEqual(
+            executor, SSHExecutorPool(hosts=["other_host"], **self.test_asyncssh_params)
+        )
+
+    def test_construction_by_yaml(self):
+        executor = yaml.safe_load(
+            """
+                   !SSHExecutorPool
+                   hosts:
+                    - test_host1
+                    - test_host2
+                   placement: round_robin
+                   username: test
+                   """
+        )
+        self.assertEqual(
+            run_async(executor.run_command, command="Test", stdin_input="Test").stdout,
+            "Test",
+        )
+        self.mock_asyncssh.connect.assert_called_with(
+            host="test_host1", username="test"
+        )
+
+    def test_placement(self):
+        executor = SSHExecutorPool(
+            hosts=["test_host1", "test_host2"],
+            placement="round_robin",
+            **self.test_asyncssh_params,
+        )
+        for _ in range(4):
+            run_async(executor.run_command, "Test")
+        self.assertEqual(self.commands("test_host1"), ["Test"] * 2)
+        self.assertEqual(self.commands("test_host2"), ["Test"] * 2)
+
+        # each host takes 2 sessions, spread over 2 connections per host
+        executor = SSHExecutorPool(
+            hosts=["test_host3", "test_host4"],
+            connections=2,
+            **self.test_asyncssh_params,
+        )
+
+        async def run_burst():
+            # commands use a single session per connection before connecting
+            await executor.run_command("Test")
+            await asyncio.gather(
+                *(executor.run_command("sleep 0.05") for _ in range(8))
+            )
+
+        run_async(run_burst)
+        self.assertEqual(len(self.connections["test_host3"]), 2)
+        self.assertEqual(len(self.connections["test_host4"]), 2)
+        self.assertEqual(
+            len(self.commands("test_host3")) + len(self.commands("test_host4")), 9
+        )
+        self.assertTrue(self.commands("test_host4"))
+        self.assertEqual(executor.utilisation, 0)
+        self.assertEqual(executor.stats.wait_time.count, 9)
+        self.assertEqual(executor.stats.utilisation.count, 9)
+
+    def test_queueing(self):
+        executor = SSHExecutorPool(host="test_host", **self.test_asyncssh_params)
+
+        async def run_burst():
+            await executor.run_command("Test")
+            background = [
+                asyncio.ensure_future(executor.run_command("sleep 0.1"))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            # the third command waits for a free session slot
+            self.assertEqual(executor.utilisation, 1)
+            await executor.run_command("sleep 0.01")
+            self.assertTrue(all(task.done() for task in background))
+
+        run_async(run_burst)
+        self.assertEqual(executor.stats.wait_time.count, 4)
+        self.assertGreaterEqual(executor.stats.wait_time.sum, 0.05)
+        self.assertEqual(self.connections["test_host"][0].current_sessions, 0)
+
+    def test_circuit_breaking(self):
+        self.failing["test_host1"] = dict(
+            exception=ChannelOpenError, reason="test_reason", code=255
+        )
+        executor = SSHExecutorPool(
+            hosts=["test_host1", "test_host2"],
+            placement="round_robin",
+            failure_threshold=2,
+            recovery_timeout=0.05,
+            **self.test_asyncssh_params,
+        )
+
+        async def run_commands():
+            for _ in range(2):
+                with self.assertRaises(CommandExecutionFailure):
+                    await executor.run_command("Test")
+                await executor.run_command("Test")
+            self.assertEqual(executor.unavailable_hosts, ["test_host1"])
+            self.assertEqual(executor.stats.host_failures, 2)
+
+            # commands are placed on the available host only
+            for _ in range(2):
+                await executor.run_command("Test")
+            self.assertEqual(len(self.commands("test_host1")), 2)
+            self.assertEqual(len(self.commands("test_host2")), 4)
+
+            self.failing["test_host2"] = self.failing["test_host1"]
+            executor._hosts[1].connections[0].executor._ssh_connection = None
+            for _ in range(2):
+                with self.assertRaises(CommandExecutionFailure):
+                    await executor.run_command("Test")
+            self.assertEqual(executor.unavailable_hosts, ["test_host1", "test_host2"])
+
+            # commands are rejected while no host is available
+            with self.assertRaises(CommandExecutionFailure) as cm:
+                await executor.run_command("Test")
+            self.assertEqual(cm.exception.exit_code, 255)
+            self.assertEqual(executor.stats.rejected, 1)
+
+            # recovered hosts are found by the health check
+            del self.failing["test_host1"]
+            await asyncio.sleep(0.05)
+            await executor.run_command("Test")
+            self.assertEqual(executor.unavailable_hosts, ["test_host2"])
+            self.assertEqual(self.commands("test_host1")[-2:], ["true", "Test"])
+
+        run_async(run_commands)
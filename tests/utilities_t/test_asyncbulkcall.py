@@ -22,6 +22,25 @@ class CallCounter:
         return [(i, this_call) for i in tasks]
 
 
+class PoisonCommand:
+    def __init__(self, *poison):
+        self.poison = poison
+        self.calls = []
+        self.running = self.max_running = 0
+
+    async def __call__(self, *tasks):
+        self.calls.append(tasks)
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            self.running -= 1
+        if any(task in self.poison for task in tasks):
+            raise ValueError(f"poisoned bulk {tasks}")
+        return tasks
+
+
 class TestAsyncBulkCall(TestCase):
     @staticmethod
     async def execute(execution: AsyncBulkCall, count: int, delay=None):
@@ -77,6 +96,148 @@ class TestAsyncBulkCall(TestCase):
             await asyncio.sleep(0.01)  # pause to allow for cleanup
             assert execution._dispatch_task is None
 
+    def test_adaptive(self):
+        """Test that adaptive bulks are executed early when idle"""
+        run_async(self.check_adaptive)
+
+    async def check_adaptive(self):
+        execution = AsyncBulkCall(CallCounter(), size=16, delay=256, adaptive=True)
+        # a burst of tasks is still collected into full bulks
+        result = await self.execute(execution, 32)
+        self.assertEqual(result, [(i, i // 16) for i in range(32)])
+        # once idle, a single task is not expected to be joined by others
+        await asyncio.sleep(0.1)
+        before = time.monotonic()
+        self.assertEqual(await execution(0), (0, 2))
+        self.assertLess(time.monotonic() - before, 1)
+
+    def test_adaptive_drain(self):
+        """Test that adaptive bulks take all queued tasks despite a fast command"""
+        run_async(self.check_adaptive_drain)
+
+    async def check_adaptive_drain(self):
+        execution = AsyncBulkCall(CallCounter(), size=16, delay=256, adaptive=True)
+        # no time is left to wait for tasks, but queued ones are still taken
+        execution._command_duration = 0.0
+        result = await self.execute(execution, 40)
+        self.assertEqual(result, [(i, i // 16) for i in range(40)])
+        self.assertEqual(execution.stats.bulk_size.sum, 40)
+        self.assertEqual(execution.stats.bulk_size.count, 3)
+
+    def test_stats(self):
+        """Test that statistics of the bulks are collected"""
+        execution = AsyncBulkCall(CallCounter(), size=10, delay=0.01)
+        run_async(self.execute, execution, count=25)
+        stats = execution.stats
+        self.assertEqual(stats.bulk_size.buckets, (1, 2, 4, 8, float("inf")))
+        self.assertEqual(stats.bulk_size.counts, [0, 0, 0, 1, 2])
+        self.assertEqual(stats.bulk_size.sum, 25)
+        self.assertEqual(stats.queue_wait.count, 25)
+        self.assertEqual(stats.command_duration.count, 3)
+
+    def test_priority(self):
+        """Test that tasks of lower priority value are executed first"""
+        run_async(self.check_priority)
+
+    async def check_priority(self):
+        execution = AsyncBulkCall(CallCounter(), size=2, delay=0.01)
+        tasks = [
+            asyncio.ensure_future(execution(i, priority=priority))
+            for i, priority in enumerate((1, 1, 0, 1, 0))
+        ]
+        result = await asyncio.gather(*tasks)
+        self.assertEqual(result, [(0, 1), (1, 1), (2, 0), (3, 2), (4, 0)])
+
+    def test_deduplication(self):
+        """Test that tasks of the same key are only executed once"""
+        run_async(self.check_deduplication)
+
+    async def check_deduplication(self):
+        command = CallCounter()
+        execution = AsyncBulkCall(command, size=10, delay=0.01, key=abs)
+        result = await asyncio.gather(*(execution(i) for i in (1, -1, 2, 1)))
+        self.assertEqual(result, [(1, 0), (1, 0), (2, 0), (1, 0)])
+        self.assertEqual(execution.stats.bulk_size.sum, 2)
+        self.assertEqual(execution._in_flight, {})
+        # once done, the same task is executed again
+        self.assertEqual(await execution(1), (1, 1))
+
+    def test_cancel(self):
+        """Test that tasks of cancelled callers are removed from the queue"""
+        run_async(self.check_cancel)
+
+    async def check_cancel(self):
+        for key in (None, abs):
+            with self.subTest(key=key):
+                execution = AsyncBulkCall(CallCounter(), size=10, delay=0.01, key=key)
+                tasks = [asyncio.ensure_future(execution(i)) for i in (1, 2, -2)]
+                await asyncio.sleep(0)
+                tasks[0].cancel()
+                tasks[1].cancel()
+                if key is None:
+                    self.assertEqual(await tasks[2], (-2, 0))
+                    self.assertEqual(execution.stats.bulk_size.sum, 1)
+                else:
+                    # the task of the same key is still awaited by another caller
+                    self.assertEqual(await tasks[2], (2, 0))
+                    self.assertEqual(execution.stats.bulk_size.sum, 1)
+                for task in tasks[:2]:
+                    with self.assertRaises(asyncio.CancelledError):
+                        await task
+        # callers do not share a cancelled task, even before its callbacks run
+        execution = AsyncBulkCall(CallCounter(), size=10, delay=0.01, key=abs)
+        first = asyncio.ensure_future(execution(3))
+        await asyncio.sleep(0)
+        execution._in_flight[3].cancel()
+        self.assertEqual(await execution(-3), (-3, 0))
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(execution._in_flight, {})
+
+    def test_retry(self):
+        """Test that failing tasks are isolated by bisecting their bulk"""
+        run_async(self.check_retry)
+
+    async def check_retry(self):
+        command = PoisonCommand(2, 5)
+        execution = AsyncBulkCall(command, size=8, delay=0.01, retry_delay=0.001)
+        result = await asyncio.gather(
+            *(execution(i) for i in range(8)), return_exceptions=True
+        )
+        for i, task_result in enumerate(result):
+            if i in command.poison:
+                self.assertIsInstance(task_result, ValueError)
+            else:
+                self.assertEqual(task_result, i)
+        self.assertEqual(execution.stats.isolated_failures, 2)
+        # 8 -> 4 + 4 -> (2 + 2) + (2 + 2) -> (1 + 1) + (1 + 1)
+        self.assertEqual(execution.stats.retries, 10)
+        self.assertEqual(len(command.calls), 11)
+        # the halves of a failed bulk are retried concurrently
+        self.assertEqual(command.max_running, 4)
+
+        # results not matching the tasks fail without executing them again
+        mismatch = CallCounter()
+        execution = AsyncBulkCall(
+            lambda *tasks: mismatch(*tasks[1:]), size=8, delay=0.01, retry_delay=0.001
+        )
+        result = await asyncio.gather(
+            *(execution(i) for i in range(8)), return_exceptions=True
+        )
+        for task_result in result:
+            self.assertIsInstance(task_result, RuntimeError)
+        self.assertEqual(mismatch.calls, 1)
+        self.assertEqual(execution.stats.retries, 0)
+
+        # without retries, all tasks of a bulk fail
+        execution = AsyncBulkCall(PoisonCommand(2), size=8, delay=0.01)
+        result = await asyncio.gather(
+            *(execution(i) for i in range(8)), return_exceptions=True
+        )
+        for task_result in result:
+            self.assertIsInstance(task_result, ValueError)
+        self.assertEqual(execution.stats.retries, 0)
+
     def test_sanity_checks(self):
         """Test against illegal settings"""
         for wrong_size in (0, -1, 0.5, 2j, "15"):
@@ -87,6 +248,15 @@ class TestAsyncBulkCall(TestCase):
             with self.subTest(delay=wrong_delay):
                 with self.assertRaises((ValueError, TypeError)):
                     AsyncBulkCall(CallCounter(), size=100, delay=wrong_delay)
+        for wrong_retry_delay in (-1, -0.5):
+            with self.subTest(retry_delay=wrong_retry_delay):
+                with self.assertRaises(ValueError):
+                    AsyncBulkCall(
+                        CallCounter(),
+                        size=100,
+                        delay=1.0,
+                        retry_delay=wrong_retry_delay,
+                    )
         for wrong_concurrency in (0, 2.3, -5, 17j, "10"):
             with self.subTest(delay=wrong_concurrency):
                 with self.assertRaises(ValueError):
@@ -1,5 +1,7 @@
 from tardis.exceptions.executorexceptions import CommandExecutionFailure
-from tardis.utilities.asynccachemap import AsyncCacheMap
+from tardis.utilities.asynccachemap import AsyncCacheMap, CacheMapDiff
+from tardis.utilities.instrumentation import CACHE_REFRESH_DURATION, CACHE_STALENESS
+from tardis.utilities.instrumentation import HistogramSink, Instrumentation
 
 from ..utilities.utilities import run_async
 
@@ -7,7 +9,9 @@ from json.decoder import JSONDecodeError
 from datetime import datetime
 from datetime import timedelta
 from unittest import TestCase
+from unittest.mock import MagicMock
 
+import asyncio
 import logging
 
 
@@ -70,3 +74,228 @@ class TestAsyncCacheMap(TestCase):
         self.assertTrue(
             datetime.now() - self.async_cache_map.last_update < timedelta(seconds=1)
         )
+
+    def test_shared(self):
+        AsyncCacheMap._shared.clear()
+        shared_map = AsyncCacheMap.shared(
+            ("test", 1), update_coroutine=self.update_function, max_age=1
+        )
+        self.assertIs(
+            AsyncCacheMap.shared(
+                ("test", 1), update_coroutine=self.update_function, max_age=1
+            ),
+            shared_map,
+        )
+        self.assertEqual(shared_map._max_age, 1)
+        self.assertIsNot(
+            AsyncCacheMap.shared(
+                ("test", 2), update_coroutine=self.update_function, max_age=1
+            ),
+            shared_map,
+        )
+        # users caching the data differently do not share a map
+        for parameters in (
+            {},
+            {"max_age": 2},
+            {"max_age": 1, "max_stale_age": 2},
+            {"max_age": 1, "refresh_jitter": 0.2},
+        ):
+            with self.subTest(**parameters):
+                other_map = AsyncCacheMap.shared(
+                    ("test", 1), update_coroutine=self.update_function, **parameters
+                )
+                self.assertIsNot(other_map, shared_map)
+                self.assertEqual(other_map._max_age, parameters.get("max_age", 900))
+        # unused shared maps are discarded
+        del shared_map, other_map
+        self.assertEqual(len(AsyncCacheMap._shared), 0)
+
+    def test_cache_map_diff(self):
+        diff = CacheMapDiff.between({"a": 1, "b": 2, "c": 3}, {"b": 2, "c": 4, "d": 5})
+        self.assertEqual(diff.added, {"d": 5})
+        self.assertEqual(diff.removed, {"a": 1})
+        self.assertEqual(diff.changed, {"c": 4})
+        self.assertEqual(diff.affected_keys, {"a", "c", "d"})
+
+    def test_subscribe(self):
+        self.async_cache_map._max_age = 0
+        subscriber = MagicMock()
+        self.async_cache_map.subscribe(subscriber)
+        self.update_status()
+        subscriber.assert_called_once_with(
+            CacheMapDiff(added=self.test_data, removed={}, changed={})
+        )
+
+        subscriber.reset_mock()
+        self.update_status()
+        subscriber.assert_not_called()
+
+        self.test_data = {"testA": 456}
+        self.update_status()
+        subscriber.assert_called_once_with(
+            CacheMapDiff(
+                added={}, removed={"testB": "Random String"}, changed={"testA": 456}
+            )
+        )
+
+        subscriber.reset_mock()
+        self.async_cache_map.unsubscribe(subscriber)
+        self.test_data = {}
+        self.update_status()
+        subscriber.assert_not_called()
+
+    def test_watch(self):
+        self.async_cache_map._max_age = 0
+        watcher_a, watcher_b = MagicMock(), MagicMock()
+        self.async_cache_map.watch("testA", watcher_a)
+        self.async_cache_map.watch("testB", watcher_b)
+        self.update_status()
+        watcher_a.assert_called_once_with()
+        watcher_b.assert_called_once_with()
+
+        self.test_data = {"testA": 456, "testB": "Random String"}
+        self.update_status()
+        self.assertEqual(watcher_a.call_count, 2)
+        self.assertEqual(watcher_b.call_count, 1)
+
+        self.async_cache_map.unwatch("testA", watcher_a)
+        self.assertNotIn("testA", self.async_cache_map._watchers)
+        self.test_data = {}
+        self.update_status()
+        self.assertEqual(watcher_a.call_count, 2)
+        self.assertEqual(watcher_b.call_count, 2)
+
+    def test_failing_notification(self):
+        failing_watcher = MagicMock(side_effect=RuntimeError)
+        watcher = MagicMock()
+        self.async_cache_map.watch("testA", failing_watcher)
+        self.async_cache_map.watch("testA", watcher)
+        with self.assertLogs(level=logging.ERROR):
+            self.update_status()
+        watcher.assert_called_once_with()
+
+
+class TestAsyncCacheMapBackgroundRefresh(TestCase):
+    def setUp(self):
+        self.updates = 0
+        self.update_started = None
+        self.update_blocked = None
+        self.async_cache_map = AsyncCacheMap(
+            update_coroutine=self.update_function,
+            max_age=0.05,
+            max_stale_age=1,
+            refresh_jitter=0,
+            name="test",
+        )
+
+    def tearDown(self):
+        Instrumentation.active = None
+        refresh_task = self.async_cache_map._refresh_task
+        if refresh_task is not None:
+            refresh_task.cancel()
+            run_async(asyncio.wait, [refresh_task])
+
+    async def update_function(self):
+        self.updates += 1
+        self.update_started = datetime.now()
+        if self.update_blocked is not None:
+            await self.update_blocked.wait()
+        return {"updates": self.updates}
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            AsyncCacheMap(self.update_function, max_age=60, max_stale_age=30)
+        for refresh_jitter in (-0.1, 1):
+            with self.assertRaises(ValueError):
+                AsyncCacheMap(self.update_function, refresh_jitter=refresh_jitter)
+
+    def test_background_refresh(self):
+        async def read():
+            # the first reader has to wait for the data
+            await self.async_cache_map.update_status()
+            self.assertEqual(self.async_cache_map["updates"], 1)
+            self.assertIsNotNone(self.async_cache_map._refresh_task)
+
+            self.update_blocked = asyncio.Event()
+            await asyncio.sleep(0.1)
+            self.assertEqual(self.updates, 2)
+            # readers are served stale data while refreshing
+            await asyncio.wait_for(self.async_cache_map.update_status(), 0.01)
+            self.assertEqual(self.async_cache_map["updates"], 1)
+            self.assertGreater(self.async_cache_map.staleness, 0.05)
+
+            self.update_blocked.set()
+            await asyncio.sleep(0)
+            self.assertGreaterEqual(self.async_cache_map["updates"], 2)
+            self.assertEqual(self.async_cache_map["updates"], self.updates)
+            # data is from the start of the last update
+            self.assertLessEqual(self.async_cache_map.last_update, self.update_started)
+            self.assertLess(
+                self.update_started - self.async_cache_map.last_update,
+                timedelta(seconds=0.01),
+            )
+
+        run_async(read)
+
+    def test_max_stale_age(self):
+        self.async_cache_map._max_stale_age = 0.12
+
+        async def read():
+            await self.async_cache_map.update_status()
+            self.update_blocked = asyncio.Event()
+            await asyncio.sleep(0.2)
+            # too stale to be served, readers wait for fresh data
+            reader = asyncio.ensure_future(self.async_cache_map.update_status())
+            await asyncio.sleep(0.01)
+            self.assertFalse(reader.done())
+            self.update_blocked.set()
+            await reader
+            self.assertLess(self.async_cache_map.staleness, 0.12)
+
+        run_async(read)
+
+    def test_failing_refresh(self):
+        async def read():
+            await self.async_cache_map.update_status()
+            self.async_cache_map._update_coroutine = self.failing_update_function
+            with self.assertLogs(level=logging.WARNING):
+                await asyncio.sleep(0.08)
+            # the last good data is kept and failed refreshes are retried later
+            self.assertEqual(self.async_cache_map["updates"], 1)
+            self.assertEqual(self.updates, 2)
+
+        run_async(read)
+
+    async def failing_update_function(self):
+        self.updates += 1
+        raise CommandExecutionFailure(
+            message="Failure", stdout="Failure", stderr="Failure", exit_code=2
+        )
+
+    def test_idle(self):
+        self.async_cache_map._max_stale_age = 0.05
+
+        async def read():
+            await self.async_cache_map.update_status()
+            refresh_task = self.async_cache_map._refresh_task
+            await asyncio.sleep(0.15)
+            self.assertTrue(refresh_task.done())
+            self.assertIsNone(self.async_cache_map._refresh_task)
+            await self.async_cache_map.update_status()
+            self.assertIsNotNone(self.async_cache_map._refresh_task)
+
+        run_async(read)
+
+    def test_instrumentation(self):
+        sink = HistogramSink()
+        instrumentation = Instrumentation()
+        instrumentation.add_sink(sink)
+        instrumentation.enable()
+
+        async def read():
+            await self.async_cache_map.update_status()
+            await self.async_cache_map.update_status()
+
+        run_async(read)
+        self.assertEqual(sink.get(CACHE_REFRESH_DURATION, cache="test").count, 1)
+        self.assertEqual(sink.get(CACHE_STALENESS, cache="test").count, 2)
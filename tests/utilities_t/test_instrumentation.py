@@ -0,0 +1,154 @@
+from tardis.utilities.instrumentation import Histogram
+from tardis.utilities.instrumentation import HistogramSink
+from tardis.utilities.instrumentation import Instrumentation
+from tardis.utilities.instrumentation import LOOP_LAG, STAGE_DURATION, STATE_DURATION
+from tardis.utilities.attributedict import AttributeDict
+
+from ..utilities.utilities import run_async
+
+from unittest import TestCase
+from unittest.mock import patch
+
+import asyncio
+
+
+class TestHistogram(TestCase):
+    def test_observe(self):
+        histogram = Histogram(buckets=(0.1, 1.0, float("inf")))
+        for value in (0.05, 0.1, 0.5, 20):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 1, 1])
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.sum, 20.65)
+
+        histogram = Histogram(buckets=(0.1,))
+        histogram.observe(1.0)
+        self.assertEqual(histogram.counts, [0])
+        self.assertEqual(histogram.count, 1)
+
+
+class TestHistogramSink(TestCase):
+    def test_observe(self):
+        sink = HistogramSink(buckets=(1.0, float("inf")))
+        sink.observe(STATE_DURATION, 0.5, {"state": "A", "site": "S"})
+        sink.observe(STATE_DURATION, 2.0, {"site": "S", "state": "A"})
+        sink.observe(STATE_DURATION, 0.5, {"state": "B", "site": "S"})
+
+        histogram = sink.get(STATE_DURATION, state="A", site="S")
+        self.assertEqual(histogram.counts, [1, 1])
+        self.assertEqual(sink.get(STATE_DURATION, state="B", site="S").count, 1)
+        self.assertIsNone(sink.get(STATE_DURATION, state="A"))
+        self.assertIsNone(sink.get(LOOP_LAG))
+
+
+class TestInstrumentation(TestCase):
+    def setUp(self):
+        self.sink = HistogramSink()
+        self.instrumentation = Instrumentation(loop_lag_interval=0.01)
+        self.instrumentation.add_sink(self.sink)
+
+    def tearDown(self):
+        self.instrumentation.disable()
+        Instrumentation.active = None
+
+    def test_init(self):
+        for loop_lag_interval in (0, -1):
+            with self.assertRaises(ValueError):
+                Instrumentation(loop_lag_interval=loop_lag_interval)
+
+    @patch("tardis.utilities.instrumentation.Configuration")
+    def test_from_configuration(self, mock_configuration):
+        mock_configuration.return_value = AttributeDict()
+        self.assertIsNone(Instrumentation.from_configuration())
+        self.assertIsNone(Instrumentation.active)
+
+        mock_configuration.return_value = AttributeDict(
+            Instrumentation=AttributeDict(loop_lag_interval=5)
+        )
+        instrumentation = Instrumentation.from_configuration()
+        self.assertIs(Instrumentation.active, instrumentation)
+        self.assertEqual(instrumentation._loop_lag_interval, 5)
+        self.assertIs(Instrumentation.from_configuration(), instrumentation)
+
+        mock_configuration.return_value = AttributeDict(Instrumentation=None)
+        Instrumentation.active = None
+        self.assertIsInstance(Instrumentation.from_configuration(), Instrumentation)
+
+    def test_enable_disable(self):
+        self.assertIsNone(Instrumentation.active)
+        self.instrumentation.enable()
+        self.assertIs(Instrumentation.active, self.instrumentation)
+
+        other_instrumentation = Instrumentation()
+        other_instrumentation.enable()
+        self.assertIs(Instrumentation.active, other_instrumentation)
+
+        self.instrumentation.disable()
+        self.assertIs(Instrumentation.active, other_instrumentation)
+        other_instrumentation.disable()
+        self.assertIsNone(Instrumentation.active)
+
+    def test_sinks(self):
+        self.instrumentation.add_sink(self.sink)
+        self.assertEqual(self.instrumentation.sinks, [self.sink])
+        other_sink = HistogramSink()
+        self.instrumentation.add_sink(other_sink)
+        self.instrumentation.observe(LOOP_LAG, 0.2)
+        self.assertEqual(self.sink.get(LOOP_LAG).count, 1)
+        self.assertEqual(other_sink.get(LOOP_LAG).count, 1)
+
+        self.instrumentation.remove_sink(other_sink)
+        self.instrumentation.observe(LOOP_LAG, 0.2)
+        self.assertEqual(self.sink.get(LOOP_LAG).count, 2)
+        self.assertEqual(other_sink.get(LOOP_LAG).count, 1)
+
+    def test_timed(self):
+        async def sleep():
+            await asyncio.sleep(0.01)
+            return 42
+
+        self.assertEqual(
+            run_async(
+                self.instrumentation.timed, sleep(), STATE_DURATION, state="A", site="S"
+            ),
+            42,
+        )
+        histogram = self.sink.get(STATE_DURATION, state="A", site="S")
+        self.assertEqual(histogram.count, 1)
+        self.assertGreaterEqual(histogram.sum, 0.01)
+
+        async def fail():
+            raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            run_async(
+                self.instrumentation.timed, fail(), STATE_DURATION, state="A", site="S"
+            )
+        self.assertEqual(histogram.count, 2)
+
+    def test_stage_timer(self):
+        def check_demand():
+            pass
+
+        stage_timer = self.instrumentation.stage_timer(state="A", site="S")
+        stage_timer(check_demand, 0.5)
+        histogram = self.sink.get(
+            STAGE_DURATION, state="A", stage="check_demand", site="S"
+        )
+        self.assertEqual(histogram.count, 1)
+        self.assertEqual(histogram.sum, 0.5)
+
+    def test_loop_lag_probe(self):
+        async def probe():
+            self.instrumentation.start_loop_lag_probe()
+            task = self.instrumentation._loop_lag_task
+            self.instrumentation.start_loop_lag_probe()
+            self.assertIs(self.instrumentation._loop_lag_task, task)
+            await asyncio.sleep(0.05)
+            self.instrumentation.disable()
+            await asyncio.sleep(0)
+            self.assertTrue(task.cancelled())
+
+        run_async(probe)
+        self.assertGreaterEqual(self.sink.get(LOOP_LAG).count, 1)
+        self.assertIsNone(self.instrumentation._loop_lag_task)
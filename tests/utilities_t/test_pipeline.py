@@ -1,9 +1,13 @@
 from tardis.utilities.pipeline import PipelineProcessor
 from tardis.utilities.pipeline import StopProcessing
+from tardis.utilities.pipeline import bulk_stage
 from ..utilities.utilities import run_async
 
 from unittest import TestCase
 
+import asyncio
+import logging
+
 
 class TestPipelineProcessor(TestCase):
     def setUp(self):
@@ -55,3 +59,180 @@ class TestPipelineProcessor(TestCase):
             ),
             99,
         )
+
+    def test_run_pipeline_bulk(self):
+        async def test_bulk_double(pipeline_inputs, drones):
+            self.assertEqual(drones, ["drone_1", "drone_2", "drone_3"])
+            return [
+                StopProcessing(last_result=-1) if drone == "drone_2" else value * 2
+                for value, drone in zip(pipeline_inputs, drones)
+            ]
+
+        @bulk_stage(test_bulk_double)
+        async def test_double(pipeline_input, drone):
+            raise AssertionError("bulk variant is expected to be used")
+
+        async def test_increment(pipeline_input, drone):
+            if drone == "drone_3":
+                raise StopProcessing(last_result=99)
+            return pipeline_input + 1
+
+        pipeline_processor = PipelineProcessor([test_double, test_increment])
+        self.assertEqual(
+            run_async(
+                pipeline_processor.run_pipeline_bulk,
+                pipeline_input=10,
+                drones=["drone_1", "drone_2", "drone_3"],
+            ),
+            [21, -1, 99],
+        )
+
+    def test_run_pipeline_bulk_exceptions(self):
+        error = RuntimeError("drone_2 failed")
+
+        async def test_bulk_fail(pipeline_inputs, drones):
+            raise RuntimeError("bulk failed")
+
+        @bulk_stage(test_bulk_fail)
+        async def test_double(pipeline_input, drone):
+            if drone == "drone_2":
+                raise error
+            return pipeline_input * 2
+
+        def test_increment(pipeline_input, drone):
+            if drone == "drone_3":
+                raise ValueError(drone)
+            return pipeline_input + 1
+
+        pipeline_processor = PipelineProcessor([test_double, test_increment])
+        # failing bulk stages are repeated for each drone to isolate failures
+        results = run_async(
+            pipeline_processor.run_pipeline_bulk,
+            pipeline_input=10,
+            drones=["drone_1", "drone_2", "drone_3"],
+        )
+        self.assertEqual(results[:2], [21, error])
+        self.assertIsInstance(results[2], ValueError)
+
+    def test_run_pipeline_bulk_failed_bulk_logged(self):
+        async def test_bulk_fail(pipeline_inputs, drones):
+            raise RuntimeError("bulk failed")
+
+        @bulk_stage(test_bulk_fail)
+        async def test_double(pipeline_input, drone):
+            return pipeline_input * 2
+
+        pipeline_processor = PipelineProcessor([test_double])
+        with self.assertLogs(
+            "cobald.runtime.tardis.utilities.pipeline", level=logging.WARNING
+        ) as logs:
+            results = run_async(
+                pipeline_processor.run_pipeline_bulk,
+                pipeline_input=10,
+                drones=["drone_1", "drone_2"],
+            )
+        self.assertEqual(results, [20, 20])
+        self.assertIn("bulk failed", logs.output[0])
+
+    def test_run_pipeline_bulk_cancelled(self):
+        async def test_cancel(pipeline_input, drone):
+            if drone == "drone_2":
+                raise asyncio.CancelledError()
+            return pipeline_input
+
+        pipeline_processor = PipelineProcessor([test_cancel])
+        # cancellation is not mistaken for the result of a drone
+        with self.assertRaises(asyncio.CancelledError):
+            run_async(
+                pipeline_processor.run_pipeline_bulk,
+                pipeline_input=10,
+                drones=["drone_1", "drone_2"],
+            )
+
+    def test_sync_stages(self):
+        def test_double(pipeline_input, drone):
+            return pipeline_input * 2
+
+        async def test_increment(pipeline_input, drone):
+            return pipeline_input + 1
+
+        def test_stop_processing(pipeline_input, drone):
+            if drone == "drone_3":
+                raise StopProcessing(last_result=99)
+            return pipeline_input
+
+        pipeline_processor = PipelineProcessor(
+            [test_double, test_increment, test_stop_processing, test_double]
+        )
+        self.assertEqual(
+            run_async(pipeline_processor.run_pipeline, pipeline_input=10, drone="d"),
+            42,
+        )
+        self.assertEqual(
+            run_async(
+                pipeline_processor.run_pipeline_bulk,
+                pipeline_input=10,
+                drones=["drone_1", "drone_3"],
+            ),
+            [42, 99],
+        )
+
+    def test_stage_timer(self):
+        def test_double(pipeline_input, drone):
+            return pipeline_input * 2
+
+        async def test_stop_processing(pipeline_input, drone):
+            if drone == "drone_3":
+                raise StopProcessing(last_result=99)
+            return pipeline_input
+
+        def test_increment(pipeline_input, drone):
+            return pipeline_input + 1
+
+        timings = []
+
+        def stage_timer(stage, duration):
+            self.assertGreaterEqual(duration, 0)
+            timings.append(stage.__name__)
+
+        pipeline_processor = PipelineProcessor(
+            [test_double, test_stop_processing, test_increment]
+        )
+        self.assertEqual(
+            run_async(
+                pipeline_processor.run_pipeline,
+                pipeline_input=10,
+                drone="drone_1",
+                stage_timer=stage_timer,
+            ),
+            21,
+        )
+        self.assertEqual(
+            timings, ["test_double", "test_stop_processing", "test_increment"]
+        )
+
+        timings.clear()
+        self.assertEqual(
+            run_async(
+                pipeline_processor.run_pipeline,
+                pipeline_input=10,
+                drone="drone_3",
+                stage_timer=stage_timer,
+            ),
+            99,
+        )
+        self.assertEqual(timings, ["test_double", "test_stop_processing"])
+
+        timings.clear()
+        self.assertEqual(
+            run_async(
+                pipeline_processor.run_pipeline_bulk,
+                pipeline_input=10,
+                drones=["drone_1", "drone_3"],
+                stage_timer=stage_timer,
+            ),
+            [21, 99],
+        )
+        self.assertEqual(
+            timings, ["test_double", "test_stop_processing", "test_increment"]
+        )
@@ -0,0 +1,136 @@
+from tardis.interfaces.plugin import Plugin
+from tardis.resources.dronestates import BootingState, RequestState
+from tardis.utilities.attributedict import AttributeDict
+from tardis.utilities.plugindispatcher import DispatchPolicy, PluginDispatcher
+
+from ..utilities.utilities import run_async
+
+from unittest import TestCase
+
+import asyncio
+import logging
+
+
+class MockPlugin(Plugin):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.notifications = []
+
+    async def notify(self, state, resource_attributes):
+        await asyncio.sleep(self.delay)
+        self.notifications.append((state, resource_attributes.drone_uuid))
+
+
+class LosslessPlugin(MockPlugin):
+    requires_all_notifications = True
+
+
+class TestPluginDispatcher(TestCase):
+    def setUp(self):
+        self.plugin = MockPlugin()
+
+    def notify_all(self, dispatcher, notifications):
+        async def notify():
+            for state, drone_uuid in notifications:
+                await dispatcher.notify(state, AttributeDict(drone_uuid=drone_uuid))
+                # allow the worker to pick up the notification
+                await asyncio.sleep(0)
+            await dispatcher.flush()
+
+        run_async(notify)
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            PluginDispatcher(self.plugin, policy="unknown")
+        with self.assertRaises(ValueError):
+            PluginDispatcher(self.plugin, max_queue_size=0)
+        for policy in ("drop_oldest", "coalesce"):
+            with self.assertRaises(ValueError):
+                PluginDispatcher(LosslessPlugin(), policy=policy)
+        PluginDispatcher(LosslessPlugin(), policy="block")
+
+    def test_delegation(self):
+        dispatcher = PluginDispatcher(self.plugin)
+        self.assertIs(dispatcher.plugin, self.plugin)
+        self.assertEqual(dispatcher.delay, 0.0)
+        with self.assertRaises(AttributeError):
+            dispatcher.not_existing  # noqa: B018
+
+    def test_block(self):
+        self.plugin.delay = 0.01
+        dispatcher = PluginDispatcher(self.plugin, max_queue_size=1)
+        notifications = [
+            (RequestState(), "drone-1"),
+            (RequestState(), "drone-2"),
+            (BootingState(), "drone-1"),
+        ]
+        self.notify_all(dispatcher, notifications)
+        self.assertEqual(self.plugin.notifications, notifications)
+        self.assertEqual(dispatcher.dispatched, 3)
+        self.assertEqual(dispatcher.queue_length, 0)
+        self.assertGreaterEqual(dispatcher.latency, 0.0)
+
+    def test_snapshot(self):
+        dispatcher = PluginDispatcher(self.plugin)
+        resource_attributes = AttributeDict(drone_uuid="drone-1")
+
+        async def notify():
+            await dispatcher.notify(RequestState(), resource_attributes)
+            resource_attributes.drone_uuid = "changed"
+            await dispatcher.flush()
+
+        run_async(notify)
+        self.assertEqual(self.plugin.notifications, [(RequestState(), "drone-1")])
+
+    def test_drop_oldest(self):
+        self.plugin.delay = 0.01
+        dispatcher = PluginDispatcher(
+            self.plugin, max_queue_size=1, policy=DispatchPolicy.drop_oldest
+        )
+        self.notify_all(
+            dispatcher,
+            [
+                (RequestState(), "drone-1"),
+                (RequestState(), "drone-2"),
+                (RequestState(), "drone-3"),
+            ],
+        )
+        # the first notification is in delivery, the second one gets dropped
+        self.assertEqual(
+            self.plugin.notifications,
+            [(RequestState(), "drone-1"), (RequestState(), "drone-3")],
+        )
+        self.assertEqual(dispatcher.dropped, 1)
+
+    def test_coalesce(self):
+        self.plugin.delay = 0.01
+        dispatcher = PluginDispatcher(self.plugin, policy="coalesce")
+        self.notify_all(
+            dispatcher,
+            [
+                (RequestState(), "drone-1"),
+                (RequestState(), "drone-2"),
+                (BootingState(), "drone-2"),
+                (BootingState(), "drone-1"),
+            ],
+        )
+        self.assertEqual(
+            self.plugin.notifications,
+            [
+                (RequestState(), "drone-1"),
+                (BootingState(), "drone-2"),
+                (BootingState(), "drone-1"),
+            ],
+        )
+        self.assertEqual(dispatcher.coalesced, 1)
+
+    def test_failing_plugin(self):
+        async def failing_notify(state, resource_attributes):
+            raise RuntimeError("notification failed")
+
+        self.plugin.notify = failing_notify
+        dispatcher = PluginDispatcher(self.plugin)
+        with self.assertLogs(level=logging.ERROR):
+            self.notify_all(dispatcher, [(RequestState(), "drone-1")])
+        self.assertEqual(dispatcher.dispatched, 0)
+        self.assertEqual(dispatcher.queue_length, 0)
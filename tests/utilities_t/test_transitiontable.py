@@ -0,0 +1,94 @@
+from tardis.interfaces.state import State
+from tardis.utilities.transitiontable import compile_transition_table
+
+from enum import Enum
+from unittest import TestCase
+
+
+class Light(Enum):
+    Red = 1
+    Green = 2
+
+
+class Button(Enum):
+    Pressed = 1
+    Released = 2
+
+
+class StopState(State):
+    @classmethod
+    async def run(cls, drone):
+        pass
+
+
+class GoState(State):
+    @classmethod
+    async def run(cls, drone):
+        pass
+
+
+class TestTransitionTable(TestCase):
+    def test_compile_one_dimension(self):
+        table = compile_transition_table(
+            StopState, {Light.Red: StopState, Light.Green: GoState}, Light
+        )
+        self.assertIsInstance(table[Light.Red.value - 1], StopState)
+        self.assertIsInstance(table[Light.Green.value - 1], GoState)
+
+    def test_compile_two_dimensions(self):
+        table = compile_transition_table(
+            StopState,
+            {
+                Light.Red: StopState,
+                Light.Green: {Button.Pressed: GoState, Button.Released: StopState},
+            },
+            Light,
+            Button,
+        )
+        for button in Button:
+            self.assertIsInstance(
+                table[Light.Red.value - 1][button.value - 1], StopState
+            )
+        self.assertIsInstance(
+            table[Light.Green.value - 1][Button.Pressed.value - 1], GoState
+        )
+        self.assertIsInstance(
+            table[Light.Green.value - 1][Button.Released.value - 1], StopState
+        )
+
+    def test_shared_instances(self):
+        table = compile_transition_table(
+            StopState, {Light.Red: StopState, Light.Green: StopState}, Light
+        )
+        other_table = compile_transition_table(
+            GoState, {Light.Red: StopState, Light.Green: GoState}, Light
+        )
+        self.assertIs(table[0], table[1])
+        self.assertIs(table[0], other_table[0])
+
+    def test_incomplete_table(self):
+        with self.assertRaises(ValueError):
+            compile_transition_table(StopState, {Light.Red: StopState}, Light)
+
+        with self.assertRaises(ValueError):
+            compile_transition_table(
+                StopState,
+                {Light.Red: StopState, Light.Green: {Button.Pressed: GoState}},
+                Light,
+                Button,
+            )
+
+    def test_invalid_table(self):
+        with self.assertRaises(TypeError):
+            compile_transition_table(
+                StopState, {Light.Red: StopState, Light.Green: "GoState"}, Light
+            )
+
+        class Sparse(Enum):
+            One = 1
+            Three = 3
+
+        with self.assertRaises(ValueError):
+            compile_transition_table(
+                StopState, {Sparse.One: StopState, Sparse.Three: GoState}, Sparse
+            )
@@ -2,7 +2,9 @@ import logging
 
 from tardis.resources.dronestates import RequestState
 from tardis.utilities.attributedict import AttributeDict
+from tardis.exceptions.executorexceptions import CommandExecutionFailure
 from tardis.utilities.utils import (
+    copy_exception,
     csv_parser,
     disable_logging,
     htcondor_cmd_option_formatter,
@@ -123,6 +125,7 @@ class TestStrToState(TestCase):
         test = [{"state": "RequestState", "drone_uuid": "test-abc123"}]
         converted_test = load_states(test)
         self.assertTrue(converted_test[0]["state"], RequestState)
+        self.assertIs(converted_test[0]["state"], RequestState())
         self.assertEqual(converted_test[0]["drone_uuid"], "test-abc123")
 
 
@@ -152,3 +155,22 @@ class TestSlurmCMDOptionFormatter(TestCase):
         self.assertEqual(
             option_string, "-foo bar -test --foo_long=bar_long --test_long"
         )
+
+
+class TestCopyException(TestCase):
+    def test_copy_exception(self):
+        try:
+            try:
+                raise KeyError("test")
+            except KeyError as ke:
+                raise CommandExecutionFailure(message="failed", exit_code=2) from ke
+        except CommandExecutionFailure as cef:
+            exception = cef
+
+        copied = copy_exception(exception)
+        self.assertIsNot(copied, exception)
+        self.assertIsInstance(copied, CommandExecutionFailure)
+        self.assertEqual(str(copied), str(exception))
+        self.assertEqual(copied.exit_code, 2)
+        self.assertIs(copied.__cause__, exception.__cause__)
+        self.assertIs(copied.__traceback__, exception.__traceback__)